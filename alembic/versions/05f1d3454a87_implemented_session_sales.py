@@ -0,0 +1,43 @@
+"""Implemented session sales
+
+Revision ID: 05f1d3454a87
+Revises: 12def91c35a5
+Create Date: 2026-10-19 18:21:40.771902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '05f1d3454a87'
+down_revision: Union[str, Sequence[str], None] = '12def91c35a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('session_sales',
+    sa.Column('session_id', sa.String(), nullable=False),
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('movie_id', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=False),
+    sa.Column('seats_sold', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index('ix_session_sales_tenant_day', 'session_sales', ['tenant_id', 'day'], unique=False)
+    op.create_index('ix_session_sales_tenant_movie', 'session_sales', ['tenant_id', 'movie_id', 'day'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_session_sales_tenant_movie', table_name='session_sales')
+    op.drop_index('ix_session_sales_tenant_day', table_name='session_sales')
+    op.drop_table('session_sales')
@@ -0,0 +1,66 @@
+"""Implemented tenants
+
+Revision ID: 12def91c35a5
+Revises: 186a5ad131a6
+Create Date: 2026-10-19 17:02:11.318574
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '12def91c35a5'
+down_revision: Union[str, Sequence[str], None] = '186a5ad131a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TENANT_TABLES = ('movies', 'sessions', 'cinema_rooms')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tenants',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Everything created before tenants belongs to the default one
+    op.execute("INSERT INTO tenants (id, name) VALUES ('default', 'Default')")
+
+    for table in TENANT_TABLES:
+        op.add_column(table, sa.Column('tenant_id', sa.String(), server_default='default', nullable=False))
+        op.alter_column(table, 'tenant_id', server_default=None)
+        op.create_foreign_key(f'{table}_tenant_id_fkey', table, 'tenants', ['tenant_id'], ['id'])
+
+    op.drop_constraint('movies_title_key', 'movies', type_='unique')
+    op.create_unique_constraint('uq_movies_tenant_title', 'movies', ['tenant_id', 'title'])
+    op.drop_index('ix_movies_year', table_name='movies')
+    op.create_index('ix_movies_tenant_year', 'movies', ['tenant_id', 'year'], unique=False)
+
+    op.drop_constraint('cinema_rooms_name_key', 'cinema_rooms', type_='unique')
+    op.create_unique_constraint('uq_cinema_rooms_tenant_name', 'cinema_rooms', ['tenant_id', 'name'])
+
+    op.create_index('ix_sessions_tenant_time', 'sessions', ['tenant_id', 'session_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sessions_tenant_time', table_name='sessions')
+
+    op.drop_constraint('uq_cinema_rooms_tenant_name', 'cinema_rooms', type_='unique')
+    op.create_unique_constraint('cinema_rooms_name_key', 'cinema_rooms', ['name'])
+
+    op.drop_index('ix_movies_tenant_year', table_name='movies')
+    op.create_index('ix_movies_year', 'movies', ['year'], unique=False)
+    op.drop_constraint('uq_movies_tenant_title', 'movies', type_='unique')
+    op.create_unique_constraint('movies_title_key', 'movies', ['title'])
+
+    for table in TENANT_TABLES:
+        op.drop_constraint(f'{table}_tenant_id_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'tenant_id')
+
+    op.drop_table('tenants')
@@ -0,0 +1,64 @@
+"""Admission positions in database
+
+Revision ID: 5e0b7c1f3a92
+Revises: 84f5c4f5e67d
+Create Date: 2026-10-19 23:05:17.482630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b7c1f3a92'
+down_revision: Union[str, Sequence[str], None] = '84f5c4f5e67d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('admission_queues', sa.Column('issued', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('admission_queues', sa.Column('cursor_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+    op.alter_column('admission_queues', 'admitted_position',
+               existing_type=sa.Integer(),
+               type_=sa.Float(),
+               existing_nullable=False)
+    op.add_column('admission_tickets', sa.Column('admitted_at', sa.DateTime(), nullable=True))
+
+    # Positions were handed out in memory, carry on after the last one
+    op.execute(
+        """
+        UPDATE admission_queues
+        SET issued = tickets.issued
+        FROM (
+            SELECT session_id, max(position) AS issued
+            FROM admission_tickets
+            GROUP BY session_id
+        ) AS tickets
+        WHERE tickets.session_id = admission_queues.session_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE admission_tickets
+        SET admitted_at = now()
+        FROM admission_queues
+        WHERE admission_queues.session_id = admission_tickets.session_id
+          AND admission_tickets.position <= admission_queues.admitted_position
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('admission_tickets', 'admitted_at')
+    op.alter_column('admission_queues', 'admitted_position',
+               existing_type=sa.Float(),
+               type_=sa.Integer(),
+               existing_nullable=False,
+               postgresql_using='floor(admitted_position)::integer')
+    op.drop_column('admission_queues', 'cursor_at')
+    op.drop_column('admission_queues', 'issued')
@@ -0,0 +1,46 @@
+"""Implemented session seat counters
+
+Revision ID: 97b8aebc0185
+Revises: d424e9b880cf
+Create Date: 2026-10-19 14:10:52.604431
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '97b8aebc0185'
+down_revision: Union[str, Sequence[str], None] = 'd424e9b880cf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sessions', sa.Column('held_seats', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('sessions', sa.Column('confirmed_seats', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('sessions', sa.Column('free_seats', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        "UPDATE seat_reservations SET status = 'expired' "
+        "WHERE status = 'on_hold' AND expires_at <= now()"
+    )
+    op.execute(
+        'UPDATE sessions SET '
+        "held_seats = (SELECT count(*) FROM seat_reservations r WHERE r.session_id = sessions.id AND r.status = 'on_hold'), "
+        "confirmed_seats = (SELECT count(*) FROM seat_reservations r WHERE r.session_id = sessions.id AND r.status = 'confirmed')"
+    )
+    op.execute(
+        'UPDATE sessions SET free_seats = cinema_rooms.total_seats - held_seats - confirmed_seats '
+        'FROM cinema_rooms WHERE cinema_rooms.id = sessions.cinema_room_id'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sessions', 'free_seats')
+    op.drop_column('sessions', 'confirmed_seats')
+    op.drop_column('sessions', 'held_seats')
@@ -0,0 +1,106 @@
+"""Implemented poster blobs
+
+Revision ID: 9ea01b418ed5
+Revises: a1c6746da6bc
+Create Date: 2026-10-19 12:04:38.771620
+
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Sequence, Union
+from uuid import uuid4
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9ea01b418ed5'
+down_revision: Union[str, Sequence[str], None] = 'a1c6746da6bc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POSTER_ROOT = './media/movies_posters'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('poster_blobs',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.drop_constraint('movies_poster_path_key', 'movies', type_='unique')
+
+    # Copy the uuid named posters to their content addressed keys. Nothing is
+    # deleted here: the copies are only used once this commits, and from then
+    # on the originals have no poster_blobs row, so the poster garbage
+    # collection removes them as orphans. A rolled back or repeated run
+    # finds every original where it was.
+    connection = op.get_bind()
+    movies = connection.execute(sa.text('SELECT id, poster_path FROM movies'))
+    blobs = {}
+    for movie_id, poster_path in movies.all():
+        if not os.path.exists(poster_path):
+            continue
+
+        with open(poster_path, 'rb') as poster:
+            data = poster.read()
+        digest = hashlib.sha256(data).hexdigest()
+        key = f'{digest[:2]}/{digest[2:4]}/{digest}.png'
+
+        path = os.path.join(POSTER_ROOT, key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # A run interrupted mid copy never leaves a truncated blob behind
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as blob:
+                blob.write(data)
+            os.replace(temp_path, path)
+
+        size, ref_count = blobs.get(key, (len(data), 0))
+        blobs[key] = (size, ref_count + 1)
+        connection.execute(
+            sa.text('UPDATE movies SET poster_path = :key WHERE id = :id'),
+            {'key': key, 'id': movie_id},
+        )
+
+    if blobs:
+        connection.execute(
+            sa.text(
+                'INSERT INTO poster_blobs (key, size, ref_count) '
+                'VALUES (:key, :size, :ref_count)'
+            ),
+            [
+                {'key': key, 'size': size, 'ref_count': ref_count}
+                for key, (size, ref_count) in blobs.items()
+            ],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Give every movie its own uuid named copy again, shared keys would
+    # break the unique poster_path. The blobs are left in place, a rolled
+    # back downgrade still needs them; once it has committed nothing reads
+    # the two level key directories and they can be deleted by hand.
+    connection = op.get_bind()
+    movies = connection.execute(sa.text('SELECT id, poster_path FROM movies'))
+    for movie_id, key in movies.all():
+        poster_path = os.path.join(POSTER_ROOT, f'{uuid4()}.png')
+        blob_path = os.path.join(POSTER_ROOT, key)
+        if os.path.exists(blob_path):
+            shutil.copyfile(blob_path, poster_path)
+
+        connection.execute(
+            sa.text('UPDATE movies SET poster_path = :path WHERE id = :id'),
+            {'path': poster_path, 'id': movie_id},
+        )
+
+    op.create_unique_constraint('movies_poster_path_key', 'movies', ['poster_path'])
+    op.drop_table('poster_blobs')
@@ -0,0 +1,46 @@
+"""Implemented movie search indexes
+
+Revision ID: a1c6746da6bc
+Revises: d18ac7e490de
+Create Date: 2026-10-19 11:20:06.517932
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c6746da6bc'
+down_revision: Union[str, Sequence[str], None] = 'd18ac7e490de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_movies_search_document',
+        'movies',
+        [sa.text("to_tsvector('simple', title || ' ' || genre)")],
+        unique=False,
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_movies_title_trgm',
+        'movies',
+        ['title'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+    op.create_index('ix_movies_year', 'movies', ['year'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movies_year', table_name='movies')
+    op.drop_index('ix_movies_title_trgm', table_name='movies')
+    op.drop_index('ix_movies_search_document', table_name='movies')
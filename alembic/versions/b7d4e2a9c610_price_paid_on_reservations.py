@@ -0,0 +1,48 @@
+"""Price paid on reservations
+
+Revision ID: b7d4e2a9c610
+Revises: 5e0b7c1f3a92
+Create Date: 2026-10-19 23:41:52.907314
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e2a9c610'
+down_revision: Union[str, Sequence[str], None] = '5e0b7c1f3a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('seat_reservations', sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=True))
+
+    # What was paid before was never stored, the current prices are the best
+    # guess left
+    op.execute(
+        """
+        UPDATE seat_reservations
+        SET price = session_prices.price
+        FROM seats, sessions, cinema_rooms, session_prices
+        WHERE seat_reservations.status = 'confirmed'
+          AND seats.id = seat_reservations.seat_id
+          AND sessions.id = seat_reservations.session_id
+          AND cinema_rooms.id = sessions.cinema_room_id
+          AND session_prices.session_id = seat_reservations.session_id
+          AND session_prices.category = CASE
+              WHEN seats.is_accessible THEN 'accessible'
+              WHEN seats.row = ANY (cinema_rooms.premium_rows) THEN 'premium'
+              ELSE 'standard'
+          END::seatcategory
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('seat_reservations', 'price')
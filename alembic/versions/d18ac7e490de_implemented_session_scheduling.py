@@ -0,0 +1,70 @@
+"""Implemented session scheduling
+
+Revision ID: d18ac7e490de
+Revises: dbb67f1c901c
+Create Date: 2026-10-19 10:41:53.902774
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.settings import Settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd18ac7e490de'
+down_revision: Union[str, Sequence[str], None] = 'dbb67f1c901c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('movies', sa.Column('runtime_minutes', sa.Integer(), server_default='120', nullable=False))
+    op.alter_column('movies', 'runtime_minutes', server_default=None)
+
+    op.add_column('sessions', sa.Column('ends_at', sa.DateTime(), nullable=True))
+    op.execute(
+        sa.text(
+            'UPDATE sessions SET ends_at = sessions.session_time '
+            '+ make_interval(mins => movies.runtime_minutes + :cleaning) '
+            'FROM movies WHERE movies.id = sessions.movie_id'
+        ).bindparams(cleaning=Settings().SESSION_CLEANING_MINUTES)
+    )
+    op.alter_column('sessions', 'ends_at', nullable=False)
+
+    # The constraint cannot be added over sessions that already collide, list
+    # them all so they can be rescheduled before upgrading again
+    overlaps = op.get_bind().execute(sa.text(
+        'SELECT earlier.cinema_room_id, earlier.id, later.id FROM sessions earlier '
+        'JOIN sessions later ON later.cinema_room_id = earlier.cinema_room_id '
+        'AND (later.session_time, later.id) > (earlier.session_time, earlier.id) '
+        'AND later.session_time < earlier.ends_at '
+        'ORDER BY earlier.cinema_room_id, earlier.session_time'
+    )).all()
+    if overlaps:
+        raise RuntimeError(
+            'Sessions overlap in the same cinema room, reschedule them first:\n'
+            + '\n'.join(
+                f'room {room}: session {earlier} runs into session {later}'
+                for room, earlier, later in overlaps
+            )
+        )
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.create_exclude_constraint(
+        'ex_session_room_overlap',
+        'sessions',
+        ('cinema_room_id', '='),
+        (sa.text('tsrange(session_time, ends_at)'), '&&'),
+        using='gist',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ex_session_room_overlap', 'sessions', type_='exclude')
+    op.drop_column('sessions', 'ends_at')
+    op.drop_column('movies', 'runtime_minutes')
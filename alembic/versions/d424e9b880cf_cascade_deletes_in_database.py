@@ -0,0 +1,59 @@
+"""Cascade deletes in database
+
+Revision ID: d424e9b880cf
+Revises: 9ea01b418ed5
+Create Date: 2026-10-19 12:48:10.236985
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd424e9b880cf'
+down_revision: Union[str, Sequence[str], None] = '9ea01b418ed5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referred table, referred column)
+CASCADED_FOREIGN_KEYS = [
+    ('sessions', 'movie_id', 'movies', 'id'),
+    ('sessions', 'cinema_room_id', 'cinema_rooms', 'id'),
+    ('seats', 'cinema_room_id', 'cinema_rooms', 'id'),
+    ('seat_reservations', 'user_id', 'users', 'id'),
+    ('seat_reservations', 'session_id', 'sessions', 'id'),
+    ('seat_reservations', 'seat_id', 'seats', 'id'),
+    ('admission_queues', 'session_id', 'sessions', 'id'),
+    ('admission_tickets', 'user_id', 'users', 'id'),
+    ('session_prices', 'session_id', 'sessions', 'id'),
+]
+
+
+def _recreate_foreign_keys(ondelete: str | None) -> None:
+    for table, column, referred_table, referred_column in CASCADED_FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(
+            name, table, referred_table, [column], [referred_column], ondelete=ondelete
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _recreate_foreign_keys('CASCADE')
+    # Cascades look children up by their foreign key, seats and reservations by
+    # session are already covered by their unique constraints
+    op.create_index('ix_sessions_cinema_room_id', 'sessions', ['cinema_room_id'], unique=False)
+    op.create_index('ix_sessions_movie_id', 'sessions', ['movie_id'], unique=False)
+    op.create_index('ix_seat_reservations_seat_id', 'seat_reservations', ['seat_id'], unique=False)
+    op.create_index('ix_seat_reservations_user_id', 'seat_reservations', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_seat_reservations_user_id', table_name='seat_reservations')
+    op.drop_index('ix_seat_reservations_seat_id', table_name='seat_reservations')
+    op.drop_index('ix_sessions_movie_id', table_name='sessions')
+    op.drop_index('ix_sessions_cinema_room_id', table_name='sessions')
+    _recreate_foreign_keys(None)
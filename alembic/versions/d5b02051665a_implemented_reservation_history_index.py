@@ -0,0 +1,37 @@
+"""Implemented reservation history index
+
+Revision ID: d5b02051665a
+Revises: 05f1d3454a87
+Create Date: 2026-10-19 19:05:27.140386
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b02051665a'
+down_revision: Union[str, Sequence[str], None] = '05f1d3454a87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Leads with user_id, so it also serves the ON DELETE CASCADE from users
+    op.create_index(
+        'ix_seat_reservations_user_created',
+        'seat_reservations',
+        ['user_id', 'created_at', 'id'],
+        unique=False,
+        postgresql_include=['session_id', 'seat_id', 'status', 'updated_at'],
+    )
+    op.drop_index('ix_seat_reservations_user_id', table_name='seat_reservations')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_seat_reservations_user_id', 'seat_reservations', ['user_id'], unique=False)
+    op.drop_index('ix_seat_reservations_user_created', table_name='seat_reservations')
@@ -0,0 +1,377 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from sqlalchemy import Float, cast, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import tenant_engines
+from app.models import AdmissionQueue, AdmissionTicket
+from app.models import Session as MovieSession
+from app.settings import Settings
+
+logger = logging.getLogger('uvicorn.error')
+
+
+def admitted_cursor():
+    """Admission cursor of a queue row as of now.
+
+    The cursor moves from `admitted_position` at `rate_per_second` since
+    `cursor_at` and never runs ahead of the issued tickets.
+    """
+    elapsed = cast(func.extract('epoch', func.now() - AdmissionQueue.cursor_at), Float)
+    return func.least(
+        cast(AdmissionQueue.issued, Float),
+        AdmissionQueue.admitted_position + elapsed * AdmissionQueue.rate_per_second,
+    )
+
+
+class QueueState:
+    """Snapshot of the admission queue of a single Session.
+
+    Tickets get increasing positions and an admission cursor moves forward at
+    `rate` positions per second, so a ticket is admitted once the cursor
+    reaches its position. Positions and the cursor live in the queue row,
+    every worker extrapolates the same cursor from its last snapshot.
+
+    `tickets` caches the tickets this worker has seen, a miss is read from
+    the database.
+    """
+
+    __slots__ = (
+        'rate', 'tenant_id', 'schema', 'admitted', 'issued', 'synced_at',
+        'tickets', 'users',
+    )
+
+    def __init__(
+            self,
+            rate: float,
+            tenant_id: str,
+            schema: str | None = None,
+            admitted: float = 0,
+            issued: int = 0,
+    ):
+        self.rate = rate
+        self.tenant_id = tenant_id
+        # Tenant schema the queue is stored in, None for the shared tables
+        self.schema = schema
+        self.tickets: dict[str, tuple[int, str]] = {}
+        self.users: dict[str, str] = {}
+        self.sync(rate, admitted, issued)
+
+    def sync(self, rate: float, admitted: float, issued: int):
+        self.rate = rate
+        self.admitted = admitted
+        self.issued = issued
+        self.synced_at = time.monotonic()
+
+    def advance(self) -> int:
+        elapsed = time.monotonic() - self.synced_at
+        return int(min(self.issued, self.admitted + elapsed * self.rate))
+
+    def add(self, token: str, position: int, user_id: str):
+        self.tickets[token] = (position, user_id)
+        self.users[user_id] = token
+
+
+class AdmissionQueues:
+    def __init__(self, ticket_ttl: float):
+        self.ticket_ttl = ticket_ttl
+        self._queues: dict[str, QueueState] = {}
+
+    def get(self, session_id: str) -> QueueState | None:
+        return self._queues.get(session_id)
+
+    async def is_gated(
+            self, session: AsyncSession, session_id: str, tenant_id: str
+    ) -> bool:
+        state = self._queues.get(session_id)
+        if not state:
+            state = await self._load_queue(session, session_id)
+
+        return state is not None and state.tenant_id == tenant_id
+
+    async def _load_queue(
+            self, session: AsyncSession, session_id: str
+    ) -> QueueState | None:
+        queue = await session.execute(
+            select(
+                AdmissionQueue.rate_per_second,
+                MovieSession.tenant_id,
+                admitted_cursor(),
+                AdmissionQueue.issued,
+            )
+            .join(MovieSession, MovieSession.id == AdmissionQueue.session_id)
+            .where(AdmissionQueue.session_id == session_id)
+        )
+        row = queue.first()
+        if not row:
+            return None
+
+        rate, tenant_id, admitted, issued = row
+        state = QueueState(
+            rate, tenant_id, session.info.get('tenant_schema'), admitted, issued
+        )
+        self._queues[session_id] = state
+        return state
+
+    async def open(self, session: AsyncSession, session_id: str, rate: float):
+        upsert = insert(AdmissionQueue).values(
+            session_id=session_id, rate_per_second=rate, admitted_position=0
+        )
+        queue = await session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=['session_id'],
+                # A new rate moves the cursor on from where it is now
+                set_={
+                    'admitted_position': admitted_cursor(),
+                    'cursor_at': func.now(),
+                    'rate_per_second': upsert.excluded.rate_per_second,
+                },
+            ).returning(AdmissionQueue.admitted_position, AdmissionQueue.issued)
+        )
+        admitted, issued = queue.one()
+        await session.commit()
+
+        state = self._queues.get(session_id)
+        if state:
+            state.sync(rate, admitted, issued)
+        else:
+            self._queues[session_id] = QueueState(
+                rate,
+                session.info['tenant_id'],
+                session.info.get('tenant_schema'),
+                admitted,
+                issued,
+            )
+
+    async def close(self, session: AsyncSession, session_id: str):
+        await session.execute(
+            delete(AdmissionQueue).where(AdmissionQueue.session_id == session_id)
+        )
+        await session.commit()
+        self._queues.pop(session_id, None)
+
+    async def join(
+            self, session: AsyncSession, session_id: str, user_id: str
+    ) -> tuple[str, int] | None:
+        """Ticket of `user_id`, issuing one if needed, None if the queue closed."""
+        state = self._queues[session_id]
+
+        token = state.users.get(user_id)
+        if token:
+            return token, state.tickets[token][0]
+
+        by_user = (
+            AdmissionTicket.session_id == session_id,
+            AdmissionTicket.user_id == user_id,
+        )
+        ticket = (
+            await session.execute(
+                select(AdmissionTicket.id, AdmissionTicket.position).where(*by_user)
+            )
+        ).first()
+        if ticket:
+            token, position = ticket
+            state.add(token, position, user_id)
+            return token, position
+
+        # The row lock hands out positions in order across workers, and moving
+        # the cursor on here keeps idle time from being banked
+        queue = await session.execute(
+            update(AdmissionQueue)
+            .where(AdmissionQueue.session_id == session_id)
+            .values(
+                admitted_position=admitted_cursor(),
+                cursor_at=func.now(),
+                issued=AdmissionQueue.issued + 1,
+            )
+            .returning(
+                AdmissionQueue.rate_per_second,
+                AdmissionQueue.admitted_position,
+                AdmissionQueue.issued,
+            )
+        )
+        row = queue.first()
+        if not row:
+            await session.rollback()
+            self._queues.pop(session_id, None)
+            return None
+
+        rate, admitted, issued = row
+        position = issued
+        token = await session.scalar(
+            insert(AdmissionTicket)
+            .values(
+                id=str(uuid4()),
+                session_id=session_id,
+                user_id=user_id,
+                position=position,
+            )
+            .on_conflict_do_nothing(constraint='uq_admission_ticket_user')
+            .returning(AdmissionTicket.id)
+        )
+        if not token:
+            # The same user joined concurrently, hand out the ticket that won
+            token, position = (
+                await session.execute(
+                    select(AdmissionTicket.id, AdmissionTicket.position).where(
+                        *by_user
+                    )
+                )
+            ).one()
+        await session.commit()
+
+        # Only committed tickets are ever admitted
+        state.sync(rate, admitted, issued)
+        state.add(token, position, user_id)
+
+        return token, position
+
+    async def ticket(
+            self, session: AsyncSession, session_id: str, token: str
+    ) -> tuple[int, str] | None:
+        """Position and user of a ticket, read from the database on a miss."""
+        state = self._queues.get(session_id)
+        if state and token in state.tickets:
+            return state.tickets[token]
+
+        ticket = await session.execute(
+            select(
+                AdmissionTicket.position,
+                AdmissionTicket.user_id,
+                AdmissionQueue.rate_per_second,
+                MovieSession.tenant_id,
+                admitted_cursor(),
+                AdmissionQueue.issued,
+            )
+            .join(
+                AdmissionQueue,
+                AdmissionQueue.session_id == AdmissionTicket.session_id,
+            )
+            .join(MovieSession, MovieSession.id == AdmissionQueue.session_id)
+            .where(
+                AdmissionTicket.id == token, AdmissionTicket.session_id == session_id
+            )
+        )
+        row = ticket.first()
+        if not row:
+            return None
+
+        position, user_id, rate, tenant_id, admitted, issued = row
+        # The ticket may be newer than the snapshot, so refresh it as well
+        if state:
+            state.sync(rate, admitted, issued)
+        else:
+            state = QueueState(
+                rate, tenant_id, session.info.get('tenant_schema'), admitted, issued
+            )
+            self._queues[session_id] = state
+        state.add(token, position, user_id)
+
+        return position, user_id
+
+    async def waiting(
+            self, session: AsyncSession, session_id: str, token: str
+    ) -> int | None:
+        """Tickets ahead of `token`, 0 once admitted, None if unknown."""
+        ticket = await self.ticket(session, session_id, token)
+        if not ticket:
+            return None
+
+        position, _ = ticket
+        return max(0, position - self._queues[session_id].advance())
+
+    async def is_admitted(
+            self,
+            session: AsyncSession,
+            session_id: str,
+            token: str | None,
+            user_id: str,
+    ) -> bool:
+        # Gating follows the snapshots, a queue opened by another worker is
+        # enforced here from the next sync on
+        state = self._queues.get(session_id)
+        if not state:
+            return True
+
+        ticket = await self.ticket(session, session_id, token) if token else None
+        if not ticket or ticket[1] != user_id:
+            return False
+
+        return ticket[0] <= state.advance()
+
+    def retry_after(self, session_id: str, token: str | None) -> int:
+        state = self._queues[session_id]
+        ticket = state.tickets.get(token) if token else None
+        waiting = (ticket[0] if ticket else state.issued + 1) - state.advance()
+        return max(1, int(waiting / state.rate))
+
+    async def sync(self, session: AsyncSession, schema: str | None = None):
+        """Expire the tickets admitted over a TTL ago and refresh the snapshots."""
+        await session.execute(
+            update(AdmissionTicket)
+            .where(
+                AdmissionTicket.session_id == AdmissionQueue.session_id,
+                AdmissionTicket.admitted_at.is_(None),
+                AdmissionTicket.position <= admitted_cursor(),
+            )
+            .values(admitted_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(
+            delete(AdmissionTicket).where(
+                AdmissionTicket.admitted_at
+                <= func.now() - timedelta(seconds=self.ticket_ttl)
+            )
+        )
+        queues = await session.execute(
+            select(
+                AdmissionQueue.session_id,
+                AdmissionQueue.rate_per_second,
+                MovieSession.tenant_id,
+                admitted_cursor(),
+                AdmissionQueue.issued,
+            ).join(MovieSession, MovieSession.id == AdmissionQueue.session_id)
+        )
+        synced = {
+            session_id: QueueState(rate, tenant_id, schema, admitted, issued)
+            for session_id, rate, tenant_id, admitted, issued in queues.all()
+        }
+        await session.commit()
+
+        # Any worker may have expired a cached ticket, so the caches start over
+        self._queues = {
+            session_id: state
+            for session_id, state in self._queues.items()
+            if state.schema != schema
+        } | synced
+
+
+admission_queues = AdmissionQueues(Settings().ADMISSION_TICKET_TTL_SECONDS)
+
+
+async def sync_admission_queues() -> set[str | None]:
+    """Sync the queues of every schema, returning the ones that failed to."""
+    failed = set()
+    for schema, engine in tenant_engines.all():
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                await admission_queues.sync(session, schema)
+
+        except Exception:
+            logger.exception('Could not sync admission queues (schema %s)', schema)
+            failed.add(schema)
+
+    return failed
+
+
+async def run_admission_queues(sync_interval: float):
+    # Until synced, a schema's queues are only gated on the worker that
+    # opened them, so start right away
+    while True:
+        await sync_admission_queues()
+        await asyncio.sleep(sync_interval)
@@ -0,0 +1,232 @@
+import heapq
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Seat, SeatReservation, SeatStatus
+from app.models import Session as MovieSession
+from app.seat_events import seat_event_broker
+from app.settings import Settings
+
+# Moving one row away from the centre costs as much as this many columns
+ROW_WEIGHT = 1.5
+
+
+@dataclass(frozen=True, slots=True)
+class SeatCell:
+    id: str
+    row: str
+    column: int
+    is_aisle: bool
+    is_accessible: bool
+
+
+class RoomLayout:
+    """Static seat grid of a CinemaRoom, rows ordered front to back."""
+
+    def __init__(self, seats: list[SeatCell]):
+        self.rows: dict[str, list[SeatCell]] = {}
+        for seat in sorted(seats, key=lambda seat: (seat.row, seat.column)):
+            self.rows.setdefault(seat.row, []).append(seat)
+
+        self.row_index = {row: index for index, row in enumerate(self.rows)}
+        self.seat_row = {seat.id: seat.row for seat in seats}
+
+        columns = [seat.column for seat in seats] or [0]
+        self.centre_row = (len(self.rows) - 1) / 2
+        self.centre_column = (min(columns) + max(columns)) / 2
+
+
+class SessionSeatMap:
+    """Free-run index of a Session, rebuilt per row only when the row changes.
+
+    Runs are broken by taken seats and gaps in the columns, and split at aisle
+    seats (kept on both sides) so a block never has an aisle in its middle.
+    """
+
+    def __init__(
+            self,
+            layout: RoomLayout,
+            taken: dict[str, float | None],
+            tenant_id: str | None = None,
+    ):
+        self.layout = layout
+        self.tenant_id = tenant_id
+        self.loaded_at = time.monotonic()
+        self._taken: dict[str, float | None] = {}
+        self._expiries: list[tuple[float, str]] = []
+        self._runs: dict[tuple[str, bool], list[list[SeatCell]]] = {}
+        self._dirty: set[str] = set(layout.rows)
+
+        for seat_id, expires_at in taken.items():
+            self.take(seat_id, expires_at)
+
+    def take(self, seat_id: str, expires_at: float | None = None):
+        if seat_id not in self.layout.seat_row:
+            return
+
+        self._taken[seat_id] = expires_at
+        if expires_at is not None:
+            heapq.heappush(self._expiries, (expires_at, seat_id))
+        self._dirty.add(self.layout.seat_row[seat_id])
+
+    def release(self, seat_id: str):
+        if self._taken.pop(seat_id, False) is not False:
+            self._dirty.add(self.layout.seat_row[seat_id])
+
+    def _release_lapsed_holds(self):
+        now = time.time()
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, seat_id = heapq.heappop(self._expiries)
+            # A newer hold or a confirmation replaced this expiry
+            if self._taken.get(seat_id, False) == expires_at:
+                self.release(seat_id)
+
+    def _index_row(self, row: str):
+        for accessible in (False, True):
+            runs = []
+            run: list[SeatCell] = []
+            for seat in self.layout.rows[row]:
+                usable = seat.id not in self._taken and (
+                    not accessible or seat.is_accessible
+                )
+                if not usable or (run and seat.column != run[-1].column + 1):
+                    if run:
+                        runs.append(run)
+                    run = []
+                    if not usable:
+                        continue
+
+                run.append(seat)
+                if seat.is_aisle and len(run) > 1:
+                    runs.append(run)
+                    run = [seat]
+
+            if run:
+                runs.append(run)
+            self._runs[row, accessible] = runs
+
+    def best_block(
+            self, party_size: int, accessible: bool = False
+    ) -> list[SeatCell] | None:
+        self._release_lapsed_holds()
+        for row in self._dirty:
+            self._index_row(row)
+        self._dirty.clear()
+
+        layout = self.layout
+        best, best_score = None, None
+        for row in layout.rows:
+            row_distance = abs(layout.row_index[row] - layout.centre_row) * ROW_WEIGHT
+            if best_score is not None and row_distance >= best_score:
+                continue
+
+            for run in self._runs[row, accessible]:
+                if len(run) < party_size:
+                    continue
+
+                # Start that puts the block centre closest to the room centre
+                ideal = layout.centre_column - (party_size - 1) / 2 - run[0].column
+                start = min(max(round(ideal), 0), len(run) - party_size)
+                block_centre = run[start].column + (party_size - 1) / 2
+
+                score = row_distance + abs(block_centre - layout.centre_column)
+                if best_score is None or score < best_score:
+                    best, best_score = run[start : start + party_size], score
+
+        return best
+
+
+class SeatMaps:
+    """Per-process cache of room layouts and session seat maps.
+
+    Maps are kept current through the seat event broker and reloaded after
+    `ttl` seconds, the hold statement stays the source of truth.
+    """
+
+    def __init__(self, ttl: float, hold_seconds: float):
+        self.ttl = ttl
+        self.hold_seconds = hold_seconds
+        self._layouts: dict[str, RoomLayout] = {}
+        self._maps: dict[str, SessionSeatMap] = {}
+
+    async def get(
+            self, session: AsyncSession, session_id: str
+    ) -> SessionSeatMap | None:
+        tenant_id = session.info['tenant_id']
+        seat_map = self._maps.get(session_id)
+        if (
+            seat_map
+            and seat_map.tenant_id == tenant_id
+            and time.monotonic() - seat_map.loaded_at < self.ttl
+        ):
+            return seat_map
+
+        cinema_room_id = await session.scalar(
+            select(MovieSession.cinema_room_id).where(
+                MovieSession.id == session_id, MovieSession.tenant_id == tenant_id
+            )
+        )
+        if not cinema_room_id:
+            return None
+
+        layout = self._layouts.get(cinema_room_id)
+        if not layout:
+            seats = await session.execute(
+                select(
+                    Seat.id, Seat.row, Seat.column, Seat.is_aisle, Seat.is_accessible
+                ).where(Seat.cinema_room_id == cinema_room_id)
+            )
+            layout = RoomLayout([SeatCell(*seat) for seat in seats])
+            self._layouts[cinema_room_id] = layout
+
+        taken = await session.execute(
+            select(
+                SeatReservation.seat_id,
+                func.extract('epoch', SeatReservation.expires_at - func.now()),
+                SeatReservation.status,
+            ).where(
+                SeatReservation.session_id == session_id,
+                or_(
+                    SeatReservation.status == SeatStatus.confirmed,
+                    (SeatReservation.status == SeatStatus.on_hold)
+                    & (SeatReservation.expires_at > func.now()),
+                ),
+            )
+        )
+        now = time.time()
+        seat_map = SessionSeatMap(
+            layout,
+            {
+                seat_id: None if status == SeatStatus.confirmed else now + float(left)
+                for seat_id, left, status in taken
+            },
+            tenant_id,
+        )
+        self._maps[session_id] = seat_map
+
+        return seat_map
+
+    def apply(self, events: list[dict]):
+        for seat_event in events:
+            seat_map = self._maps.get(seat_event['session_id'])
+            if not seat_map:
+                continue
+
+            match seat_event['status']:
+                case SeatStatus.on_hold.value:
+                    until = time.time() + self.hold_seconds
+                    seat_map.take(seat_event['seat_id'], until)
+                case SeatStatus.confirmed.value:
+                    seat_map.take(seat_event['seat_id'])
+                case _:
+                    seat_map.release(seat_event['seat_id'])
+
+
+seat_maps = SeatMaps(
+    ttl=Settings().ALLOCATION_MAP_TTL_SECONDS,
+    hold_seconds=Settings().SEAT_HOLD_MINUTES * 60,
+)
+seat_event_broker.add_listener(seat_maps.apply)
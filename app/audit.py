@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from contextlib import suppress
+from datetime import datetime
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine
+from app.models import AuditEvent
+from app.settings import Settings
+
+logger = logging.getLogger('uvicorn.error')
+
+
+class AuditLog:
+    """Domain events buffered in memory and written in batches.
+
+    `record` only enqueues; a background task writes a batch once it has
+    `batch_size` events or `flush_interval` seconds went by. When the queue is
+    full, `record` waits at most `enqueue_timeout` seconds and then drops the
+    event, so a slow database never stalls a booking.
+    """
+
+    def __init__(
+            self,
+            max_size: int,
+            batch_size: int,
+            flush_interval: float,
+            enqueue_timeout: float,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.dropped = 0
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_size)
+        self._pending: list[dict] = []
+        self._task: asyncio.Task | None = None
+
+    async def record(
+            self,
+            kind: str,
+            entity_type: str,
+            entity_id: str,
+            user_id: str | None = None,
+            **payload,
+    ):
+        audit_event = {
+            'id': str(uuid4()),
+            'kind': kind,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'user_id': user_id,
+            'payload': payload,
+            'occurred_at': datetime.now(tz=ZoneInfo('UTC')).replace(tzinfo=None),
+        }
+
+        try:
+            self._queue.put_nowait(audit_event)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(
+                    self._queue.put(audit_event), timeout=self.enqueue_timeout
+                )
+            except TimeoutError:
+                self.dropped += 1
+                logger.warning('Audit queue full, dropped %s event', kind)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+        while not self._queue.empty():
+            self._pending.append(self._queue.get_nowait())
+
+        for start in range(0, len(self._pending), self.batch_size):
+            await self._write(self._pending[start : start + self.batch_size])
+        self._pending = []
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+
+            while len(self._pending) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(
+                        await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                    )
+                except TimeoutError:
+                    break
+
+            try:
+                await self._write(self._pending)
+            except Exception:
+                logger.exception('Could not write %s audit events', len(self._pending))
+            self._pending = []
+
+    @staticmethod
+    async def _write(batch: list[dict]):
+        if not batch:
+            return
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            # Ids are generated up front, a batch retried on shutdown is a no-op
+            await session.execute(
+                insert(AuditEvent).on_conflict_do_nothing(index_elements=['id']),
+                batch,
+            )
+            await session.commit()
+
+
+audit_log = AuditLog(
+    max_size=Settings().AUDIT_QUEUE_SIZE,
+    batch_size=Settings().AUDIT_BATCH_SIZE,
+    flush_interval=Settings().AUDIT_FLUSH_MS / 1000,
+    enqueue_timeout=Settings().AUDIT_ENQUEUE_TIMEOUT_MS / 1000,
+)
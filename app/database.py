@@ -1,10 +1,162 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import re
+import time
+from http import HTTPStatus
+from typing import Annotated
 
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.load_shedding import load_shedder
+from app.models import Tenant, table_registry
+from app.query_log import QueryLog
 from app.settings import Settings
 
-engine = create_async_engine(url=Settings().DATABASE_URL)
+# Chain-wide tables, kept in public for every tenant
+SHARED_TABLES = {
+    'tenants', 'users', 'poster_blobs', 'audit_events', 'refresh_tokens'
+}
+SCHEMA_NAME = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+class TenantEngines:
+    """Connection routing for tenants isolated in a schema of their own.
+
+    Tenants listed in TENANT_SCHEMAS get an engine with its own pool and their
+    schema first on the search_path, so a busy site cannot starve the others
+    of connections and its tables and indexes stay small. Shared tables still
+    resolve to public. Every other tenant goes through the shared engine and
+    is told apart by tenant_id.
+    """
+
+    def __init__(
+            self, shared: AsyncEngine, url: str, schemas: dict[str, str], pool_size: int
+    ):
+        for schema in schemas.values():
+            if not SCHEMA_NAME.match(schema):
+                raise ValueError(f'Invalid tenant schema name: {schema!r}')
+
+        self.shared = shared
+        self.schemas = schemas
+        self._engines = {
+            schema: create_async_engine(
+                url,
+                pool_size=pool_size,
+                pool_timeout=Settings().DATABASE_POOL_TIMEOUT_SECONDS,
+                connect_args={'options': f'-c search_path={schema},public'},
+            )
+            for schema in set(schemas.values())
+        }
+
+    def schema_for(self, tenant_id: str) -> str | None:
+        return self.schemas.get(tenant_id)
+
+    def get(self, tenant_id: str) -> AsyncEngine:
+        schema = self.schemas.get(tenant_id)
+        return self._engines[schema] if schema else self.shared
+
+    def all(self) -> list[tuple[str | None, AsyncEngine]]:
+        """Every engine with its schema, None standing for the shared one."""
+        return [(None, self.shared), *self._engines.items()]
+
+    async def create_schema(self, tenant_id: str):
+        """Create an isolated tenant's schema with its own per-tenant tables."""
+        schema = self.schemas[tenant_id]
+        tables = [
+            table for table in table_registry.metadata.sorted_tables
+            if table.name not in SHARED_TABLES
+        ]
+
+        async with self.shared.begin() as conn:
+            await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+
+        # checkfirst would find the public tables through the search_path
+        async with self._engines[schema].begin() as conn:
+            await conn.run_sync(
+                table_registry.metadata.create_all, tables=tables, checkfirst=False
+            )
+
+    async def dispose(self):
+        for engine in self._engines.values():
+            await engine.dispose()
+
+
+class TenantDirectory:
+    """Ids of the tenants table, so a request names a tenant that exists.
+
+    Tenants are never deleted, a known id stays known. An unknown one reloads
+    the ids, at most every `reload_interval` seconds, so tenants created on
+    other workers show up and bogus headers cannot flood the database.
+    """
+
+    def __init__(self, engine: AsyncEngine, reload_interval: float):
+        self.engine = engine
+        self.reload_interval = reload_interval
+        self._ids: set[str] = set()
+        self._loaded_at = float('-inf')
+
+    def add(self, tenant_id: str):
+        self._ids.add(tenant_id)
+
+    async def exists(self, tenant_id: str) -> bool:
+        if tenant_id in self._ids:
+            return True
+
+        if time.monotonic() - self._loaded_at >= self.reload_interval:
+            self._loaded_at = time.monotonic()
+            async with AsyncSession(self.engine) as session:
+                self._ids = set(await session.scalars(select(Tenant.id)))
+
+        return tenant_id in self._ids
+
+
+# An exhausted pool fails fast instead of queueing requests until they time out
+engine = create_async_engine(
+    url=Settings().DATABASE_URL,
+    pool_timeout=Settings().DATABASE_POOL_TIMEOUT_SECONDS,
+)
+
+tenant_engines = TenantEngines(
+    engine,
+    Settings().DATABASE_URL,
+    Settings().TENANT_SCHEMAS,
+    Settings().TENANT_POOL_SIZE,
+)
+
+tenant_directory = TenantDirectory(engine, Settings().TENANT_RELOAD_SECONDS)
+
+query_log = None
+if Settings().QUERY_LOG_ENABLED:
+    query_log = QueryLog(
+        slow_ms=Settings().QUERY_LOG_SLOW_MS,
+        buffer_size=Settings().QUERY_LOG_BUFFER_SIZE,
+        max_fingerprints=Settings().QUERY_LOG_MAX_FINGERPRINTS,
+        explain=Settings().QUERY_LOG_EXPLAIN,
+    )
+    for _, tenant_engine in tenant_engines.all():
+        query_log.install(tenant_engine.sync_engine)
+
+
+async def get_tenant_id(x_tenant_id: Annotated[str | None, Header()] = None) -> str:
+    tenant_id = x_tenant_id or Settings().DEFAULT_TENANT
+
+    if not await tenant_directory.exists(tenant_id):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Unknown tenant.'
+        )
+
+    return tenant_id
+
+
+async def get_session(tenant_id: Annotated[str, Depends(get_tenant_id)]):
+    async with AsyncSession(
+        tenant_engines.get(tenant_id), expire_on_commit=False
+    ) as session:
+        session.info['tenant_id'] = tenant_id
+        session.info['tenant_schema'] = tenant_engines.schema_for(tenant_id)
 
+        started = time.perf_counter()
+        await session.connection()
+        load_shedder.observe_pool_wait(time.perf_counter() - started)
 
-async def get_session():
-    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
@@ -0,0 +1,151 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import String, cast, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    Movie,
+    Seat,
+    SeatReservation,
+    SeatStatus,
+)
+from app.models import Session as MovieSession
+from app.responses import RESERVATION_HISTORY
+from app.settings import Settings
+
+
+def encode_cursor(created_at: datetime, reservation_id: str) -> str:
+    return base64.urlsafe_b64encode(
+        json.dumps([created_at.isoformat(), reservation_id]).encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Raises ValueError on a cursor this module did not produce."""
+    try:
+        decoded = base64.urlsafe_b64decode(cursor.encode())
+        created_at, reservation_id = json.loads(decoded)
+        return datetime.fromisoformat(created_at), str(reservation_id)
+    except Exception as error:
+        raise ValueError('Invalid cursor') from error
+
+
+class ReservationHistoryCache:
+    """Rendered reservation history pages, revalidated on every read.
+
+    A page is served again only while the user's stamp, the count and a
+    checksum of the status and updated_at of their reservations, is
+    unchanged. Holds, confirmations, expiries and cascaded deletes all move
+    it, on whichever worker they ran, and it is read from
+    ix_seat_reservations_user_created alone, instead of joining sessions,
+    movies and seats again.
+
+    The latest updated_at alone is not enough: it is the transaction's start
+    time, so a change committed late can carry an older one.
+    """
+
+    def __init__(self, max_pages: int):
+        self.max_pages = max_pages
+        self._pages: OrderedDict[tuple, tuple[tuple, bytes]] = OrderedDict()
+
+    async def get_page(
+            self,
+            session: AsyncSession,
+            user_id: str,
+            tenant_id: str,
+            limit: int,
+            after: tuple[datetime, str] | None = None,
+    ) -> bytes:
+        checksum = func.sum(
+            func.hashtext(
+                func.concat_ws(
+                    ',',
+                    SeatReservation.id,
+                    SeatReservation.status,
+                    SeatReservation.updated_at,
+                )
+            )
+        )
+        stamp = tuple(
+            (
+                await session.execute(
+                    select(func.count(), checksum).where(
+                        SeatReservation.user_id == user_id
+                    )
+                )
+            ).one()
+        )
+
+        key = (user_id, tenant_id, limit, after)
+        cached = self._pages.get(key)
+        if cached and cached[0] == stamp:
+            self._pages.move_to_end(key)
+            return cached[1]
+
+        page = await reservation_history(session, user_id, tenant_id, limit, after)
+        self._pages[key] = (stamp, page)
+        self._pages.move_to_end(key)
+        if len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+        return page
+
+
+async def reservation_history(
+        session: AsyncSession,
+        user_id: str,
+        tenant_id: str,
+        limit: int,
+        after: tuple[datetime, str] | None = None,
+) -> bytes:
+    filters = [
+        SeatReservation.user_id == user_id,
+        or_(
+            SeatReservation.status == SeatStatus.confirmed,
+            (SeatReservation.status == SeatStatus.on_hold)
+            & (SeatReservation.expires_at > func.now()),
+        ),
+        MovieSession.tenant_id == tenant_id,
+    ]
+    if after is not None:
+        filters.append(tuple_(SeatReservation.created_at, SeatReservation.id) < after)
+
+    rows = (
+        await session.execute(
+            select(
+                SeatReservation.id,
+                SeatReservation.session_id,
+                MovieSession.session_time,
+                MovieSession.movie_id,
+                Movie.title.label('movie_title'),
+                SeatReservation.seat_id,
+                (Seat.row + cast(Seat.column, String)).label('seat_label'),
+                SeatReservation.status,
+                SeatReservation.expires_at,
+                SeatReservation.created_at,
+            )
+            .join(MovieSession, MovieSession.id == SeatReservation.session_id)
+            .join(Movie, Movie.id == MovieSession.movie_id)
+            .join(Seat, Seat.id == SeatReservation.seat_id)
+            .where(*filters)
+            .order_by(SeatReservation.created_at.desc(), SeatReservation.id.desc())
+            .limit(limit + 1)
+        )
+    ).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+    return RESERVATION_HISTORY.dump_json(
+        RESERVATION_HISTORY.validate_python({'items': rows, 'next_cursor': next_cursor})
+    )
+
+
+reservation_histories = ReservationHistoryCache(
+    max_pages=Settings().RESERVATION_HISTORY_CACHE_SIZE
+)
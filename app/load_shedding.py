@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from enum import Enum
+from http import HTTPStatus
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+from app.settings import Settings
+
+logger = logging.getLogger('uvicorn.error')
+
+
+class Priority(str, Enum):
+    critical = 'critical'
+    booking = 'booking'
+    catalog = 'catalog'
+    write = 'write'
+    bulk = 'bulk'
+
+
+CRITICAL_PREFIXES = ('/auth',)
+BULK_PREFIXES = ('/admin', '/reports')
+BOOKING_PATHS = ('/seats/', '/queue')
+
+
+def route_priority(method: str, path: str) -> Priority:
+    if path == '/' or path.startswith(CRITICAL_PREFIXES):
+        return Priority.critical
+    if path.startswith(BULK_PREFIXES):
+        return Priority.bulk
+    if method in {'GET', 'HEAD'}:
+        return Priority.catalog
+    if any(part in path for part in BOOKING_PATHS):
+        return Priority.booking
+    return Priority.write
+
+
+class CatalogCache:
+    """Last good JSON body of public catalog reads, served when shedding."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[bytes, str]] = OrderedDict()
+
+    @staticmethod
+    def key(request: Request) -> tuple | None:
+        # Anything sent with credentials may be personal, never shared
+        if 'authorization' in request.headers:
+            return None
+        return (
+            request.url.path,
+            request.url.query,
+            request.headers.get('x-tenant-id'),
+        )
+
+    async def store(self, key: tuple, response: Response) -> Response:
+        content_type = response.headers.get('content-type', '')
+        if response.status_code != HTTPStatus.OK or not content_type.startswith(
+            'application/json'
+        ):
+            return response
+
+        body = b''.join([chunk async for chunk in response.body_iterator])
+        self._entries[key] = (body, content_type)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=dict(response.headers),
+        )
+
+    def stale(self, key: tuple) -> Response | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        body, content_type = entry
+        return Response(
+            content=body, media_type=content_type, headers={'X-Cache': 'STALE'}
+        )
+
+
+class BookingQueue:
+    """Bounded concurrency for booking writes while the database is saturated.
+
+    At most `concurrency` run at once, `max_waiting` more wait up to
+    `max_wait` seconds for a slot, anything beyond is turned away at once.
+    """
+
+    def __init__(self, concurrency: int, max_waiting: int, max_wait: float):
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def run(
+            self, handler: Callable[[], Awaitable[Response]]
+    ) -> Response | None:
+        if not self._slots.locked():
+            await self._slots.acquire()
+        elif self.waiting >= self.max_waiting:
+            return None
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.max_wait)
+            except TimeoutError:
+                return None
+            finally:
+                self.waiting -= 1
+
+        try:
+            return await handler()
+        finally:
+            self._slots.release()
+
+
+class LoadShedder:
+    """Trips into degraded mode when pool waits or event-loop lag run high.
+
+    Both signals are smoothed with an EWMA. Crossing a threshold sheds load
+    for `cooldown` seconds, after which requests flow again and the next
+    observations decide whether to trip once more.
+
+    Loop lag is sampled on a timer, pool waits only when a request reaches
+    the pool, which shed ones never do. So the pool wait average also fades
+    with time, down to a fiftieth over one cooldown, and waits from before
+    it cannot trip the shedder again on their own.
+    """
+
+    ALPHA = 0.2
+
+    def __init__(  # noqa: PLR0913
+            self,
+            *,
+            pool_wait_ms: float,
+            loop_lag_ms: float,
+            cooldown: float,
+            booking_concurrency: int,
+            booking_queue_size: int,
+            booking_wait: float,
+            catalog_cache_size: int,
+    ):
+        self.pool_wait_ms = pool_wait_ms
+        self.loop_lag_ms = loop_lag_ms
+        self.cooldown = cooldown
+        self.pool_wait = 0.0
+        self.pool_wait_at = time.monotonic()
+        self.loop_lag = 0.0
+        self.shed_until = 0.0
+        self.bookings = BookingQueue(
+            booking_concurrency, booking_queue_size, booking_wait
+        )
+        self.catalog = CatalogCache(catalog_cache_size)
+
+    def observe_pool_wait(self, seconds: float):
+        now = time.monotonic()
+        self.pool_wait *= math.exp(-4 * (now - self.pool_wait_at) / self.cooldown)
+        self.pool_wait_at = now
+
+        self.pool_wait += self.ALPHA * (seconds * 1000 - self.pool_wait)
+        if self.pool_wait > self.pool_wait_ms:
+            self._trip('pool wait', self.pool_wait)
+
+    def observe_loop_lag(self, seconds: float):
+        self.loop_lag += self.ALPHA * (max(0.0, seconds) * 1000 - self.loop_lag)
+        if self.loop_lag > self.loop_lag_ms:
+            self._trip('event loop lag', self.loop_lag)
+
+    def _trip(self, signal: str, value_ms: float):
+        if not self.overloaded():
+            logger.warning('Shedding load, %s at %.0fms', signal, value_ms)
+        self.shed_until = time.monotonic() + self.cooldown
+
+    def overloaded(self) -> bool:
+        return time.monotonic() < self.shed_until
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.shed_until - time.monotonic()))
+
+
+def service_unavailable(retry_after: int) -> JSONResponse:
+    return JSONResponse(
+        {'detail': 'Service is overloaded, try again later.'},
+        status_code=503,
+        headers={'Retry-After': str(retry_after)},
+    )
+
+
+load_shedder = LoadShedder(
+    pool_wait_ms=Settings().LOAD_SHED_POOL_WAIT_MS,
+    loop_lag_ms=Settings().LOAD_SHED_LOOP_LAG_MS,
+    cooldown=Settings().LOAD_SHED_COOLDOWN_SECONDS,
+    booking_concurrency=Settings().LOAD_SHED_BOOKING_CONCURRENCY,
+    booking_queue_size=Settings().LOAD_SHED_BOOKING_QUEUE_SIZE,
+    booking_wait=Settings().LOAD_SHED_BOOKING_WAIT_SECONDS,
+    catalog_cache_size=Settings().LOAD_SHED_CATALOG_CACHE_SIZE,
+)
+
+
+async def load_shedding_middleware(request: Request, call_next):
+    shedder = load_shedder
+    priority = route_priority(request.method, request.url.path)
+    cache_key = shedder.catalog.key(request) if priority is Priority.catalog else None
+
+    if priority is Priority.critical or not shedder.overloaded():
+        response = await call_next(request)
+        if cache_key is not None:
+            response = await shedder.catalog.store(cache_key, response)
+        return response
+
+    if priority is Priority.booking:
+        response = await shedder.bookings.run(lambda: call_next(request))
+        return response or service_unavailable(shedder.retry_after())
+
+    if cache_key is not None and (stale := shedder.catalog.stale(cache_key)):
+        return stale
+
+    return service_unavailable(shedder.retry_after())
+
+
+async def run_loop_lag_monitor(interval: float):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        load_shedder.observe_loop_lag(loop.time() - started - interval)
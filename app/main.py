@@ -1,10 +1,28 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from datetime import timedelta
 
 from fastapi import FastAPI, Request
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
-from app.routers import auth, movies, users, rooms
+from app.admission import run_admission_queues
+from app.audit import audit_log
+from app.database import query_log, tenant_engines
+from app.load_shedding import (
+    load_shedder,
+    load_shedding_middleware,
+    run_loop_lag_monitor,
+    service_unavailable,
+)
+from app.reports import run_sales_report_refresh
+from app.reservations import run_hold_expiry, run_seat_counter_reconcile
+from app.security import run_revocation_sync
+from app.routers import admin, auth, movies, reports, users, rooms
 from app.context import request_context, request_middleware
+from app.seat_events import listen_seat_events, seat_event_broker
+from app.settings import Settings
+from app.storage import run_poster_garbage_collection
 
 logger = logging.getLogger('uvicorn.error')
 logging.basicConfig(level=logging.INFO)
@@ -13,7 +31,51 @@ logging.basicConfig(level=logging.INFO)
 @asynccontextmanager
 async def lifespan(app):
     logger.info('Starting application...')
+
+    audit_log.start()
+
+    background_tasks = [
+        asyncio.create_task(
+            run_admission_queues(Settings().ADMISSION_SYNC_SECONDS)
+        ),
+        asyncio.create_task(
+            run_poster_garbage_collection(
+                Settings().POSTER_GC_INTERVAL_SECONDS,
+                timedelta(minutes=Settings().POSTER_GC_GRACE_MINUTES),
+            )
+        ),
+        asyncio.create_task(run_hold_expiry(Settings().HOLD_EXPIRY_SECONDS)),
+        asyncio.create_task(
+            run_seat_counter_reconcile(Settings().SEAT_COUNTER_RECONCILE_SECONDS)
+        ),
+        asyncio.create_task(run_revocation_sync(Settings().REVOCATION_SYNC_SECONDS)),
+        asyncio.create_task(
+            run_loop_lag_monitor(Settings().LOAD_SHED_LOOP_LAG_INTERVAL_SECONDS)
+        ),
+        asyncio.create_task(
+            run_sales_report_refresh(
+                Settings().SALES_REPORT_REFRESH_SECONDS,
+                timedelta(seconds=Settings().SALES_REPORT_OVERLAP_SECONDS),
+            )
+        ),
+    ]
+    if seat_event_broker.bridged:
+        background_tasks.append(asyncio.create_task(listen_seat_events()))
+
     yield
+
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    await audit_log.close()
+    await tenant_engines.dispose()
+
+    if query_log:
+        query_log.dump(Settings().QUERY_LOG_DUMP_PATH)
+        logger.info('Query log written to %s', Settings().QUERY_LOG_DUMP_PATH)
+
     logger.info('Ending application...')
 
 
@@ -24,7 +86,17 @@ app.include_router(auth.router)
 app.include_router(movies.router)
 app.include_router(users.router)
 app.include_router(rooms.router)
+app.include_router(admin.router)
+app.include_router(reports.router)
 app.middleware("http")(request_middleware)
+app.middleware("http")(load_shedding_middleware)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # A request that still reached an exhausted pool trips the shedder
+    load_shedder.observe_pool_wait(Settings().DATABASE_POOL_TIMEOUT_SECONDS)
+    return service_unavailable(load_shedder.retry_after())
 
 
 @app.get('/', response_model=dict)
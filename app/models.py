@@ -1,7 +1,18 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 from enum import Enum
 
-from sqlalchemy import func, ForeignKey, String, UniqueConstraint
+from sqlalchemy import (
+    func,
+    ForeignKey,
+    Index,
+    literal_column,
+    Numeric,
+    String,
+    text,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, ExcludeConstraint, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 table_registry = registry()
@@ -14,6 +25,23 @@ class SeatStatus(str, Enum):
     expired = 'expired'
 
 
+class SeatCategory(str, Enum):
+    standard = 'standard'
+    accessible = 'accessible'
+    premium = 'premium'
+
+
+@table_registry.mapped_as_dataclass()
+class Tenant:
+    __tablename__ = 'tenants'
+
+    id: Mapped[str] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), nullable=False, init=False
+    )
+
 
 @table_registry.mapped_as_dataclass()
 class User:
@@ -43,10 +71,12 @@ class User:
         init=False,
     )
 
+    # Read through app.history, never loaded along with the user
     seat_reservations: Mapped[list[SeatReservation]] = relationship(
         back_populates='user',
         cascade='all, delete-orphan',
-        lazy='selectin',
+        passive_deletes=True,
+        lazy='raise',
         init=False,
     )
 
@@ -54,14 +84,31 @@ class User:
 @table_registry.mapped_as_dataclass()
 class Movie:
     __tablename__ = 'movies'
+    __table_args__ = (
+        Index(
+            'ix_movies_search_document',
+            text("to_tsvector('simple', title || ' ' || genre)"),
+            postgresql_using='gin',
+        ),
+        Index(
+            'ix_movies_title_trgm',
+            'title',
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+        ),
+        Index('ix_movies_tenant_year', 'tenant_id', 'year'),
+        UniqueConstraint('tenant_id', 'title', name='uq_movies_tenant_title'),
+    )
 
     id: Mapped[str] = mapped_column(primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(ForeignKey('tenants.id'))
     user_id: Mapped[str] = mapped_column(ForeignKey('users.id'))
 
-    title: Mapped[str] = mapped_column(unique=True, nullable=False)
+    title: Mapped[str] = mapped_column(nullable=False)
     year: Mapped[int] = mapped_column(nullable=False)
     genre: Mapped[str] = mapped_column(nullable=False)
-    poster_path: Mapped[str] = mapped_column(unique=True, nullable=False)
+    runtime_minutes: Mapped[int] = mapped_column(nullable=False)
+    poster_path: Mapped[str] = mapped_column(nullable=False)
     poster_url: Mapped[str] = mapped_column(unique=True, nullable=False)
 
     created_at: Mapped[datetime] = mapped_column(
@@ -77,6 +124,7 @@ class Movie:
     sessions: Mapped[list[Session]] = relationship(
         back_populates='movie',
         cascade='all, delete-orphan',
+        passive_deletes=True,
         lazy='selectin',
         init=False,
     )
@@ -86,13 +134,44 @@ class Movie:
 @table_registry.mapped_as_dataclass()
 class Session:
     __tablename__ = 'sessions'
+    __table_args__ = (
+        ExcludeConstraint(
+            ('cinema_room_id', '='),
+            (
+                func.tsrange(
+                    literal_column('session_time'), literal_column('ends_at')
+                ),
+                '&&',
+            ),
+            name='ex_session_room_overlap',
+            using='gist',
+        ),
+        Index('ix_sessions_tenant_time', 'tenant_id', 'session_time'),
+    )
 
     id: Mapped[str] = mapped_column(primary_key=True)
-    movie_id: Mapped[str] = mapped_column(ForeignKey('movies.id'))
+    tenant_id: Mapped[str] = mapped_column(ForeignKey('tenants.id'))
+    movie_id: Mapped[str] = mapped_column(
+        ForeignKey('movies.id', ondelete='CASCADE'), index=True
+    )
     user_id: Mapped[str] = mapped_column(ForeignKey('users.id'))
-    cinema_room_id: Mapped[str] = mapped_column(ForeignKey('cinema_rooms.id'))
+    cinema_room_id: Mapped[str] = mapped_column(
+        ForeignKey('cinema_rooms.id', ondelete='CASCADE'), index=True
+    )
 
     session_time: Mapped[datetime] = mapped_column(nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(nullable=False)
+
+    # Maintained by app.reservations in the same transaction as the seats
+    held_seats: Mapped[int] = mapped_column(
+        default=0, server_default='0', nullable=False, init=False
+    )
+    confirmed_seats: Mapped[int] = mapped_column(
+        default=0, server_default='0', nullable=False, init=False
+    )
+    free_seats: Mapped[int] = mapped_column(
+        default=0, server_default='0', nullable=False, init=False
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         server_default=func.now(), nullable=False, init=False
@@ -114,6 +193,7 @@ class Session:
     seat_reservations: Mapped[list[SeatReservation]] = relationship(
         back_populates='session',
         cascade='all, delete-orphan',
+        passive_deletes=True,
         init=False
     )
 
@@ -121,27 +201,41 @@ class Session:
 @table_registry.mapped_as_dataclass()
 class CinemaRoom:
     __tablename__ = 'cinema_rooms'
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'name', name='uq_cinema_rooms_tenant_name'),
+    )
 
     id: Mapped[str] = mapped_column(primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(ForeignKey('tenants.id'))
     user_id: Mapped[str] = mapped_column(ForeignKey('users.id'))
 
-    name: Mapped[str] = mapped_column(unique=True, nullable=False)
+    name: Mapped[str] = mapped_column(nullable=False)
     total_seats: Mapped[int] = mapped_column(nullable=False)
+    premium_rows: Mapped[list[str]] = mapped_column(
+        ARRAY(String), default_factory=list, server_default='{}', nullable=False
+    )
 
     seats: Mapped[list[Seat]] = relationship(
         back_populates='cinema_room',
         cascade='all, delete-orphan',
+        passive_deletes=True,
         lazy='selectin',
         init=False,
     )
 
     sessions: Mapped[list[Session]] = relationship(
         back_populates='cinema_room',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
         init=False,
     )
 
+    # Reservations live on sessions, a room reaches them through its sessions
     seat_reservations: Mapped[list[SeatReservation]] = relationship(
-        back_populates='seats',
+        secondary='sessions',
+        primaryjoin='CinemaRoom.id == Session.cinema_room_id',
+        secondaryjoin='Session.id == SeatReservation.session_id',
+        viewonly=True,
         init=False,
     )
 
@@ -154,7 +248,9 @@ class Seat:
     )
 
     id: Mapped[str] = mapped_column(primary_key=True)
-    cinema_room_id: Mapped[str] = mapped_column(ForeignKey('cinema_rooms.id'))
+    cinema_room_id: Mapped[str] = mapped_column(
+        ForeignKey('cinema_rooms.id', ondelete='CASCADE')
+    )
 
     row: Mapped[str] = mapped_column(String(1), nullable=False)
     column: Mapped[int] = mapped_column(nullable=False)
@@ -167,7 +263,7 @@ class Seat:
         back_populates='seats',
         init=False,
     )
-    seat_reservation: Mapped[SeatReservation] = relationship(
+    seat_reservations: Mapped[list[SeatReservation]] = relationship(
         back_populates='seat',
         init=False,
     )
@@ -182,15 +278,33 @@ class SeatReservation:
     __tablename__ = 'seat_reservations'
     __table_args__ = (
         UniqueConstraint('session_id', 'seat_id', name='uq_session_seat_reservation'),
+        # Covers the reservation history, an index-only scan per page
+        Index(
+            'ix_seat_reservations_user_created',
+            'user_id',
+            'created_at',
+            'id',
+            postgresql_include=['session_id', 'seat_id', 'status', 'updated_at'],
+        ),
     )
 
     id: Mapped[str] = mapped_column(primary_key=True)
-    user_id: Mapped[str] = mapped_column(ForeignKey('users.id'))
-    session_id: Mapped[str] = mapped_column(ForeignKey('sessions.id'))
-    seat_id: Mapped[str] = mapped_column(ForeignKey('seats.id'))
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
+    session_id: Mapped[str] = mapped_column(
+        ForeignKey('sessions.id', ondelete='CASCADE')
+    )
+    seat_id: Mapped[str] = mapped_column(
+        ForeignKey('seats.id', ondelete='CASCADE'), index=True
+    )
 
     status: Mapped[SeatStatus]
     expires_at: Mapped[datetime | None] = mapped_column(nullable=False)
+    # Price paid, set when confirmed so later price changes leave it alone
+    price: Mapped[Decimal | None] = mapped_column(
+        Numeric(10, 2), default=None, init=False
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         server_default=func.now(), nullable=False, init=False
@@ -208,5 +322,159 @@ class SeatReservation:
     )
 
     seat: Mapped[Seat] = relationship(
-        back_populates='seat_reservation'
+        back_populates='seat_reservations'
+    )
+
+
+@table_registry.mapped_as_dataclass()
+class AdmissionQueue:
+    __tablename__ = 'admission_queues'
+
+    session_id: Mapped[str] = mapped_column(
+        ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True
+    )
+    rate_per_second: Mapped[float] = mapped_column(nullable=False)
+    admitted_position: Mapped[float] = mapped_column(default=0, nullable=False)
+    issued: Mapped[int] = mapped_column(
+        default=0, server_default='0', nullable=False, init=False
+    )
+    cursor_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), nullable=False, init=False
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), nullable=False, init=False
+    )
+
+
+@table_registry.mapped_as_dataclass()
+class AdmissionTicket:
+    __tablename__ = 'admission_tickets'
+    __table_args__ = (
+        UniqueConstraint('session_id', 'position', name='uq_admission_ticket_position'),
+        UniqueConstraint('session_id', 'user_id', name='uq_admission_ticket_user'),
+    )
+
+    id: Mapped[str] = mapped_column(primary_key=True)
+    session_id: Mapped[str] = mapped_column(
+        ForeignKey('admission_queues.session_id', ondelete='CASCADE')
+    )
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
+    position: Mapped[int] = mapped_column(nullable=False)
+    admitted_at: Mapped[datetime | None] = mapped_column(default=None, init=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), nullable=False, init=False
+    )
+
+
+@table_registry.mapped_as_dataclass()
+class SessionPrice:
+    __tablename__ = 'session_prices'
+
+    session_id: Mapped[str] = mapped_column(
+        ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True
+    )
+    category: Mapped[SeatCategory] = mapped_column(primary_key=True)
+    price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), onupdate=func.now(), nullable=False, init=False
+    )
+
+
+@table_registry.mapped_as_dataclass()
+class PosterBlob:
+    __tablename__ = 'poster_blobs'
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    size: Mapped[int] = mapped_column(nullable=False)
+    ref_count: Mapped[int] = mapped_column(default=0, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), nullable=False, init=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), onupdate=func.now(), nullable=False, init=False
+    )
+
+
+@table_registry.mapped_as_dataclass()
+class AuditEvent:
+    __tablename__ = 'audit_events'
+    __table_args__ = (
+        Index('ix_audit_events_entity', 'entity_type', 'entity_id', 'occurred_at'),
+        Index('ix_audit_events_user', 'user_id', 'occurred_at'),
+    )
+
+    id: Mapped[str] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(nullable=False)
+    entity_type: Mapped[str] = mapped_column(nullable=False)
+    entity_id: Mapped[str] = mapped_column(nullable=False)
+    user_id: Mapped[str | None] = mapped_column(nullable=True)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(nullable=False)
+
+
+@table_registry.mapped_as_dataclass()
+class SessionSales:
+    """Per session sales, rebuilt from seat_reservations by app.reports."""
+
+    __tablename__ = 'session_sales'
+    __table_args__ = (
+        Index('ix_session_sales_tenant_day', 'tenant_id', 'day'),
+        Index('ix_session_sales_tenant_movie', 'tenant_id', 'movie_id', 'day'),
+    )
+
+    session_id: Mapped[str] = mapped_column(
+        ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True
+    )
+    tenant_id: Mapped[str] = mapped_column(nullable=False)
+    movie_id: Mapped[str] = mapped_column(nullable=False)
+    day: Mapped[date] = mapped_column(nullable=False)
+    capacity: Mapped[int] = mapped_column(nullable=False)
+    seats_sold: Mapped[int] = mapped_column(nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(nullable=False)
+
+
+@table_registry.mapped_as_dataclass()
+class RefreshToken:
+    """One issued refresh token, `family_id` is shared by all its rotations.
+
+    Rotating stamps rotated_at on the old token, logging out, changing the
+    password or presenting an already rotated token stamps revoked_at on the
+    whole family. Rows outlive a deleted user, so the revocation still
+    reaches every worker, and go once expired.
+    """
+
+    __tablename__ = 'refresh_tokens'
+    __table_args__ = (
+        Index('ix_refresh_tokens_expires', 'expires_at'),
+        Index('ix_refresh_tokens_family', 'family_id'),
+        Index(
+            'ix_refresh_tokens_revoked',
+            'expires_at',
+            postgresql_where=text('revoked_at IS NOT NULL'),
+            postgresql_include=['family_id'],
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(primary_key=True)
+    user_id: Mapped[str | None] = mapped_column(
+        ForeignKey('users.id', ondelete='SET NULL'), index=True
+    )
+    family_id: Mapped[str] = mapped_column(nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), nullable=False, init=False
+    )
+    rotated_at: Mapped[datetime | None] = mapped_column(
+        nullable=True, default=None, init=False
+    )
+    revoked_at: Mapped[datetime | None] = mapped_column(
+        nullable=True, default=None, init=False
     )
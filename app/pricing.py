@@ -0,0 +1,129 @@
+import time
+from collections.abc import Collection
+from decimal import Decimal
+
+from sqlalchemy import any_, case, cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    CinemaRoom,
+    Seat,
+    SeatCategory,
+    SessionPrice,
+)
+from app.models import Session as MovieSession
+from app.settings import Settings
+
+
+def seat_category(
+        row: str, is_accessible: bool, premium_rows: Collection[str]
+) -> SeatCategory:
+    if is_accessible:
+        return SeatCategory.accessible
+    if row in premium_rows:
+        return SeatCategory.premium
+    return SeatCategory.standard
+
+
+def seat_category_clause(category_type):
+    """SQL twin of seat_category, over Seat and CinemaRoom."""
+    # Cast as a whole, the branches alone would compare as text
+    return cast(
+        case(
+            (Seat.is_accessible, SeatCategory.accessible.value),
+            (Seat.row == any_(CinemaRoom.premium_rows), SeatCategory.premium.value),
+            else_=SeatCategory.standard.value,
+        ),
+        category_type,
+    )
+
+
+class PriceTable:
+    """Prices of a Session compiled down to two dict lookups per seat."""
+
+    __slots__ = ('prices', 'categories', 'tenant_id', 'loaded_at')
+
+    def __init__(
+            self,
+            prices: dict[SeatCategory, Decimal],
+            categories: dict[str, SeatCategory],
+            tenant_id: str | None = None,
+    ):
+        self.prices = prices
+        self.categories = categories
+        self.tenant_id = tenant_id
+        self.loaded_at = time.monotonic()
+
+    def quote(self, seat_ids: list[str]) -> list[tuple[str, SeatCategory, Decimal]]:
+        """Raises KeyError for a seat outside the room or an unpriced category."""
+        return [
+            (seat_id, category, self.prices[category])
+            for seat_id in seat_ids
+            for category in (self.categories[seat_id],)
+        ]
+
+
+class PriceTables:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        # Seat categories per room, shared by the price tables of its sessions
+        self._rooms: dict[str, tuple[float, dict[str, SeatCategory]]] = {}
+        self._tables: dict[str, PriceTable] = {}
+
+    async def get(self, session: AsyncSession, session_id: str) -> PriceTable | None:
+        tenant_id = session.info['tenant_id']
+        table = self._tables.get(session_id)
+        # The TTL bounds how long other workers serve a price changed elsewhere
+        if (
+            table
+            and table.tenant_id == tenant_id
+            and time.monotonic() - table.loaded_at < self.ttl
+        ):
+            return table
+
+        room = (
+            await session.execute(
+                select(MovieSession.cinema_room_id, CinemaRoom.premium_rows)
+                .join(CinemaRoom, CinemaRoom.id == MovieSession.cinema_room_id)
+                .where(
+                    MovieSession.id == session_id, MovieSession.tenant_id == tenant_id
+                )
+            )
+        ).first()
+        if not room:
+            return None
+
+        cinema_room_id, premium_rows = room
+        # Rooms changed on other workers are picked up within the TTL as well
+        loaded_at, categories = self._rooms.get(cinema_room_id, (None, None))
+        if loaded_at is None or time.monotonic() - loaded_at >= self.ttl:
+            seats = await session.execute(
+                select(Seat.id, Seat.row, Seat.is_accessible).where(
+                    Seat.cinema_room_id == cinema_room_id
+                )
+            )
+            premium_rows = set(premium_rows)
+            categories = {
+                seat_id: seat_category(row, is_accessible, premium_rows)
+                for seat_id, row, is_accessible in seats
+            }
+            self._rooms[cinema_room_id] = (time.monotonic(), categories)
+
+        prices = await session.execute(
+            select(SessionPrice.category, SessionPrice.price).where(
+                SessionPrice.session_id == session_id
+            )
+        )
+        table = PriceTable(dict(prices.all()), categories, tenant_id)
+        self._tables[session_id] = table
+
+        return table
+
+    def invalidate(self, session_id: str):
+        self._tables.pop(session_id, None)
+
+    def invalidate_room(self, cinema_room_id: str):
+        self._rooms.pop(cinema_room_id, None)
+
+
+price_tables = PriceTables(ttl=Settings().PRICE_TABLE_TTL_SECONDS)
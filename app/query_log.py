@@ -0,0 +1,183 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PLACEHOLDERS = re.compile(r'%\(\w+\)s|%s|\$\d+|\?')
+IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+SPACES = re.compile(r'\s+')
+
+
+def normalize_statement(statement: str) -> str:
+    normalized = LITERALS.sub('?', PLACEHOLDERS.sub('?', statement))
+    normalized = IN_LISTS.sub('(?...)', normalized)
+    return SPACES.sub(' ', normalized).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+class QueryStats:
+    __slots__ = ('statement', 'calls', 'total_ms', 'max_ms', 'rows', 'slow_calls')
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.slow_calls = 0
+
+    def as_dict(self) -> dict:
+        return {
+            'statement': self.statement,
+            'calls': self.calls,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.calls, 3) if self.calls else 0,
+            'max_ms': round(self.max_ms, 3),
+            'rows': self.rows,
+            'slow_calls': self.slow_calls,
+        }
+
+
+class QueryLog:
+    """Per-fingerprint statistics and a ring buffer of slow statements.
+
+    Both are bounded: the least recently seen fingerprint is evicted past
+    `max_fingerprints` and only the last `buffer_size` slow queries are kept.
+    Slow SELECTs get their plan captured once per fingerprint. Plain EXPLAIN
+    only plans the statement: ANALYZE would run it again, notifying and
+    locking twice and repeating any data-modifying CTE.
+    """
+
+    def __init__(
+            self,
+            slow_ms: float,
+            buffer_size: int,
+            max_fingerprints: int,
+            explain: bool,
+    ):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.max_fingerprints = max_fingerprints
+        self.slow_queries: deque[dict] = deque(maxlen=buffer_size)
+        self.stats: OrderedDict[str, QueryStats] = OrderedDict()
+        self.plans: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_cursor_execute(  # noqa: PLR0913, PLR0917, PLR6301
+            self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+    def _after_cursor_execute(  # noqa: PLR0913, PLR0917
+            self, conn, cursor, statement, parameters, context, executemany
+    ):
+        started = conn.info['query_started_at'].pop()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        normalized = normalize_statement(statement)
+        key = fingerprint(normalized)
+        slow = duration_ms >= self.slow_ms
+        rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = QueryStats(normalized)
+                if len(self.stats) > self.max_fingerprints:
+                    self.stats.popitem(last=False)
+            else:
+                self.stats.move_to_end(key)
+
+            stats.calls += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.rows += rows
+            stats.slow_calls += slow
+
+            capture_plan = (
+                slow
+                and self.explain
+                and not executemany
+                and key not in self.plans
+                and normalized.upper().startswith(('SELECT', 'WITH'))
+            )
+
+        if not slow:
+            return
+
+        plan = self._explain(conn, statement, parameters) if capture_plan else None
+
+        with self._lock:
+            if plan is not None:
+                self.plans[key] = plan
+                if len(self.plans) > self.max_fingerprints:
+                    self.plans.popitem(last=False)
+
+            self.slow_queries.append({
+                'fingerprint': key,
+                'statement': normalized,
+                'duration_ms': round(duration_ms, 3),
+                'rows': rows,
+                'at': datetime.now(tz=ZoneInfo('UTC')).isoformat(),
+            })
+
+    @staticmethod
+    def _explain(conn, statement, parameters) -> list | None:
+        # A raw cursor of its own: the caller has not fetched its results yet
+        # and the EXPLAIN must not go through these hooks again
+        try:
+            cursor = conn.connection.dbapi_connection.cursor()
+            # A failed EXPLAIN must not abort the caller's transaction
+            cursor.execute('SAVEPOINT query_log_explain')
+            try:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {statement}', parameters)
+                plan = cursor.fetchone()[0]
+                cursor.execute('RELEASE SAVEPOINT query_log_explain')
+                return plan
+
+            except Exception:
+                cursor.execute('ROLLBACK TO SAVEPOINT query_log_explain')
+                return None
+
+            finally:
+                cursor.close()
+
+        except Exception:
+            return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            slow_queries = list(self.slow_queries)
+            stats = sorted(
+                ((key, stats.as_dict()) for key, stats in self.stats.items()),
+                key=lambda item: item[1]['total_ms'],
+                reverse=True,
+            )
+
+            return {
+                'slow_ms': self.slow_ms,
+                'statements': [{'fingerprint': key, **item} for key, item in stats],
+                'slow_queries': [
+                    {**query, 'plan': self.plans.get(query['fingerprint'])}
+                    for query in slow_queries
+                ],
+            }
+
+    def dump(self, path: str):
+        with open(path, 'w', encoding='utf-8') as dump_file:
+            json.dump(self.snapshot(), dump_file, indent=2, default=str)
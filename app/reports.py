@@ -0,0 +1,194 @@
+import asyncio
+import logging
+from datetime import date, timedelta
+
+from sqlalchemy import (
+    Date,
+    Float,
+    cast,
+    func,
+    select,
+    union,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import tenant_engines
+from app.models import (
+    CinemaRoom,
+    Movie,
+    SeatReservation,
+    SeatStatus,
+    SessionSales,
+)
+from app.models import (
+    Session as MovieSession,
+)
+
+logger = logging.getLogger('uvicorn.error')
+
+# First key of the pg_try_advisory_xact_lock, the second is hashtext(schema),
+# one refresh per tenant schema at a time across workers
+REFRESH_LOCK = 0x5A1E5
+
+
+async def refresh_session_sales(
+        session: AsyncSession, overlap: timedelta
+) -> int | None:
+    """Rebuild session_sales rows of sessions changed since the last refresh.
+
+    Every seat change moves its session's counters, so sessions.updated_at
+    (together with the sessions not summarized yet) finds the stale rows
+    without scanning seat_reservations. Revenue adds up the prices paid at
+    confirmation, so a later price change leaves it alone. `overlap` re-reads a margin
+    before the previous refresh to catch transactions that were still running.
+    Returns the sessions refreshed, None when another worker holds the lock.
+    """
+    locked = await session.scalar(
+        select(
+            func.pg_try_advisory_xact_lock(
+                REFRESH_LOCK, func.hashtext(func.current_schema())
+            )
+        )
+    )
+    if not locked:
+        return None
+
+    since = select(func.max(SessionSales.refreshed_at)).scalar_subquery() - overlap
+    changed = union(
+        select(MovieSession.id).where(MovieSession.updated_at >= since),
+        select(MovieSession.id)
+        .outerjoin(SessionSales, SessionSales.session_id == MovieSession.id)
+        .where(SessionSales.session_id.is_(None)),
+    ).cte('changed_sessions')
+    changed_ids = select(changed.c.id)
+
+    sales = (
+        select(
+            SeatReservation.session_id,
+            func.count().label('seats_sold'),
+            func.coalesce(func.sum(SeatReservation.price), 0).label('revenue'),
+        )
+        .where(
+            SeatReservation.status == SeatStatus.confirmed,
+            SeatReservation.session_id.in_(changed_ids),
+        )
+        .group_by(SeatReservation.session_id)
+    ).subquery('sales')
+
+    refresh = insert(SessionSales).from_select(
+        [
+            'session_id', 'tenant_id', 'movie_id', 'day', 'capacity', 'seats_sold',
+            'revenue', 'refreshed_at',
+        ],
+        select(
+            MovieSession.id,
+            MovieSession.tenant_id,
+            MovieSession.movie_id,
+            cast(MovieSession.session_time, Date),
+            CinemaRoom.total_seats,
+            func.coalesce(sales.c.seats_sold, 0),
+            func.coalesce(sales.c.revenue, 0),
+            # Transaction start, so nothing committed after it is skipped
+            func.now(),
+        )
+        .join(CinemaRoom, CinemaRoom.id == MovieSession.cinema_room_id)
+        .outerjoin(sales, sales.c.session_id == MovieSession.id)
+        .where(MovieSession.id.in_(changed_ids)),
+    )
+    refresh = refresh.on_conflict_do_update(
+        index_elements=['session_id'],
+        set_={
+            column: refresh.excluded[column]
+            for column in (
+                'movie_id', 'day', 'capacity', 'seats_sold', 'revenue', 'refreshed_at'
+            )
+        },
+    )
+
+    refreshed = (await session.execute(refresh)).rowcount
+    await session.commit()
+
+    return refreshed
+
+
+def _totals():
+    capacity = func.sum(SessionSales.capacity)
+    seats_sold = func.sum(SessionSales.seats_sold)
+    return (
+        func.count().label('sessions'),
+        capacity.label('capacity'),
+        seats_sold.label('seats_sold'),
+        func.coalesce(
+            cast(seats_sold, Float) / func.nullif(capacity, 0), 0
+        ).label('occupancy'),
+        func.sum(SessionSales.revenue).label('revenue'),
+    )
+
+
+def _period(tenant_id: str, date_from: date | None, date_to: date | None) -> list:
+    filters = [SessionSales.tenant_id == tenant_id]
+    if date_from is not None:
+        filters.append(SessionSales.day >= date_from)
+    if date_to is not None:
+        filters.append(SessionSales.day <= date_to)
+    return filters
+
+
+async def movie_sales(
+        session: AsyncSession,
+        tenant_id: str,
+        date_from: date | None = None,
+        date_to: date | None = None,
+) -> list[dict]:
+    totals = (
+        select(SessionSales.movie_id, *_totals())
+        .where(*_period(tenant_id, date_from, date_to))
+        .group_by(SessionSales.movie_id)
+    ).subquery('totals')
+
+    rows = await session.execute(
+        select(totals, Movie.title)
+        .join(Movie, Movie.id == totals.c.movie_id)
+        .order_by(totals.c.revenue.desc(), Movie.title)
+    )
+
+    return rows.mappings().all()
+
+
+async def daily_sales(
+        session: AsyncSession,
+        tenant_id: str,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        movie_id: str | None = None,
+) -> list[dict]:
+    filters = _period(tenant_id, date_from, date_to)
+    if movie_id is not None:
+        filters.append(SessionSales.movie_id == movie_id)
+
+    rows = await session.execute(
+        select(SessionSales.day, *_totals())
+        .where(*filters)
+        .group_by(SessionSales.day)
+        .order_by(SessionSales.day)
+    )
+
+    return rows.mappings().all()
+
+
+async def run_sales_report_refresh(interval: float, overlap: timedelta):
+    while True:
+        for schema, engine in tenant_engines.all():
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    refreshed = await refresh_session_sales(session, overlap)
+                if refreshed:
+                    logger.info(
+                        'Refreshed sales of %s sessions (schema %s)', refreshed, schema
+                    )
+
+            except Exception:
+                logger.exception('Could not refresh sales reports (schema %s)', schema)
+
+        await asyncio.sleep(interval)
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from sqlalchemy import String, and_, cast, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import tenant_engines
+from app.models import (
+    CinemaRoom,
+    Seat,
+    SeatReservation,
+    SeatStatus,
+    SessionPrice,
+)
+from app.models import Session as MovieSession
+from app.pricing import seat_category_clause
+from app.seat_events import seat_event, seat_event_broker
+from app.settings import Settings
+
+logger = logging.getLogger('uvicorn.error')
+
+
+async def hold_seats(
+        session: AsyncSession, session_id: str, user_id: str, seat_ids: set[str]
+) -> list[str]:
+    """Put seats on hold in one INSERT ... ON CONFLICT DO UPDATE.
+
+    Only seats of the session's room are inserted, and only when the session
+    belongs to the request's tenant. An existing reservation is only taken
+    over when it is free or expired; lapsed holds on the requested seats are
+    expired first. The caller decides what to do with a partial hold.
+    """
+    await expire_holds(session, session_id, seat_ids)
+
+    reservation_status = SeatReservation.__table__.c.status.type
+    hold_ttl = timedelta(minutes=Settings().SEAT_HOLD_MINUTES)
+
+    hold = insert(SeatReservation).from_select(
+        ['id', 'user_id', 'session_id', 'seat_id', 'status', 'expires_at'],
+        select(
+            cast(func.gen_random_uuid(), String),
+            literal(user_id),
+            MovieSession.id,
+            Seat.id,
+            literal(SeatStatus.on_hold, reservation_status),
+            func.now() + hold_ttl,
+        )
+        .join(MovieSession, MovieSession.cinema_room_id == Seat.cinema_room_id)
+        .where(
+            MovieSession.id == session_id,
+            MovieSession.tenant_id == session.info['tenant_id'],
+            Seat.id.in_(seat_ids),
+        ),
+    )
+    hold = hold.on_conflict_do_update(
+        constraint='uq_session_seat_reservation',
+        set_={
+            'user_id': hold.excluded.user_id,
+            'status': hold.excluded.status,
+            'expires_at': hold.excluded.expires_at,
+            'updated_at': func.now(),
+        },
+        where=SeatReservation.status.in_([SeatStatus.free, SeatStatus.expired]),
+    ).returning(SeatReservation.seat_id)
+
+    held = list(await session.scalars(hold))
+    await adjust_seat_counters(session, session_id, held=len(held))
+
+    seat_event_broker.stage(
+        session,
+        [seat_event(session_id, seat_id, SeatStatus.on_hold) for seat_id in held],
+    )
+
+    return held
+
+
+async def confirm_seats(
+        session: AsyncSession, session_id: str, user_id: str, seat_ids: set[str]
+) -> list[str]:
+    """Confirm the user's live holds in a single conditional UPDATE.
+
+    Ownership and expiry are part of the WHERE clause, so seats missing from
+    the result are either not held by the user or already expired. The
+    current price of each seat is stored as the price paid.
+    """
+    category = seat_category_clause(SessionPrice.__table__.c.category.type)
+    price = (
+        select(SessionPrice.price)
+        .select_from(Seat)
+        .join(CinemaRoom, CinemaRoom.id == Seat.cinema_room_id)
+        .join(
+            SessionPrice,
+            and_(
+                SessionPrice.session_id == SeatReservation.session_id,
+                SessionPrice.category == category,
+            ),
+        )
+        .where(Seat.id == SeatReservation.seat_id)
+        .scalar_subquery()
+    )
+    confirm = (
+        update(SeatReservation)
+        .where(
+            SeatReservation.session_id == session_id,
+            MovieSession.id == SeatReservation.session_id,
+            MovieSession.tenant_id == session.info['tenant_id'],
+            SeatReservation.user_id == user_id,
+            SeatReservation.seat_id.in_(seat_ids),
+            SeatReservation.status == SeatStatus.on_hold,
+            SeatReservation.expires_at > func.now(),
+        )
+        .values(status=SeatStatus.confirmed, price=price, updated_at=func.now())
+        .returning(SeatReservation.seat_id)
+        .execution_options(synchronize_session=False)
+    )
+
+    confirmed = list(await session.scalars(confirm))
+    await adjust_seat_counters(
+        session, session_id, held=-len(confirmed), confirmed=len(confirmed)
+    )
+
+    seat_event_broker.stage(
+        session,
+        [
+            seat_event(session_id, seat_id, SeatStatus.confirmed)
+            for seat_id in confirmed
+        ],
+    )
+
+    return confirmed
+
+
+async def adjust_seat_counters(
+        session: AsyncSession, session_id: str, held: int = 0, confirmed: int = 0
+):
+    if not held and not confirmed:
+        return
+
+    await session.execute(
+        update(MovieSession)
+        .where(MovieSession.id == session_id)
+        .values(
+            held_seats=MovieSession.held_seats + held,
+            confirmed_seats=MovieSession.confirmed_seats + confirmed,
+            free_seats=MovieSession.free_seats - held - confirmed,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def expire_holds(
+        session: AsyncSession,
+        session_id: str | None = None,
+        seat_ids: set[str] | None = None,
+) -> int:
+    """Expire lapsed holds, of one session's seats or of every session."""
+    filters = [
+        SeatReservation.status == SeatStatus.on_hold,
+        SeatReservation.expires_at <= func.now(),
+    ]
+    if session_id is not None:
+        filters.append(SeatReservation.session_id == session_id)
+    if seat_ids is not None:
+        filters.append(SeatReservation.seat_id.in_(seat_ids))
+
+    expired = (
+        await session.execute(
+            update(SeatReservation)
+            .where(*filters)
+            .values(status=SeatStatus.expired, updated_at=func.now())
+            .returning(SeatReservation.session_id, SeatReservation.seat_id)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+
+    for expired_session_id, count in Counter(row[0] for row in expired).items():
+        await adjust_seat_counters(session, expired_session_id, held=-count)
+
+    seat_event_broker.stage(
+        session,
+        [
+            seat_event(expired_session_id, seat_id, SeatStatus.expired)
+            for expired_session_id, seat_id in expired
+        ],
+    )
+
+    return len(expired)
+
+
+async def reconcile_seat_counters(session: AsyncSession) -> int:
+    """Recount every session from seat_reservations, returns sessions fixed."""
+    await expire_holds(session)
+
+    def counted(status: SeatStatus):
+        return (
+            select(func.count())
+            .select_from(SeatReservation)
+            .where(
+                SeatReservation.session_id == MovieSession.id,
+                SeatReservation.status == status,
+            )
+            .scalar_subquery()
+        )
+
+    total_seats = (
+        select(CinemaRoom.total_seats)
+        .where(CinemaRoom.id == MovieSession.cinema_room_id)
+        .scalar_subquery()
+    )
+    held, confirmed = counted(SeatStatus.on_hold), counted(SeatStatus.confirmed)
+
+    drifted = await session.scalars(
+        update(MovieSession)
+        .where(
+            (MovieSession.held_seats != held)
+            | (MovieSession.confirmed_seats != confirmed)
+            | (MovieSession.free_seats != total_seats - held - confirmed)
+        )
+        .values(
+            held_seats=held,
+            confirmed_seats=confirmed,
+            free_seats=total_seats - held - confirmed,
+        )
+        .returning(MovieSession.id)
+        .execution_options(synchronize_session=False)
+    )
+    fixed = len(drifted.all())
+    await session.commit()
+
+    return fixed
+
+
+async def run_hold_expiry(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        for schema, engine in tenant_engines.all():
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    await expire_holds(session)
+                    await session.commit()
+
+            except Exception:
+                logger.exception('Could not expire seat holds (schema %s)', schema)
+
+
+async def run_seat_counter_reconcile(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        for schema, engine in tenant_engines.all():
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    fixed = await reconcile_seat_counters(session)
+                if fixed:
+                    logger.warning(
+                        'Repaired seat counters of %s sessions (schema %s)',
+                        fixed,
+                        schema,
+                    )
+
+            except Exception:
+                logger.exception(
+                    'Could not reconcile seat counters (schema %s)', schema
+                )
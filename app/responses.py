@@ -0,0 +1,34 @@
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from app.schemas import (
+    CinemaRoomCompact,
+    CinemaRoomFull,
+    MoviePublic,
+    ReservationHistory,
+    UserPublic,
+)
+
+# Built once, each adapter keeps its compiled validator and serializer
+MOVIE_LIST = TypeAdapter(list[MoviePublic])
+CINEMA_ROOM_LIST = TypeAdapter(list[CinemaRoomCompact])
+CINEMA_ROOM_FULL = TypeAdapter(CinemaRoomFull)
+USER_LIST = TypeAdapter(list[UserPublic])
+RESERVATION_HISTORY = TypeAdapter(ReservationHistory)
+
+
+class AdaptedJSONResponse(Response):
+    """Validates ORM rows and writes JSON bytes in a single pydantic-core pass.
+
+    FastAPI's default path validates against `response_model`, dumps the
+    result to JSON-compatible dicts and lists with `mode='json'` and then
+    runs `json.dumps` over them. Routes returning this response skip those
+    intermediate objects; keep `response_model` on the route for the OpenAPI
+    schema.
+    """
+
+    media_type = 'application/json'
+
+    def __init__(self, adapter: TypeAdapter, content, **kwargs):
+        validated = adapter.validate_python(content, from_attributes=True)
+        super().__init__(content=adapter.dump_json(validated), **kwargs)
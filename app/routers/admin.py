@@ -0,0 +1,79 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import (
+    engine,
+    get_session,
+    query_log,
+    tenant_directory,
+    tenant_engines,
+)
+from app.models import AuditEvent, Tenant
+from app.schemas import AuditEventPublic, TenantSchema
+from app.security import TokenUser, get_current_user
+from app.settings import Settings
+
+
+async def get_admin_user(current_user: Annotated[TokenUser, Depends(get_current_user)]):
+    if current_user.email not in Settings().ADMIN_EMAILS:
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Admins only.')
+
+    return current_user
+
+
+router = APIRouter(
+    prefix='/admin', tags=['admin'], dependencies=[Depends(get_admin_user)]
+)
+
+
+@router.get('/queries', response_model=dict)
+async def get_query_log():
+    if not query_log:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Query log is disabled.'
+        )
+
+    return query_log.snapshot()
+
+
+@router.get('/audit', response_model=list[AuditEventPublic])
+async def get_audit_events(
+        session: Annotated[AsyncSession, Depends(get_session)],
+        entity_type: str | None = None,
+        entity_id: str | None = None,
+        user_id: str | None = None,
+        limit: Annotated[int, Query(ge=1, le=500)] = 100,
+):
+    query = select(AuditEvent).order_by(AuditEvent.occurred_at.desc()).limit(limit)
+    if entity_type is not None:
+        query = query.where(AuditEvent.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.where(AuditEvent.entity_id == entity_id)
+    if user_id is not None:
+        query = query.where(AuditEvent.user_id == user_id)
+
+    return (await session.scalars(query)).all()
+
+
+@router.post('/tenants', response_model=TenantSchema, status_code=HTTPStatus.CREATED)
+async def create_tenant(tenant: TenantSchema):
+    # Tenants are chain-wide, whatever tenant the admin is browsing as
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add(Tenant(id=tenant.id, name=tenant.name))
+        try:
+            await session.commit()
+        except IntegrityError:
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT, detail='Tenant already exists.'
+            )
+
+    if tenant_engines.schema_for(tenant.id):
+        await tenant_engines.create_schema(tenant.id)
+    tenant_directory.add(tenant.id)
+
+    return tenant
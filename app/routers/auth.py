@@ -1,19 +1,29 @@
 from typing import Annotated
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends, HTTPException
+import jwt
+from fastapi import APIRouter, Depends, Form, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
 
-from app.security import get_current_user, verify_password, create_access_token
+from app.security import (
+    TokenUser,
+    decode_refresh_token,
+    get_current_user,
+    issue_tokens,
+    revoke_session,
+    rotate_refresh_token,
+    verify_password,
+)
 from app.database import get_session
 from app.models import User
 
 
 Session = Annotated[AsyncSession, Depends(get_session)]
 AuthForm = Annotated[OAuth2PasswordRequestForm, Depends()]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+RefreshTokenForm = Annotated[str, Form()]
+CurrentUser = Annotated[TokenUser, Depends(get_current_user)]
 router = APIRouter(prefix='/auth', tags=['auth'])
 
 
@@ -34,7 +44,44 @@ async def login_for_access_token(form_data: AuthForm, session: Session):
     if not verify_password(form_data.password, db_user.password):
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail="Incorrect password.")
 
-    return {
-        'access_token': create_access_token(data={'sub': db_user.email}),
-        'token_type': 'bearer',
-    }
+    tokens = await issue_tokens(session, db_user)
+    await session.commit()
+
+    return tokens
+
+
+@router.post('/refresh_token')
+async def refresh_access_token(refresh_token: RefreshTokenForm, session: Session):
+    invalid_token = HTTPException(
+        status_code=HTTPStatus.UNAUTHORIZED,
+        detail='Invalid refresh token.',
+        headers={'WWW-Authenticate': 'Bearer'},
+    )
+
+    try:
+        payload = decode_refresh_token(refresh_token)
+    except jwt.InvalidTokenError:
+        raise invalid_token
+
+    db_user = await rotate_refresh_token(session, payload)
+    if not db_user:
+        raise invalid_token
+
+    tokens = await issue_tokens(session, db_user, family_id=payload['sid'])
+    await session.commit()
+
+    return tokens
+
+
+@router.post('/logout', response_model=dict)
+async def logout(refresh_token: RefreshTokenForm, session: Session):
+    try:
+        payload = decode_refresh_token(refresh_token)
+    except jwt.InvalidTokenError:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED, detail='Invalid refresh token.'
+        )
+
+    await revoke_session(session, payload['sid'])
+
+    return {'msg': 'Logged out'}
@@ -1,25 +1,39 @@
 from http import HTTPStatus
 from typing import Annotated
 from uuid import uuid4
-import os
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
-from fastapi.responses import FileResponse
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_session
+from app.audit import audit_log
+from app.database import get_session, get_tenant_id
 from app.routers.auth import get_current_user
-from app.schemas import MoviePublic, MovieSchema, MovieUpdate, movie_form, update_movie_form, new_poster
-from app.models import Movie, User
+from app.security import TokenUser
+from app.schemas import (
+    MoviePublic,
+    MovieSchema,
+    MovieSearchResults,
+    MovieUpdate,
+    movie_form,
+    update_movie_form,
+)
+from app.search import MovieSearch, decode_cursor, movie_search_index, search_movies
+from app.models import Movie
+from app.scheduling import overlapping_sessions, reschedule_movie_sessions
+from app.responses import MOVIE_LIST, AdaptedJSONResponse
+from app.storage import poster_store
 from app.routers.sessions import router as sessions_router
 
 router = APIRouter(prefix='/movies', tags=['movies'])
 router.include_router(sessions_router, prefix='/sessions', tags=['sessions'])
 
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+TenantId = Annotated[str, Depends(get_tenant_id)]
+CurrentUser = Annotated[TokenUser, Depends(get_current_user)]
 MovieFormSchema = Annotated[MovieSchema, Depends(movie_form)]
 UpdateMovieFormSchema = Annotated[MovieSchema, Depends(update_movie_form)]
 
@@ -28,30 +42,33 @@ UpdateMovieFormSchema = Annotated[MovieSchema, Depends(update_movie_form)]
 async def create_movie(
         movie: MovieFormSchema,
         session: Session,
+        tenant_id: TenantId,
         current_user: CurrentUser,
         request: Request,
         poster: UploadFile = File(...),
 ):
     movie_id = str(uuid4())
 
-    poster_info = new_poster(poster, request, movie_id)
-
+    poster_path = await poster_store.save(session, poster.file)
 
     db_movie = Movie(
         id=movie_id,
+        tenant_id=tenant_id,
         title=movie.title,
         year=movie.year,
         genre=movie.genre,
-        poster_path=poster_info['poster_path'],
-        poster_url=poster_info['poster_url'],
+        runtime_minutes=movie.runtime_minutes,
+        poster_path=poster_path,
+        poster_url=f'movies/{movie_id}/poster',
         user_id=current_user.id
     )
 
     try:
         session.add(db_movie)
         await session.commit()
+        movie_search_index.invalidate()
+        await audit_log.record('movie.created', 'movie', movie_id, current_user.id)
         await session.refresh(db_movie)
-        await session.refresh(current_user)
 
         return db_movie
 
@@ -60,17 +77,52 @@ async def create_movie(
 
 
 @router.get('/', response_model=list[MoviePublic])
-async def get_movies(session: Session):
-    return await session.scalars(
-        select(Movie)
+async def get_movies(session: Session, tenant_id: TenantId):
+    movies = await session.scalars(
+        select(Movie).where(Movie.tenant_id == tenant_id)
     )
 
+    return AdaptedJSONResponse(MOVIE_LIST, movies.all())
+
+
+@router.get('/search', response_model=MovieSearchResults)
+async def search_movie_catalog(
+        session: Session,
+        tenant_id: TenantId,
+        q: str | None = None,
+        genre: str | None = None,
+        year_min: int | None = None,
+        year_max: int | None = None,
+        limit: Annotated[int, Query(gt=0, le=100)] = 20,
+        cursor: str | None = None,
+):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor.')
+
+    movies, facets, next_cursor = await search_movies(
+        session,
+        MovieSearch(
+            tenant_id=tenant_id,
+            q=q,
+            genre=genre,
+            year_min=year_min,
+            year_max=year_max,
+            limit=limit,
+            after=after,
+        ),
+    )
+
+    return {'items': movies, 'facets': facets, 'next_cursor': next_cursor}
+
 
 @router.get('/{movie_id}', response_model=MoviePublic)
-async def get_movie_by_id(movie_id: str, session: Session):
+async def get_movie_by_id(movie_id: str, session: Session, tenant_id: TenantId):
     db_movie = await session.scalar(
         select(Movie).where(
-            Movie.id == movie_id
+            Movie.id == movie_id,
+            Movie.tenant_id == tenant_id,
         )
     )
 
@@ -81,20 +133,34 @@ async def get_movie_by_id(movie_id: str, session: Session):
 
 
 @router.get('/{movie_id}/poster', response_class=FileResponse)
-async def get_movie_poster_by_movie_id(movie_id: str, session: Session):
+async def get_movie_poster_by_movie_id(
+        movie_id: str, session: Session, tenant_id: TenantId
+):
     db_movie = await session.scalar(
         select(Movie).where(
             Movie.id == movie_id,
+            Movie.tenant_id == tenant_id,
         )
     )
 
     if not db_movie:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Movie not found.')
 
-    if not os.path.exists(db_movie.poster_path):
+    if not await run_in_threadpool(poster_store.backend.exists, db_movie.poster_path):
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Movie poster not found.')
 
-    return db_movie.poster_path
+    # Content addressed, a poster path never changes what it points to
+    headers = {'Cache-Control': 'public, max-age=31536000, immutable'}
+
+    local_path = poster_store.backend.local_path(db_movie.poster_path)
+    if local_path:
+        return FileResponse(local_path, headers=headers)
+
+    return Response(
+        content=await run_in_threadpool(poster_store.backend.read, db_movie.poster_path),
+        media_type='image/png',
+        headers=headers,
+    )
 
 
 @router.patch('/{movie_id}', response_model=MoviePublic)
@@ -102,12 +168,14 @@ async def update_movie(
         movie_id: str,
         movie: UpdateMovieFormSchema,
         session: Session,
+        tenant_id: TenantId,
         current_user: CurrentUser,
         request: Request,
         poster: UploadFile | None = File(None),
 ):
     db_movie = await session.scalar(select(Movie).where(
         Movie.id == movie_id,
+        Movie.tenant_id == tenant_id,
         Movie.user_id == current_user.id
     )
     )
@@ -115,18 +183,45 @@ async def update_movie(
     if not db_movie:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Movie not found.')
 
+    rescheduled = []
+    if movie.runtime_minutes and movie.runtime_minutes != db_movie.runtime_minutes:
+        # Before the movie changes, so a failure here is only about sessions
+        try:
+            async with session.begin_nested():
+                rescheduled = await reschedule_movie_sessions(
+                    session, movie_id, movie.runtime_minutes
+                )
+        except IntegrityError:
+            # Exclusion constraint, report which sessions the new runtime overlaps
+            overlaps = await overlapping_sessions(
+                session, movie_id, movie.runtime_minutes
+            )
+            await session.rollback()
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail={
+                    'msg': 'The new runtime makes sessions overlap in a cinema room.',
+                    'overlaps': overlaps,
+                },
+            )
+
     for key, value in movie.model_dump(exclude_none=True).items():
         setattr(db_movie, key, value)
 
     if poster:
-        poster_info = new_poster(poster,request, movie_id)
-        db_movie.poster_path = poster_info['poster_path']
-        db_movie.poster_url = poster_info['poster_url']
+        await poster_store.release(session, db_movie.poster_path)
+        db_movie.poster_path = await poster_store.save(session, poster.file)
 
     try:
         await session.commit()
+        movie_search_index.invalidate()
+        await audit_log.record(
+            'movie.updated', 'movie', movie_id, current_user.id,
+            fields=sorted(movie.model_dump(exclude_none=True)),
+            poster_replaced=poster is not None,
+            rescheduled_sessions=rescheduled,
+        )
         await session.refresh(db_movie)
-        await session.refresh(current_user)
 
         return db_movie
 
@@ -135,21 +230,26 @@ async def update_movie(
 
 
 @router.delete('/{movie_id}', response_model=dict)
-async def delete_movie(movie_id: str, session: Session, current_user: CurrentUser):
-    db_movie = await session.scalar(select(Movie).where(
+async def delete_movie(
+        movie_id: str, session: Session, tenant_id: TenantId, current_user: CurrentUser
+):
+    # Sessions and their reservations go with it through ON DELETE CASCADE
+    poster_path = await session.scalar(
+        delete(Movie)
+        .where(
             Movie.id == movie_id,
-            Movie.user_id  == current_user.id
-                            )
+            Movie.tenant_id == tenant_id,
+            Movie.user_id == current_user.id,
+        )
+        .returning(Movie.poster_path)
     )
 
-    if not db_movie:
+    if not poster_path:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Movie not found.')
 
-    if db_movie.poster_path and os.path.exists(db_movie.poster_path):
-        os.remove(db_movie.poster_path)
-
-    await session.delete(db_movie)
+    await poster_store.release(session, poster_path)
     await session.commit()
-    await session.refresh(current_user)
+    movie_search_index.invalidate()
+    await audit_log.record('movie.deleted', 'movie', movie_id, current_user.id)
 
     return {'msg' : 'Movie deleted'}
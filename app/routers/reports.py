@@ -0,0 +1,39 @@
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_session, get_tenant_id
+from app.reports import daily_sales, movie_sales
+from app.routers.admin import get_admin_user
+from app.schemas import DailySalesReport, MovieSalesReport
+
+Session = Annotated[AsyncSession, Depends(get_session)]
+TenantId = Annotated[str, Depends(get_tenant_id)]
+
+# Served from session_sales only, never from the live booking tables
+router = APIRouter(
+    prefix='/reports', tags=['reports'], dependencies=[Depends(get_admin_user)]
+)
+
+
+@router.get('/sales/movies', response_model=list[MovieSalesReport])
+async def get_movie_sales(
+        session: Session,
+        tenant_id: TenantId,
+        date_from: date | None = None,
+        date_to: date | None = None,
+):
+    return await movie_sales(session, tenant_id, date_from, date_to)
+
+
+@router.get('/sales/days', response_model=list[DailySalesReport])
+async def get_daily_sales(
+        session: Session,
+        tenant_id: TenantId,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        movie_id: str | None = None,
+):
+    return await daily_sales(session, tenant_id, date_from, date_to, movie_id)
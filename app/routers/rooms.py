@@ -4,30 +4,50 @@ from uuid import uuid4
 from string import ascii_uppercase
 import os
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
 from fastapi.responses import FileResponse
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.database import get_session
+from app.audit import audit_log
+from app.database import get_session, get_tenant_id
 from app.routers.auth import get_current_user
+from app.security import TokenUser
 from app.schemas import CinemaRoomCompact, CinemaRoomFull
-from app.models import Movie, User, CinemaRoom, Seat
+from app.models import Movie, CinemaRoom, Seat
+from app.pricing import price_tables
+from app.responses import CINEMA_ROOM_FULL, CINEMA_ROOM_LIST, AdaptedJSONResponse
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[TokenUser, Depends(get_current_user)]
 Session = Annotated[AsyncSession, Depends(get_session)]
+TenantId = Annotated[str, Depends(get_tenant_id)]
 
 
 router = APIRouter(prefix='/rooms', tags=['rooms'])
 
 
 @router.post("/", response_model=CinemaRoomCompact, status_code=HTTPStatus.CREATED)
-async def seed_cinema_room(cinema_room_name, rows: int, columns: int, session: Session, current_user: CurrentUser):
+async def seed_cinema_room(
+        cinema_room_name,
+        rows: int,
+        columns: int,
+        session: Session,
+        tenant_id: TenantId,
+        current_user: CurrentUser,
+        premium_rows: Annotated[list[str] | None, Query()] = None,
+):
+    premium_rows = sorted({row.upper() for row in premium_rows or []})
+    if not set(premium_rows) <= set(ascii_uppercase[:rows]):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Premium rows must be rows of the room.',
+        )
+
     cinema_room = CinemaRoom(
-        id=str(uuid4()), name=cinema_room_name, total_seats=columns*rows, user_id=current_user.id
+        id=str(uuid4()), tenant_id=tenant_id, name=cinema_room_name, total_seats=columns*rows, user_id=current_user.id, premium_rows=premium_rows
     )
 
     seats = []
@@ -46,35 +66,55 @@ async def seed_cinema_room(cinema_room_name, rows: int, columns: int, session: S
     session.add(cinema_room)
     session.add_all(seats)
     await session.commit()
+    await audit_log.record(
+        'cinema_room.created', 'cinema_room', cinema_room.id, current_user.id,
+        total_seats=cinema_room.total_seats,
+    )
     await session.refresh(cinema_room)
 
     return cinema_room
 
 
 @router.get("/", response_model=list[CinemaRoomCompact])
-async def get_all_cinema_rooms(session: Session):
-    return await session.scalars(select(CinemaRoom))
+async def get_all_cinema_rooms(session: Session, tenant_id: TenantId):
+    cinema_rooms = await session.scalars(
+        select(CinemaRoom).where(CinemaRoom.tenant_id == tenant_id)
+    )
+
+    return AdaptedJSONResponse(CINEMA_ROOM_LIST, cinema_rooms.all())
 
 
 @router.get("/{cinema_room_id}", response_model=CinemaRoomFull)
-async def get_cinema_room_by_id(session: Session, cinema_room_id: str):
+async def get_cinema_room_by_id(session: Session, tenant_id: TenantId, cinema_room_id: str):
     cinema_room = await session.scalar(
         select(CinemaRoom)
-        .where(CinemaRoom.id == cinema_room_id)
+        .where(CinemaRoom.id == cinema_room_id, CinemaRoom.tenant_id == tenant_id)
     )
 
-    return cinema_room
+    if not cinema_room:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Cinema room not found.')
+
+    return AdaptedJSONResponse(CINEMA_ROOM_FULL, cinema_room)
 
 
 @router.delete("/{cinema_room_id}")
-async def delete_cinema_room(session: Session, cinema_room_id: str, current_user: CurrentUser):
-    cinema_room = await session.scalar(
-        select(CinemaRoom).where(
+async def delete_cinema_room(session: Session, tenant_id: TenantId, cinema_room_id: str, current_user: CurrentUser):
+    # Seats, sessions and reservations go with it through ON DELETE CASCADE
+    deleted = await session.scalar(
+        delete(CinemaRoom)
+        .where(
             CinemaRoom.id == cinema_room_id,
+            CinemaRoom.tenant_id == tenant_id,
             CinemaRoom.user_id == current_user.id
-        ))
+        )
+        .returning(CinemaRoom.id)
+    )
+
+    if not deleted:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Cinema room not found.')
 
-    await session.delete(cinema_room)
     await session.commit()
+    price_tables.invalidate_room(deleted)
+    await audit_log.record('cinema_room.deleted', 'cinema_room', deleted, current_user.id)
 
     return {'msg': 'Cinema room was deleted'}
@@ -1,25 +1,540 @@
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
 from http import HTTPStatus
 from typing import Annotated
 from uuid import uuid4
-from string import ascii_uppercase
-import os
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
-from fastapi.responses import FileResponse
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-from app.database import get_session
+from app.admission import admission_queues
+from app.allocation import seat_maps
+from app.audit import audit_log
+from app.database import get_session, get_tenant_id
 from app.routers.auth import get_current_user
-from app.schemas import MoviePublic, MovieSchema, MovieUpdate, movie_form, update_movie_form, new_poster
-from app.models import Movie, User, CinemaRoom, Seat
+from app.security import TokenUser
+from app.models import (
+    CinemaRoom,
+    Movie,
+    SeatReservation,
+    SeatStatus,
+    SessionPrice,
+    Session as MovieSession,
+)
+from app.pricing import price_tables
+from app.scheduling import (
+    find_overlaps,
+    naive_utc,
+    room_time,
+    scheduled_intervals,
+)
+from app.reservations import confirm_seats, hold_seats
+from app.schemas import (
+    AdmissionQueuePublic,
+    AdmissionQueueSchema,
+    AdmissionTicketPublic,
+    BestSeatsRequest,
+    SeatQuotePublic,
+    SeatReservationPublic,
+    ScheduleEntry,
+    SeatSelection,
+    SessionOccupancy,
+    SessionPrices,
+    SessionPriceSchema,
+    SessionPublic,
+)
+from app.seat_events import Subscription, seat_event_broker
+from app.settings import Settings
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[TokenUser, Depends(get_current_user)]
 Session = Annotated[AsyncSession, Depends(get_session)]
+TenantId = Annotated[str, Depends(get_tenant_id)]
 
 
 router = APIRouter(prefix='/sessions', tags=['sessions'])
 
+
+async def check_admission(
+        session: AsyncSession,
+        session_id: str,
+        admission_token: str | None,
+        current_user: TokenUser,
+):
+    if not await admission_queues.is_admitted(
+        session, session_id, admission_token, current_user.id
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Not admitted yet, join the session queue and wait your turn.',
+            headers={
+                'Retry-After': str(
+                    admission_queues.retry_after(session_id, admission_token)
+                )
+            },
+        )
+
+
+async def get_owned_session(
+        session_id: str, session: AsyncSession, current_user: TokenUser
+) -> MovieSession:
+    db_session = await session.scalar(
+        select(MovieSession).where(
+            MovieSession.id == session_id,
+            MovieSession.tenant_id == session.info['tenant_id'],
+            MovieSession.user_id == current_user.id,
+        )
+    )
+
+    if not db_session:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Session not found.')
+
+    return db_session
+
+
+def server_sent_event(event_name: str, data) -> str:
+    return f'event: {event_name}\ndata: {json.dumps(data)}\n\n'
+
+
+@router.post(
+    '/schedule', response_model=list[SessionPublic], status_code=HTTPStatus.CREATED
+)
+async def schedule_sessions(
+        entries: list[ScheduleEntry],
+        session: Session,
+        tenant_id: TenantId,
+        current_user: CurrentUser,
+):
+    if not entries:
+        return []
+
+    movie_ids = {entry.movie_id for entry in entries}
+    cinema_room_ids = {entry.cinema_room_id for entry in entries}
+
+    runtimes = dict(
+        (await session.execute(
+            select(Movie.id, Movie.runtime_minutes).where(
+                Movie.id.in_(movie_ids), Movie.tenant_id == tenant_id
+            )
+        )).all()
+    )
+    owned_rooms = dict(
+        (await session.execute(
+            select(CinemaRoom.id, CinemaRoom.total_seats).where(
+                CinemaRoom.id.in_(cinema_room_ids),
+                CinemaRoom.tenant_id == tenant_id,
+                CinemaRoom.user_id == current_user.id,
+            )
+        )).all()
+    )
+
+    if movie_ids - runtimes.keys():
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Movie not found.')
+
+    if cinema_room_ids - owned_rooms.keys():
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Cinema room not found.'
+        )
+
+    # Settings are read once per movie, not once per entry
+    room_times = {
+        movie_id: room_time(runtime) for movie_id, runtime in runtimes.items()
+    }
+    rows = []
+    for entry in entries:
+        session_time = naive_utc(entry.session_time)
+        rows.append({
+            'id': str(uuid4()),
+            'tenant_id': tenant_id,
+            'movie_id': entry.movie_id,
+            'user_id': current_user.id,
+            'cinema_room_id': entry.cinema_room_id,
+            'session_time': session_time,
+            'ends_at': session_time + room_times[entry.movie_id],
+            'free_seats': owned_rooms[entry.cinema_room_id],
+        })
+
+    intervals = [
+        (row['cinema_room_id'], row['session_time'], row['ends_at'], index)
+        for index, row in enumerate(rows)
+    ]
+    intervals += await scheduled_intervals(
+        session,
+        cinema_room_ids,
+        min(row['session_time'] for row in rows),
+        max(row['ends_at'] for row in rows),
+    )
+
+    if overlaps := find_overlaps(intervals):
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail={
+                'msg': 'Sessions overlap in the same cinema room.',
+                'overlaps': [
+                    [
+                        'scheduled' if entry is None else entry
+                        for entry in overlap
+                    ]
+                    for overlap in overlaps
+                ],
+            },
+        )
+
+    try:
+        # executemany, batched below the bind parameter limit by SQLAlchemy
+        await session.execute(insert(MovieSession), rows)
+        await session.commit()
+
+    except IntegrityError:
+        # Exclusion constraint, another schedule was published meanwhile
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Sessions overlap in the same cinema room.',
+        )
+
+    for row in rows:
+        await audit_log.record(
+            'session.scheduled', 'session', row['id'], current_user.id,
+            movie_id=row['movie_id'], cinema_room_id=row['cinema_room_id'],
+            session_time=row['session_time'].isoformat(),
+        )
+
+    return rows
+
+
+@router.get('/occupancy', response_model=list[SessionOccupancy])
+async def get_sessions_occupancy(
+        session: Session,
+        tenant_id: TenantId,
+        cinema_room_id: str | None = None,
+        starts_after: datetime | None = None,
+        starts_before: datetime | None = None,
+):
+    filters = [MovieSession.tenant_id == tenant_id]
+    if cinema_room_id is not None:
+        filters.append(MovieSession.cinema_room_id == cinema_room_id)
+    if starts_after is not None:
+        filters.append(MovieSession.session_time >= naive_utc(starts_after))
+    if starts_before is not None:
+        filters.append(MovieSession.session_time < naive_utc(starts_before))
+
+    # Counters are kept on the session row, no aggregate over reservations
+    occupancy = await session.execute(
+        select(
+            MovieSession.id,
+            MovieSession.cinema_room_id,
+            MovieSession.session_time,
+            MovieSession.held_seats,
+            MovieSession.confirmed_seats,
+            MovieSession.free_seats,
+        )
+        .where(*filters)
+        .order_by(MovieSession.session_time)
+    )
+
+    return occupancy.mappings().all()
+
+
+async def seat_event_stream(
+        request: Request, subscription: Subscription, snapshot: list[dict]
+):
+    keepalive = Settings().SEAT_EVENTS_KEEPALIVE_SECONDS
+
+    try:
+        yield server_sent_event('snapshot', snapshot)
+
+        while True:
+            try:
+                seat_event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=keepalive
+                )
+            except TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ': keep-alive\n\n'
+                continue
+
+            if seat_event is None:
+                yield server_sent_event('overflow', {'detail': 'Consumer too slow.'})
+                break
+
+            yield server_sent_event('seat', seat_event)
+
+    finally:
+        seat_event_broker.unsubscribe(subscription)
+
+
+@router.get('/{session_id}/seats/stream', response_class=StreamingResponse)
+async def stream_session_seats(
+        session_id: str, session: Session, tenant_id: TenantId, request: Request
+):
+    db_session = await session.scalar(
+        select(MovieSession).where(
+            MovieSession.id == session_id, MovieSession.tenant_id == tenant_id
+        )
+    )
+
+    if not db_session:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Session not found.')
+
+    # Subscribe before reading the snapshot so no delta falls in between
+    subscription = seat_event_broker.subscribe(session_id)
+
+    reservations = await session.execute(
+        select(SeatReservation.seat_id, SeatReservation.status).where(
+            SeatReservation.session_id == session_id
+        )
+    )
+    snapshot = [
+        {'seat_id': seat_id, 'status': status.value}
+        for seat_id, status in reservations
+    ]
+
+    # The stream is long-lived, give the connection back to the pool now
+    await session.close()
+
+    return StreamingResponse(
+        seat_event_stream(request, subscription, snapshot),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@router.post('/{session_id}/seats/hold', response_model=SeatReservationPublic)
+async def hold_session_seats(
+        session_id: str,
+        selection: SeatSelection,
+        session: Session,
+        current_user: CurrentUser,
+        admission_token: Annotated[str | None, Header()] = None,
+):
+    await check_admission(session, session_id, admission_token, current_user)
+
+    seat_ids = set(selection.seat_ids)
+    held = await hold_seats(session, session_id, current_user.id, seat_ids)
+
+    if len(held) != len(seat_ids):
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Some seats are not available in this session.',
+        )
+
+    await session.commit()
+    await audit_log.record(
+        'seats.held', 'session', session_id, current_user.id, seat_ids=held
+    )
+
+    return {'session_id': session_id, 'status': SeatStatus.on_hold, 'seat_ids': held}
+
+
+@router.post('/{session_id}/seats/best', response_model=SeatReservationPublic)
+async def hold_best_session_seats(
+        session_id: str,
+        party: BestSeatsRequest,
+        session: Session,
+        current_user: CurrentUser,
+        admission_token: Annotated[str | None, Header()] = None,
+):
+    await check_admission(session, session_id, admission_token, current_user)
+
+    seat_map = await seat_maps.get(session, session_id)
+    if not seat_map:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Session not found.')
+
+    # The map may lag behind other workers, a lost race marks the seats and retries
+    for _ in range(3):
+        block = seat_map.best_block(party.party_size, party.accessible)
+        if not block:
+            break
+
+        seat_ids = {seat.id for seat in block}
+        held = await hold_seats(session, session_id, current_user.id, seat_ids)
+
+        if len(held) == len(seat_ids):
+            await session.commit()
+            await audit_log.record(
+                'seats.held', 'session', session_id, current_user.id, seat_ids=held
+            )
+            return {
+                'session_id': session_id,
+                'status': SeatStatus.on_hold,
+                'seat_ids': [seat.id for seat in block],
+            }
+
+        await session.rollback()
+        for seat_id in seat_ids - set(held):
+            seat_map.take(seat_id)
+
+    raise HTTPException(
+        status_code=HTTPStatus.CONFLICT,
+        detail='No block of seats available for this party.',
+    )
+
+
+@router.post('/{session_id}/seats/confirm', response_model=SeatReservationPublic)
+async def confirm_session_seats(
+        session_id: str,
+        selection: SeatSelection,
+        session: Session,
+        current_user: CurrentUser,
+):
+    seat_ids = set(selection.seat_ids)
+    confirmed = await confirm_seats(session, session_id, current_user.id, seat_ids)
+
+    if len(confirmed) != len(seat_ids):
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Some seats are not on hold for this user or the hold expired.',
+        )
+
+    await session.commit()
+    await audit_log.record(
+        'seats.confirmed', 'session', session_id, current_user.id, seat_ids=confirmed
+    )
+
+    return {
+        'session_id': session_id,
+        'status': SeatStatus.confirmed,
+        'seat_ids': confirmed,
+    }
+
+
+@router.put('/{session_id}/queue', response_model=AdmissionQueuePublic)
+async def open_session_queue(
+        session_id: str,
+        queue: AdmissionQueueSchema,
+        session: Session,
+        current_user: CurrentUser,
+):
+    await get_owned_session(session_id, session, current_user)
+    await admission_queues.open(session, session_id, queue.rate_per_second)
+
+    state = admission_queues.get(session_id)
+
+    return {
+        'session_id': session_id,
+        'rate_per_second': state.rate,
+        'waiting': state.issued - state.advance(),
+    }
+
+
+@router.delete('/{session_id}/queue', response_model=dict)
+async def close_session_queue(
+        session_id: str, session: Session, current_user: CurrentUser
+):
+    await get_owned_session(session_id, session, current_user)
+    await admission_queues.close(session, session_id)
+
+    return {'msg': 'Session queue closed'}
+
+
+@router.post(
+    '/{session_id}/queue/tickets',
+    response_model=AdmissionTicketPublic,
+    status_code=HTTPStatus.CREATED,
+)
+async def join_session_queue(
+        session_id: str,
+        session: Session,
+        tenant_id: TenantId,
+        current_user: CurrentUser,
+):
+    no_queue = HTTPException(
+        status_code=HTTPStatus.NOT_FOUND, detail='Session has no queue.'
+    )
+    if not await admission_queues.is_gated(session, session_id, tenant_id):
+        raise no_queue
+
+    ticket = await admission_queues.join(session, session_id, current_user.id)
+    if not ticket:
+        raise no_queue
+
+    token, _ = ticket
+    waiting = await admission_queues.waiting(session, session_id, token)
+
+    return {
+        'token': token,
+        'session_id': session_id,
+        'waiting': waiting,
+        'admitted': waiting == 0,
+    }
+
+
+@router.get('/{session_id}/queue/tickets/{token}', response_model=AdmissionTicketPublic)
+async def get_session_queue_ticket(session_id: str, token: str, session: Session):
+    # Clients poll this while they wait, so it is answered from memory once
+    # the ticket has been read
+    waiting = await admission_queues.waiting(session, session_id, token)
+
+    if waiting is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Ticket not found.')
+
+    return {
+        'token': token,
+        'session_id': session_id,
+        'waiting': waiting,
+        'admitted': waiting == 0,
+    }
+
+
+@router.put('/{session_id}/prices', response_model=list[SessionPriceSchema])
+async def set_session_prices(
+        session_id: str,
+        prices: SessionPrices,
+        session: Session,
+        current_user: CurrentUser,
+):
+    await get_owned_session(session_id, session, current_user)
+
+    if prices:
+        upsert = insert(SessionPrice).values([
+            {'session_id': session_id, 'category': price.category, 'price': price.price}
+            for price in prices
+        ])
+        await session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=['session_id', 'category'],
+                set_={'price': upsert.excluded.price, 'updated_at': func.now()},
+            )
+        )
+        await session.commit()
+
+    price_tables.invalidate(session_id)
+
+    return prices
+
+
+@router.post('/{session_id}/quote', response_model=SeatQuotePublic)
+async def quote_session_seats(
+        session_id: str, selection: SeatSelection, session: Session
+):
+    price_table = await price_tables.get(session, session_id)
+
+    if not price_table:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Session not found.')
+
+    try:
+        seats = price_table.quote(list(dict.fromkeys(selection.seat_ids)))
+    except KeyError:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Some seats are not in this session or have no price.',
+        )
+
+    return {
+        'session_id': session_id,
+        'total': sum((price for _, _, price in seats), Decimal(0)),
+        'seats': [
+            {'seat_id': seat_id, 'category': category, 'price': price}
+            for seat_id, category, price in seats
+        ],
+    }
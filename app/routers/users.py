@@ -2,19 +2,28 @@ from http import HTTPStatus
 from typing import Annotated
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_session
-from app.models import User
-from app.schemas import UserPublic, UserSchema, UserUpdate
-from app.security import get_password_hash
+from app.database import get_session, get_tenant_id
+from app.history import decode_cursor, reservation_histories
+from app.models import RefreshToken, User
+from app.responses import USER_LIST, AdaptedJSONResponse
+from app.schemas import ReservationHistory, UserPublic, UserSchema, UserUpdate
+from app.security import (
+    TokenUser,
+    get_password_hash,
+    revoke_sessions,
+    revoked_sessions,
+)
 from app.routers.auth import get_current_user
 
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+TenantId = Annotated[str, Depends(get_tenant_id)]
+CurrentUser = Annotated[TokenUser, Depends(get_current_user)]
 
 router = APIRouter(prefix='/users', tags=['users'])
 
@@ -42,7 +51,29 @@ async def create_user(user: UserSchema, session: Session):
 
 @router.get('/', response_model=list[UserPublic])
 async def get_users(session: Session):
-    return await session.scalars(select(User))
+    users = await session.scalars(select(User))
+
+    return AdaptedJSONResponse(USER_LIST, users.all())
+
+
+@router.get('/me/reservations', response_model=ReservationHistory)
+async def get_my_reservations(
+        session: Session,
+        tenant_id: TenantId,
+        current_user: CurrentUser,
+        limit: Annotated[int, Query(gt=0, le=100)] = 20,
+        cursor: str | None = None,
+):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor.')
+
+    page = await reservation_histories.get_page(
+        session, current_user.id, tenant_id, limit, after
+    )
+
+    return Response(content=page, media_type='application/json')
 
 
 @router.get('/{user_id}', response_model=UserPublic)
@@ -77,7 +108,15 @@ async def update_user(
             else:
                 setattr(db_user, key, value)
 
+        # Whoever held the old password loses their refresh tokens as well
+        families = set()
+        if user.password:
+            families = await revoke_sessions(
+                session, RefreshToken.user_id == db_user.id
+            )
+
         await session.commit()
+        revoked_sessions.extend(families)
         await session.refresh(db_user)
 
         return db_user
@@ -90,16 +129,26 @@ async def update_user(
 
 @router.delete('/{user_id}', response_model=dict)
 async def delete_user(user_id: str, session: Session, current_user: CurrentUser):
-    db_user = await session.scalar(
-        select(User).where(User.id == user_id)
-    )
+    # Before the user goes, its refresh tokens are kept revoked until they expire
+    families = await revoke_sessions(session, RefreshToken.user_id == user_id)
 
-    if not db_user:
+    try:
+        deleted = await session.scalar(
+            delete(User).where(User.id == user_id).returning(User.id)
+        )
+
+    except IntegrityError:
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='User still owns movies, sessions or cinema rooms.',
+        )
+
+    if not deleted:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='User does not exist.'
         )
 
-    await session.delete(db_user)
     await session.commit()
+    revoked_sessions.extend(families)
 
     return {'msg': 'user deleted'}
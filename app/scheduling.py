@@ -0,0 +1,126 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, case, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models import Session as MovieSession
+from app.settings import Settings
+
+
+def naive_utc(moment: datetime) -> datetime:
+    # Session times are stored in timestamp columns, without a time zone
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def room_time(runtime_minutes: int) -> timedelta:
+    """How long a session takes its room, cleaning after the movie included."""
+    return timedelta(minutes=runtime_minutes + Settings().SESSION_CLEANING_MINUTES)
+
+
+def find_overlaps(
+        intervals: list[tuple[str, datetime, datetime, int | None]],
+) -> list[tuple[int | None, int | None]]:
+    """Overlapping pairs among (room, start, end, entry) intervals.
+
+    Intervals are sorted per room and swept once, keeping the one that ends
+    last; entry is the index in the request, None for stored sessions.
+    """
+    rooms = defaultdict(list)
+    for cinema_room_id, start, end, entry in intervals:
+        rooms[cinema_room_id].append((start, end, entry))
+
+    overlaps = []
+    for room_intervals in rooms.values():
+        room_intervals.sort(key=lambda interval: interval[:2])
+        latest_end, latest_entry = None, None
+        for start, end, entry in room_intervals:
+            if latest_end is not None and start < latest_end:
+                if entry is not None or latest_entry is not None:
+                    overlaps.append((latest_entry, entry))
+            if latest_end is None or end > latest_end:
+                latest_end, latest_entry = end, entry
+
+    return overlaps
+
+
+async def scheduled_intervals(
+        session: AsyncSession,
+        cinema_room_ids: set[str],
+        start: datetime,
+        end: datetime,
+) -> list[tuple[str, datetime, datetime, None]]:
+    stored = await session.execute(
+        select(
+            MovieSession.cinema_room_id,
+            MovieSession.session_time,
+            MovieSession.ends_at,
+        ).where(
+            MovieSession.cinema_room_id.in_(cinema_room_ids),
+            MovieSession.session_time < end,
+            MovieSession.ends_at > start,
+        )
+    )
+
+    return [(room, starts, ends, None) for room, starts, ends in stored]
+
+
+async def reschedule_movie_sessions(
+        session: AsyncSession, movie_id: str, runtime_minutes: int
+) -> list[str]:
+    """Move the end of the movie's sessions yet to start to a new runtime.
+
+    Left uncommitted, so it goes with the runtime change. A longer runtime
+    running into the next session of a room fails the exclusion constraint,
+    `overlapping_sessions` tells which sessions collide.
+    """
+    rescheduled = await session.scalars(
+        update(MovieSession)
+        .where(
+            MovieSession.movie_id == movie_id,
+            MovieSession.session_time > naive_utc(datetime.now(tz=timezone.utc)),
+        )
+        .values(ends_at=MovieSession.session_time + room_time(runtime_minutes))
+        .returning(MovieSession.id)
+    )
+    return list(rescheduled)
+
+
+async def overlapping_sessions(
+        session: AsyncSession, movie_id: str, runtime_minutes: int
+) -> list[tuple[str, str]]:
+    """(earlier, later) pairs of sessions sharing a room at the same time.
+
+    Counted as if `reschedule_movie_sessions` had moved the movie's sessions
+    to `runtime_minutes`, so it can explain why the constraint refused it.
+    """
+    now = naive_utc(datetime.now(tz=timezone.utc))
+
+    def rescheduled(movie_session):
+        return and_(
+            movie_session.movie_id == movie_id, movie_session.session_time > now
+        )
+
+    earlier, later = aliased(MovieSession), aliased(MovieSession)
+    earlier_ends_at = case(
+        (rescheduled(earlier), earlier.session_time + room_time(runtime_minutes)),
+        else_=earlier.ends_at,
+    )
+    overlaps = await session.execute(
+        select(earlier.id, later.id)
+        .join(
+            later,
+            and_(
+                later.cinema_room_id == earlier.cinema_room_id,
+                tuple_(later.session_time, later.id)
+                > tuple_(earlier.session_time, earlier.id),
+                later.session_time < earlier_ends_at,
+            ),
+        )
+        .where(or_(rescheduled(earlier), rescheduled(later)))
+        .order_by(earlier.session_time)
+    )
+    return [tuple(overlap) for overlap in overlaps]
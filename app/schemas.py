@@ -1,10 +1,13 @@
-from pydantic import BaseModel, EmailStr, field_validator
+from datetime import date, datetime
+from decimal import Decimal
+
+from typing import Annotated
+
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, field_validator
 from fastapi import Form, Request
-from uuid import uuid4
-from PIL import Image
 
 from app.context import request_context
-from app.models import SeatStatus
+from app.models import SeatCategory, SeatStatus
 
 
 class UserSchema(BaseModel):
@@ -29,6 +32,7 @@ class MovieSchema(BaseModel):
     title: str
     year: int
     genre: str
+    runtime_minutes: int = Field(gt=0)
 
 
 class MoviePublic(BaseModel):
@@ -36,6 +40,7 @@ class MoviePublic(BaseModel):
     title: str
     year: int
     genre: str
+    runtime_minutes: int
     poster_path: str
     poster_url: str
 
@@ -47,10 +52,17 @@ class MoviePublic(BaseModel):
         return f'{request.base_url}{v}'
 
 
+class MovieSearchResults(BaseModel):
+    items: list[MoviePublic]
+    facets: dict[str, int]
+    next_cursor: str | None
+
+
 class MovieUpdate(BaseModel):
     title: str | None = None
     year: int | None = None
     genre: str | None = None
+    runtime_minutes: int | None = Field(default=None, gt=0)
 
 
 class CinemaRoomCompact(BaseModel):
@@ -76,11 +88,13 @@ def movie_form(
         title: str = Form(...),
         year: int = Form(...),
         genre: str = Form(...),
+        runtime_minutes: int = Form(...),
 ):
     return MovieSchema(
         title=title,
         year=year,
-        genre=genre
+        genre=genre,
+        runtime_minutes=runtime_minutes,
     )
 
 
@@ -88,24 +102,147 @@ def update_movie_form(
         title: str | None = Form(None),
         year: int | None = Form(None),
         genre: str | None = Form(None),
+        runtime_minutes: int | None = Form(None),
 ):
     return MovieUpdate(
         title=title if title and title != "string" and title.strip() else None,
         year=year if year and year != 0 else None,
-        genre=genre if genre and genre != "string" and genre.strip() else None
+        genre=genre if genre and genre != "string" and genre.strip() else None,
+        runtime_minutes=runtime_minutes if runtime_minutes else None,
     )
 
 
-def new_poster(poster, request, movie_id):
-    poster_id = str(uuid4())
 
-    poster_info = {
-        'poster_path' : f'./media/movies_posters/{poster_id}.png',
-        'poster_url' : f'movies/{movie_id}/poster',
-                    }
+class SeatSelection(BaseModel):
+    seat_ids: list[str] = Field(min_length=1)
+
+
+class SeatReservationPublic(BaseModel):
+    session_id: str
+    status: SeatStatus
+    seat_ids: list[str]
+
+
+class AdmissionQueueSchema(BaseModel):
+    rate_per_second: float = Field(gt=0)
+
+
+class AdmissionQueuePublic(BaseModel):
+    session_id: str
+    rate_per_second: float
+    waiting: int
+
+
+class AdmissionTicketPublic(BaseModel):
+    token: str
+    session_id: str
+    waiting: int
+    admitted: bool
+
+
+class BestSeatsRequest(BaseModel):
+    party_size: int = Field(gt=0, le=20)
+    accessible: bool = False
+
+
+class SessionPriceSchema(BaseModel):
+    category: SeatCategory
+    price: Decimal = Field(ge=0, max_digits=10, decimal_places=2)
+
+
+def unique_categories(prices: list[SessionPriceSchema]) -> list[SessionPriceSchema]:
+    # One upsert cannot touch the same row twice
+    categories = [price.category for price in prices]
+    if len(set(categories)) != len(categories):
+        raise ValueError('Each category can only be priced once.')
+    return prices
+
+
+SessionPrices = Annotated[
+    list[SessionPriceSchema], AfterValidator(unique_categories)
+]
+
+
+class SeatQuote(BaseModel):
+    seat_id: str
+    category: SeatCategory
+    price: Decimal
+
 
-    db_poster = Image.open(poster.file)
-    db_poster = db_poster.convert("RGB")
-    db_poster.save(poster_info['poster_path'], optimize=True, quality=90, format="PNG")
+class SeatQuotePublic(BaseModel):
+    session_id: str
+    total: Decimal
+    seats: list[SeatQuote]
 
-    return poster_info
+
+class ScheduleEntry(BaseModel):
+    movie_id: str
+    cinema_room_id: str
+    session_time: datetime
+
+
+class SessionPublic(BaseModel):
+    id: str
+    movie_id: str
+    cinema_room_id: str
+    session_time: datetime
+    ends_at: datetime
+
+
+class SessionOccupancy(BaseModel):
+    id: str
+    cinema_room_id: str
+    session_time: datetime
+    held_seats: int
+    confirmed_seats: int
+    free_seats: int
+
+
+class TenantSchema(BaseModel):
+    id: str = Field(pattern=r'^[a-z0-9][a-z0-9_-]*$')
+    name: str
+
+
+class AuditEventPublic(BaseModel):
+    id: str
+    kind: str
+    entity_type: str
+    entity_id: str
+    user_id: str | None
+    payload: dict
+    occurred_at: datetime
+
+
+class SalesTotals(BaseModel):
+    sessions: int
+    capacity: int
+    seats_sold: int
+    occupancy: float
+    revenue: Decimal
+
+
+class MovieSalesReport(SalesTotals):
+    movie_id: str
+    title: str
+
+
+class DailySalesReport(SalesTotals):
+    day: date
+
+
+class ReservationHistoryItem(BaseModel):
+    id: str
+    session_id: str
+    session_time: datetime
+    movie_id: str
+    movie_title: str
+    seat_id: str
+    seat_label: str
+    status: SeatStatus
+    expires_at: datetime | None
+    created_at: datetime
+
+
+class ReservationHistory(BaseModel):
+    items: list[ReservationHistoryItem]
+    next_cursor: str | None
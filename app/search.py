@@ -0,0 +1,180 @@
+import base64
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from sqlalchemy import func, literal_column, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Movie
+
+# Same expression as ix_movies_search_document, inlined so the planner uses it
+SEARCH_DOCUMENT = literal_column(
+    "to_tsvector('simple', movies.title || ' ' || movies.genre)"
+)
+WORD = re.compile(r'\w+')
+
+
+@dataclass(frozen=True)
+class MovieSearch:
+    tenant_id: str
+    q: str | None = None
+    genre: str | None = None
+    year_min: int | None = None
+    year_max: int | None = None
+    limit: int = 20
+    after: tuple[str, str] | None = None
+
+
+def encode_cursor(title: str, movie_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([title, movie_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """Raises ValueError on a cursor this module did not produce."""
+    try:
+        title, movie_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as error:
+        raise ValueError('Invalid cursor') from error
+
+    return str(title), str(movie_id)
+
+
+def escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class MovieSearchIndex:
+    """In-memory inverted index, for databases without tsvector/pg_trgm."""
+
+    def __init__(self):
+        self._movies: dict[str, tuple[str, str, str, int]] | None = None
+        self._postings: dict[str, set[str]] = {}
+
+    def invalidate(self):
+        self._movies = None
+
+    async def ensure(self, session: AsyncSession):
+        if self._movies is not None:
+            return
+
+        rows = await session.execute(
+            select(Movie.id, Movie.tenant_id, Movie.title, Movie.genre, Movie.year)
+        )
+        self._movies = {}
+        self._postings = {}
+        for movie_id, tenant_id, title, genre, year in rows:
+            self._movies[movie_id] = (tenant_id, title, genre, year)
+            for word in WORD.findall(f'{title} {genre}'.lower()):
+                self._postings.setdefault(word, set()).add(movie_id)
+
+    def _matches(self, q: str | None) -> set[str]:
+        if not q or not WORD.search(q):
+            return set(self._movies)
+
+        matches = None
+        for word in WORD.findall(q.lower()):
+            # Prefix match, like the trigram side of the Postgres search
+            postings = set().union(*(
+                ids for token, ids in self._postings.items() if token.startswith(word)
+            ))
+            matches = postings if matches is None else matches & postings
+
+        return matches
+
+    def search(self, params: MovieSearch) -> tuple[list[str], dict[str, int]]:
+        facets = Counter()
+        hits = []
+        for movie_id in self._matches(params.q):
+            tenant_id, title, genre, year = self._movies[movie_id]
+            if tenant_id != params.tenant_id:
+                continue
+            if params.year_min is not None and year < params.year_min:
+                continue
+            if params.year_max is not None and year > params.year_max:
+                continue
+
+            facets[genre] += 1
+            if params.genre is not None and genre != params.genre:
+                continue
+            if params.after is not None and (title, movie_id) <= params.after:
+                continue
+
+            hits.append((title, movie_id))
+
+        hits.sort()
+        return [movie_id for _, movie_id in hits[: params.limit + 1]], dict(facets)
+
+
+movie_search_index = MovieSearchIndex()
+
+
+async def search_movies(
+        session: AsyncSession, params: MovieSearch
+) -> tuple[list[Movie], dict[str, int], str | None]:
+    if session.bind.dialect.name == 'postgresql':
+        movies, facets = await _search_postgres(session, params)
+    else:
+        movies, facets = await _search_in_memory(session, params)
+
+    next_cursor = None
+    if len(movies) > params.limit:
+        movies = movies[: params.limit]
+        next_cursor = encode_cursor(movies[-1].title, movies[-1].id)
+
+    return movies, facets, next_cursor
+
+
+async def _search_postgres(
+        session: AsyncSession, params: MovieSearch
+) -> tuple[list[Movie], dict[str, int]]:
+    filters = [Movie.tenant_id == params.tenant_id]
+    if params.q:
+        filters.append(
+            or_(
+                SEARCH_DOCUMENT.op('@@')(
+                    func.websearch_to_tsquery('simple', params.q)
+                ),
+                Movie.title.ilike(f'%{escape_like(params.q)}%', escape='\\'),
+            )
+        )
+    if params.year_min is not None:
+        filters.append(Movie.year >= params.year_min)
+    if params.year_max is not None:
+        filters.append(Movie.year <= params.year_max)
+
+    facets = await session.execute(
+        select(Movie.genre, func.count()).where(*filters).group_by(Movie.genre)
+    )
+
+    if params.genre is not None:
+        filters.append(Movie.genre == params.genre)
+    if params.after is not None:
+        filters.append(tuple_(Movie.title, Movie.id) > params.after)
+
+    movies = await session.scalars(
+        select(Movie)
+        .where(*filters)
+        .order_by(Movie.title, Movie.id)
+        .limit(params.limit + 1)
+    )
+
+    return list(movies), dict(facets.all())
+
+
+async def _search_in_memory(
+        session: AsyncSession, params: MovieSearch
+) -> tuple[list[Movie], dict[str, int]]:
+    await movie_search_index.ensure(session)
+    movie_ids, facets = movie_search_index.search(params)
+
+    if not movie_ids:
+        return [], facets
+
+    movies = {
+        movie.id: movie
+        for movie in await session.scalars(select(Movie).where(Movie.id.in_(movie_ids)))
+    }
+
+    return [movies[movie_id] for movie_id in movie_ids if movie_id in movies], facets
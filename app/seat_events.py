@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import psycopg
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as SyncSession
+
+from app.models import SeatStatus
+from app.settings import Settings
+
+logger = logging.getLogger('uvicorn.error')
+
+# pg_notify payloads are capped at 8000 bytes, so commits are split in chunks
+NOTIFY_CHUNK_SIZE = 40
+
+
+class Subscription:
+    def __init__(self, session_id: str, maxsize: int):
+        self.session_id = session_id
+        self.queue: asyncio.Queue[dict | None] = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class SeatEventBroker:
+    """Fans seat status changes out to every watcher of a Session.
+
+    Handlers only stage events on their db session; they are dispatched after
+    the commit, either locally or through LISTEN/NOTIFY when the bridge is on,
+    so a rolled back hold never reaches the watchers.
+    """
+
+    def __init__(self, queue_size: int, bridged: bool, channel: str):
+        self.queue_size = queue_size
+        self.bridged = bridged
+        self.channel = channel
+        self._subscribers: dict[str, set[Subscription]] = defaultdict(set)
+        self._listeners: list[Callable[[list[dict]], None]] = []
+
+    def subscribe(self, session_id: str) -> Subscription:
+        subscription = Subscription(session_id, self.queue_size)
+        self._subscribers[session_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        watchers = self._subscribers.get(subscription.session_id)
+        if watchers is None:
+            return
+
+        watchers.discard(subscription)
+        if not watchers:
+            del self._subscribers[subscription.session_id]
+
+    def watchers(self, session_id: str) -> int:
+        return len(self._subscribers.get(session_id, ()))
+
+    def add_listener(self, listener: Callable[[list[dict]], None]):
+        self._listeners.append(listener)
+
+    def dispatch(self, events: list[dict]):
+        for listener in self._listeners:
+            listener(events)
+
+        for seat_event in events:
+            watchers = self._subscribers.get(seat_event['session_id'])
+            if not watchers:
+                continue
+
+            for subscription in list(watchers):
+                try:
+                    subscription.queue.put_nowait(seat_event)
+                except asyncio.QueueFull:
+                    self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        # A slow consumer loses its buffer and gets a sentinel to close the stream
+        self.unsubscribe(subscription)
+        subscription.overflowed = True
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def stage(self, db_session: AsyncSession, events: list[dict]):  # noqa: PLR6301
+        db_session.info.setdefault('seat_events', []).extend(events)
+
+
+seat_event_broker = SeatEventBroker(
+    queue_size=Settings().SEAT_EVENTS_QUEUE_SIZE,
+    bridged=Settings().SEAT_EVENTS_BRIDGE,
+    channel=Settings().SEAT_EVENTS_CHANNEL,
+)
+
+
+def seat_event(session_id: str, seat_id: str, status: SeatStatus) -> dict:
+    return {
+        'session_id': session_id,
+        'seat_id': seat_id,
+        'status': status.value,
+        'at': datetime.now(tz=ZoneInfo('UTC')).isoformat(),
+    }
+
+
+@event.listens_for(SyncSession, 'before_commit')
+def _notify_staged_events(session):
+    events = session.info.get('seat_events')
+    if not events or not seat_event_broker.bridged:
+        return
+
+    for start in range(0, len(events), NOTIFY_CHUNK_SIZE):
+        payload = json.dumps(events[start : start + NOTIFY_CHUNK_SIZE])
+        session.execute(select(func.pg_notify(seat_event_broker.channel, payload)))
+
+
+@event.listens_for(SyncSession, 'after_commit')
+def _dispatch_staged_events(session):
+    events = session.info.pop('seat_events', None)
+    if events and not seat_event_broker.bridged:
+        seat_event_broker.dispatch(events)
+
+
+@event.listens_for(SyncSession, 'after_rollback')
+def _discard_staged_events(session):
+    session.info.pop('seat_events', None)
+
+
+async def listen_seat_events():
+    """Single LISTEN connection per worker, feeding the in-process broker."""
+    url = make_url(Settings().DATABASE_URL).set(drivername='postgresql')
+    dsn = url.render_as_string(hide_password=False)
+
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(
+                dsn, autocommit=True
+            ) as conn:
+                await conn.execute(f'LISTEN "{seat_event_broker.channel}"')
+                async for notify in conn.notifies():
+                    seat_event_broker.dispatch(json.loads(notify.payload))
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception:
+            logger.exception('Seat events listener lost connection, retrying...')
+            await asyncio.sleep(1)
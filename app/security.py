@@ -1,4 +1,10 @@
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from uuid import uuid4
 from zoneinfo import ZoneInfo
 from typing import Annotated
 from http import HTTPStatus
@@ -8,12 +14,14 @@ from jwt import encode, decode, DecodeError
 from pwdlib import PasswordHash
 from fastapi import Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select, update
 from fastapi.security import OAuth2PasswordBearer
 
 from app.settings import Settings
-from app.database import get_session
-from app.models import User
+from app.database import engine
+from app.models import RefreshToken, User
+
+logger = logging.getLogger('uvicorn.error')
 
 
 pwd_context = PasswordHash.recommended()
@@ -22,7 +30,65 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 Token = Annotated[str, Depends(oauth2_scheme)]
-Session = Annotated[AsyncSession, Depends(get_session)]
+
+
+@dataclass(frozen=True)
+class TokenUser:
+    """The caller as stated by a verified access token, not loaded from the DB."""
+
+    id: str
+    email: str
+
+
+class RevocationList:
+    """Refresh token families revoked in the database, held in memory.
+
+    Access tokens carry their family as `sid`, so a logout or a detected
+    refresh token reuse cuts them off within one sync, without a query per
+    request. A family is forgotten once its last refresh token has expired.
+    """
+
+    def __init__(self):
+        self._families: dict[str, float] = {}
+
+    def __contains__(self, family_id: str) -> bool:
+        deadline = self._families.get(family_id)
+        return deadline is not None and deadline > time.monotonic()
+
+    def add(self, family_id: str, ttl: float):
+        self._families[family_id] = time.monotonic() + ttl
+
+    def extend(self, families: Iterable[str]):
+        """Add families revoked here, for as long as a refresh token lives."""
+        ttl = timedelta(days=Settings().REFRESH_TOKEN_EXPIRE_DAYS).total_seconds()
+        for family_id in families:
+            self.add(family_id, ttl)
+
+    async def sync(self, session: AsyncSession):
+        rows = await session.execute(
+            select(
+                RefreshToken.family_id,
+                func.extract('epoch', func.max(RefreshToken.expires_at) - func.now()),
+            )
+            .where(
+                RefreshToken.revoked_at.is_not(None),
+                RefreshToken.expires_at > func.now(),
+            )
+            .group_by(RefreshToken.family_id)
+        )
+
+        # Merged, a revocation added here may not be visible to this query yet
+        now = time.monotonic()
+        families = {
+            family_id: deadline
+            for family_id, deadline in self._families.items()
+            if deadline > now
+        }
+        families.update((family_id, now + float(ttl)) for family_id, ttl in rows)
+        self._families = families
+
+
+revoked_sessions = RevocationList()
 
 
 def get_password_hash(password: str):
@@ -37,7 +103,7 @@ def create_access_token(data: dict):
     expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
         minutes = Settings().ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": "access"})
     encoded_jwt = jwt.encode(
         to_encode, Settings().SECRET_KEY, Settings().ALGORITHM
     )
@@ -45,7 +111,111 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-async def get_current_user(token: Token, session: Session):
+async def issue_tokens(
+        session: AsyncSession, user: User, family_id: str | None = None
+) -> dict:
+    """A new access and refresh token pair, starting a family unless given one.
+
+    The refresh token row is inserted in the session's transaction, the
+    caller commits.
+    """
+    token_id = str(uuid4())
+    family_id = family_id or str(uuid4())
+    lifetime = timedelta(days=Settings().REFRESH_TOKEN_EXPIRE_DAYS)
+
+    await session.execute(
+        insert(RefreshToken).values(
+            id=token_id,
+            user_id=user.id,
+            family_id=family_id,
+            expires_at=func.now() + lifetime,
+        )
+    )
+
+    refresh_token = jwt.encode(
+        {
+            'sub': user.id,
+            'jti': token_id,
+            'sid': family_id,
+            'type': 'refresh',
+            'exp': datetime.now(tz=ZoneInfo('UTC')) + lifetime,
+        },
+        Settings().SECRET_KEY,
+        Settings().ALGORITHM,
+    )
+
+    return {
+        'access_token': create_access_token(
+            data={'sub': user.email, 'uid': user.id, 'sid': family_id}
+        ),
+        'refresh_token': refresh_token,
+        'token_type': 'bearer',
+    }
+
+
+def decode_refresh_token(token: str) -> dict:
+    """Raises jwt.InvalidTokenError on anything but a valid refresh token."""
+    payload = jwt.decode(token, Settings().SECRET_KEY, Settings().ALGORITHM)
+    if payload.get('type') != 'refresh' or not payload.get('jti'):
+        raise jwt.InvalidTokenError('Not a refresh token')
+
+    return payload
+
+
+async def rotate_refresh_token(session: AsyncSession, payload: dict) -> User | None:
+    """Spend a refresh token, returning its user, or None if it was not live.
+
+    Presenting a token that was already rotated means it leaked, so its whole
+    family is revoked and every token issued from it stops working.
+    """
+    if payload['sid'] in revoked_sessions:
+        return None
+
+    user = await session.scalar(
+        update(RefreshToken)
+        .where(
+            RefreshToken.id == payload['jti'],
+            RefreshToken.rotated_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > func.now(),
+            RefreshToken.user_id == User.id,
+        )
+        .values(rotated_at=func.now())
+        .returning(User)
+        .execution_options(synchronize_session=False)
+    )
+
+    if user is None:
+        await revoke_session(session, payload['sid'])
+
+    return user
+
+
+async def revoke_sessions(session: AsyncSession, *criteria) -> set[str]:
+    """Revoke the refresh token families matching `criteria`, uncommitted.
+
+    Pass the returned families to `revoked_sessions.extend` after the commit,
+    other workers pick them up on their next sync.
+    """
+    return set(
+        await session.scalars(
+            update(RefreshToken)
+            .where(*criteria, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .returning(RefreshToken.family_id)
+        )
+    )
+
+
+async def revoke_session(session: AsyncSession, family_id: str):
+    """Revoke a refresh token family and the access tokens issued from it."""
+    await revoke_sessions(session, RefreshToken.family_id == family_id)
+    await session.commit()
+
+    revoked_sessions.extend([family_id])
+
+
+async def get_current_user(token: Token) -> TokenUser:
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
@@ -56,7 +226,8 @@ async def get_current_user(token: Token, session: Session):
         payload = jwt.decode(token, Settings().SECRET_KEY, Settings().ALGORITHM)
 
         username= payload.get("sub")
-        if not username:
+        user_id = payload.get("uid")
+        if not username or not user_id or payload.get("type") != "access":
             raise credentials_exception
 
     except (jwt.ExpiredSignatureError,
@@ -64,9 +235,23 @@ async def get_current_user(token: Token, session: Session):
             jwt.InvalidTokenError):
         raise credentials_exception
 
-    user = await session.scalar(select(User).where(User.email == username))
-
-    if not user:
+    if payload.get("sid") in revoked_sessions:
         raise credentials_exception
 
-    return user
+    return TokenUser(id=user_id, email=username)
+
+
+async def run_revocation_sync(interval: float):
+    while True:
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                await revoked_sessions.sync(session)
+                await session.execute(
+                    delete(RefreshToken).where(RefreshToken.expires_at < func.now())
+                )
+                await session.commit()
+
+        except Exception:
+            logger.exception('Could not sync revoked refresh tokens')
+
+        await asyncio.sleep(interval)
@@ -7,4 +7,69 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     ALGORITHM: str
-    SECRET_KEY: str
\ No newline at end of file
+    SECRET_KEY: str
+
+    SEAT_EVENTS_BRIDGE: bool = False
+    SEAT_EVENTS_CHANNEL: str = 'seat_events'
+    SEAT_EVENTS_QUEUE_SIZE: int = 256
+    SEAT_EVENTS_KEEPALIVE_SECONDS: int = 15
+
+    SEAT_HOLD_MINUTES: int = 10
+
+    ADMISSION_SYNC_SECONDS: int = 5
+    ADMISSION_TICKET_TTL_SECONDS: int = 600
+
+    ALLOCATION_MAP_TTL_SECONDS: int = 30
+
+    PRICE_TABLE_TTL_SECONDS: int = 60
+
+    SESSION_CLEANING_MINUTES: int = 15
+
+    POSTER_STORAGE: str = 'local'
+    POSTER_ROOT: str = './media/movies_posters'
+    POSTER_S3_BUCKET: str = 'posters'
+    POSTER_S3_PREFIX: str = ''
+    POSTER_S3_ENDPOINT_URL: str | None = None
+    POSTER_GC_INTERVAL_SECONDS: int = 3600
+    POSTER_GC_GRACE_MINUTES: int = 60
+
+    ADMIN_EMAILS: list[str] = []
+
+    QUERY_LOG_ENABLED: bool = False
+    QUERY_LOG_SLOW_MS: float = 200
+    QUERY_LOG_BUFFER_SIZE: int = 500
+    QUERY_LOG_MAX_FINGERPRINTS: int = 1000
+    QUERY_LOG_EXPLAIN: bool = True
+    QUERY_LOG_DUMP_PATH: str = './query_log.json'
+
+    HOLD_EXPIRY_SECONDS: int = 15
+    SEAT_COUNTER_RECONCILE_SECONDS: int = 86400
+
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_MS: int = 200
+    AUDIT_ENQUEUE_TIMEOUT_MS: int = 20
+
+    DEFAULT_TENANT: str = 'default'
+    TENANT_SCHEMAS: dict[str, str] = {}
+    TENANT_POOL_SIZE: int = 5
+    TENANT_RELOAD_SECONDS: float = 1
+
+    SALES_REPORT_REFRESH_SECONDS: int = 300
+    SALES_REPORT_OVERLAP_SECONDS: int = 60
+
+    RESERVATION_HISTORY_CACHE_SIZE: int = 10000
+
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 5
+
+    LOAD_SHED_POOL_WAIT_MS: float = 250
+    LOAD_SHED_LOOP_LAG_MS: float = 200
+    LOAD_SHED_LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+    LOAD_SHED_COOLDOWN_SECONDS: float = 5
+    LOAD_SHED_BOOKING_CONCURRENCY: int = 8
+    LOAD_SHED_BOOKING_QUEUE_SIZE: int = 64
+    LOAD_SHED_BOOKING_WAIT_SECONDS: float = 2
+    LOAD_SHED_CATALOG_CACHE_SIZE: int = 1000
+
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    REVOCATION_SYNC_SECONDS: int = 5
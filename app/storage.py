@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Iterator
+from datetime import timedelta
+from typing import BinaryIO, Protocol
+
+from PIL import Image
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.database import engine
+from app.models import PosterBlob
+from app.settings import Settings
+
+logger = logging.getLogger('uvicorn.error')
+
+# First key of the per blob pg_advisory_xact_lock, the second is hashtext(key)
+BLOB_LOCK = 0x9057E4
+
+
+def blob_key(data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    # Two levels of 256 directories keep each listing small
+    return f'{digest[:2]}/{digest[2:4]}/{digest}.png'
+
+
+def encode_poster(file: BinaryIO) -> bytes:
+    poster = Image.open(file).convert('RGB')
+    buffer = io.BytesIO()
+    poster.save(buffer, optimize=True, quality=90, format='PNG')
+    return buffer.getvalue()
+
+
+class BlobBackend(Protocol):
+    def exists(self, key: str) -> bool: ...
+
+    def write(self, key: str, data: bytes): ...
+
+    def read(self, key: str) -> bytes: ...
+
+    def delete(self, key: str): ...
+
+    def list(self) -> Iterator[tuple[str, float]]: ...
+
+    def local_path(self, key: str) -> str | None: ...
+
+
+class LocalBackend:
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.local_path(key))
+
+    def write(self, key: str, data: bytes):
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Readers never see a half written poster
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+
+    def read(self, key: str) -> bytes:
+        with open(self.local_path(key), 'rb') as blob:
+            return blob.read()
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self) -> Iterator[tuple[str, float]]:
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                yield os.path.relpath(path, self.root), os.path.getmtime(path)
+
+
+class S3Backend:
+    """Any client with the boto3 S3 object API works, MinIO included."""
+
+    def __init__(self, client, bucket: str, prefix: str = ''):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def local_path(self, key: str) -> None:  # noqa: PLR6301
+        return None
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except Exception:
+            return False
+        return True
+
+    def write(self, key: str, data: bytes):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=data,
+            ContentType='image/png',
+        )
+
+    def read(self, key: str) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        return response['Body'].read()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def list(self) -> Iterator[tuple[str, float]]:
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for blob in page.get('Contents', []):
+                yield (
+                    blob['Key'].removeprefix(self.prefix),
+                    blob['LastModified'].timestamp(),
+                )
+
+
+class PosterStore:
+    """Content addressed posters, shared between movies and reference counted.
+
+    Counts live in poster_blobs and change in the movie's transaction. Blobs
+    are only removed by `collect_garbage`, after a grace period, so a poster
+    re-uploaded right after its last movie was deleted is never lost.
+
+    Saves and releases hold a shared advisory lock on the blob until their
+    transaction ends, the garbage collection an exclusive one while it checks
+    and deletes it. A save either waits for the blob to be gone and writes it
+    again, or has referenced it by the time the collection looks.
+    """
+
+    def __init__(self, backend: BlobBackend):
+        self.backend = backend
+
+    @staticmethod
+    async def lock(session: AsyncSession, key: str, shared: bool = True):
+        lock = (
+            func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+        )
+        await session.execute(select(lock(BLOB_LOCK, func.hashtext(key))))
+
+    async def save(self, session: AsyncSession, file: BinaryIO) -> str:
+        data = await run_in_threadpool(encode_poster, file)
+        key = blob_key(data)
+
+        await self.lock(session, key)
+        upsert = insert(PosterBlob).values(key=key, size=len(data), ref_count=1)
+        await session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=['key'],
+                set_={
+                    'ref_count': PosterBlob.ref_count + 1,
+                    'updated_at': func.now(),
+                },
+            )
+        )
+
+        if not await run_in_threadpool(self.backend.exists, key):
+            await run_in_threadpool(self.backend.write, key, data)
+
+        return key
+
+    async def release(self, session: AsyncSession, key: str):
+        # Same lock order as the collection, blob lock before the row lock
+        await self.lock(session, key)
+        await session.execute(
+            update(PosterBlob)
+            .where(PosterBlob.key == key, PosterBlob.ref_count > 0)
+            .values(ref_count=PosterBlob.ref_count - 1, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+    async def collect_garbage(self, session: AsyncSession, grace: timedelta) -> int:
+        orphans = set(
+            await session.scalars(
+                select(PosterBlob.key).where(
+                    PosterBlob.ref_count == 0,
+                    PosterBlob.updated_at < func.now() - grace,
+                )
+            )
+        )
+
+        # Blobs written by requests that never committed have no row at all
+        known = set(await session.scalars(select(PosterBlob.key)))
+        cutoff = time.time() - grace.total_seconds()
+        stored = await run_in_threadpool(lambda: list(self.backend.list()))
+        orphans.update(
+            key for key, modified_at in stored
+            if key not in known and modified_at < cutoff
+        )
+        await session.commit()
+
+        removed = 0
+        for key in orphans:
+            removed += await self.remove_orphan(session, key, grace)
+
+        return removed
+
+    async def remove_orphan(
+            self, session: AsyncSession, key: str, grace: timedelta
+    ) -> bool:
+        """Delete a blob and its row, unless a save referenced it meanwhile."""
+        await self.lock(session, key, shared=False)
+
+        deleted = await session.scalar(
+            delete(PosterBlob)
+            .where(
+                PosterBlob.key == key,
+                PosterBlob.ref_count == 0,
+                PosterBlob.updated_at < func.now() - grace,
+            )
+            .returning(PosterBlob.key)
+        )
+        if deleted is None and await session.scalar(
+            select(PosterBlob.key).where(PosterBlob.key == key)
+        ):
+            await session.rollback()
+            return False
+
+        await run_in_threadpool(self.backend.delete, key)
+        await session.commit()
+
+        return True
+
+
+def build_backend(settings: Settings) -> BlobBackend:
+    if settings.POSTER_STORAGE == 's3':
+        import boto3  # noqa: PLC0415
+
+        client = boto3.client('s3', endpoint_url=settings.POSTER_S3_ENDPOINT_URL)
+        return S3Backend(client, settings.POSTER_S3_BUCKET, settings.POSTER_S3_PREFIX)
+
+    return LocalBackend(settings.POSTER_ROOT)
+
+
+poster_store = PosterStore(build_backend(Settings()))
+
+
+async def run_poster_garbage_collection(interval: float, grace: timedelta):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                removed = await poster_store.collect_garbage(session, grace)
+            if removed:
+                logger.info('Removed %s orphan posters', removed)
+
+        except Exception:
+            logger.exception('Poster garbage collection failed')
@@ -0,0 +1,55 @@
+"""Best-available allocation over randomly fragmented occupancy.
+
+Run with `python -m benchmarks.allocation`.
+"""
+import random
+import time
+from string import ascii_uppercase
+
+from app.allocation import RoomLayout, SeatCell, SessionSeatMap
+
+ROWS = 20
+COLUMNS = 25
+ROUNDS = 2_000
+
+
+def build_layout() -> RoomLayout:
+    return RoomLayout([
+        SeatCell(
+            id=f'{ascii_uppercase[row]}{column}',
+            row=ascii_uppercase[row],
+            column=column,
+            is_aisle=column in {6, 7, 19, 20},
+            is_accessible=row == ROWS - 1,
+        )
+        for row in range(ROWS)
+        for column in range(1, COLUMNS + 1)
+    ])
+
+
+def main():
+    random.seed(42)
+    layout = build_layout()
+    seat_ids = list(layout.seat_row)
+
+    for occupancy in (0.25, 0.5, 0.75, 0.9):
+        timings = []
+        for _ in range(ROUNDS):
+            taken = random.sample(seat_ids, int(len(seat_ids) * occupancy))
+            seat_map = SessionSeatMap(layout, dict.fromkeys(taken))
+            party_size = random.randint(1, 6)
+
+            start = time.perf_counter()
+            seat_map.best_block(party_size)
+            timings.append(time.perf_counter() - start)
+
+        timings.sort()
+        print(
+            f'{len(seat_ids)} seats, {occupancy:.0%} taken: '
+            f'median {timings[len(timings) // 2] * 1e6:.1f}us, '
+            f'p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f}us'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Deleting a large cinema room against the configured database.
+
+Seeds a room with seats, sessions and a reservation for every seat of every
+session, then times the single DELETE that lets ON DELETE CASCADE do the rest.
+Run with `python -m benchmarks.cascade_delete`.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from string import ascii_uppercase
+from uuid import uuid4
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine
+from app.models import (
+    CinemaRoom,
+    Movie,
+    Seat,
+    SeatReservation,
+    SeatStatus,
+    User,
+)
+from app.models import Session as MovieSession
+from app.settings import Settings
+
+ROWS = 20
+COLUMNS = 25
+SESSIONS = 40
+
+
+async def seed(session: AsyncSession) -> tuple[str, str, str]:
+    user_id, movie_id, room_id = str(uuid4()), str(uuid4()), str(uuid4())
+    tenant_id = Settings().DEFAULT_TENANT
+
+    await session.execute(insert(User).values(
+        id=user_id, username=user_id, email=f'{user_id}@bench.local', password='-'
+    ))
+    await session.execute(insert(Movie).values(
+        id=movie_id, tenant_id=tenant_id, user_id=user_id, title=movie_id,
+        year=2026, genre='bench', runtime_minutes=90,
+        poster_path=movie_id, poster_url=movie_id,
+    ))
+    await session.execute(insert(CinemaRoom).values(
+        id=room_id, tenant_id=tenant_id, user_id=user_id, name=room_id,
+        total_seats=ROWS * COLUMNS,
+    ))
+
+    seats = [
+        {
+            'id': str(uuid4()), 'cinema_room_id': room_id,
+            'row': ascii_uppercase[row], 'column': column,
+            'is_aisle': False, 'is_accessible': False,
+        }
+        for row in range(ROWS)
+        for column in range(1, COLUMNS + 1)
+    ]
+    await session.execute(insert(Seat), seats)
+
+    start = datetime(2030, 1, 1)
+    sessions = [
+        {
+            'id': str(uuid4()), 'tenant_id': tenant_id, 'movie_id': movie_id,
+            'user_id': user_id,
+            'cinema_room_id': room_id,
+            'session_time': start + timedelta(hours=2 * index),
+            'ends_at': start + timedelta(hours=2 * index, minutes=105),
+        }
+        for index in range(SESSIONS)
+    ]
+    await session.execute(insert(MovieSession), sessions)
+
+    await session.execute(insert(SeatReservation), [
+        {
+            'id': str(uuid4()), 'user_id': user_id, 'session_id': movie_session['id'],
+            'seat_id': seat['id'], 'status': SeatStatus.confirmed,
+            'expires_at': start,
+        }
+        for movie_session in sessions
+        for seat in seats
+    ])
+    await session.commit()
+
+    return user_id, movie_id, room_id
+
+
+async def main():
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        user_id, movie_id, room_id = await seed(session)
+
+        started = time.perf_counter()
+        await session.execute(delete(CinemaRoom).where(CinemaRoom.id == room_id))
+        await session.commit()
+        elapsed = time.perf_counter() - started
+
+        await session.execute(delete(Movie).where(Movie.id == movie_id))
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+    print(
+        f'Deleted room with {ROWS * COLUMNS} seats, {SESSIONS} sessions and '
+        f'{ROWS * COLUMNS * SESSIONS} reservations in {elapsed * 1000:.1f}ms'
+    )
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""Default response path against AdaptedJSONResponse.
+
+The default path is what FastAPI's `serialize_response` does for a
+`response_model` under pydantic v2: validate the rows, dump them to
+JSON-compatible Python with `mode='json'`, then `JSONResponse` renders that
+with `json.dumps`. Run with `python -m benchmarks.serialization`.
+"""
+import time
+from string import ascii_uppercase
+from types import SimpleNamespace
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.context import request_context
+from app.responses import CINEMA_ROOM_FULL, MOVIE_LIST, AdaptedJSONResponse
+
+ROUNDS = 20
+
+
+def movies(count: int) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=f'movie-{index}',
+            title=f'Movie {index}',
+            year=1950 + index % 75,
+            genre='drama',
+            runtime_minutes=90 + index % 60,
+            poster_path=f'ab/cd/{index:064x}.png',
+            poster_url=f'movies/movie-{index}/poster',
+        )
+        for index in range(count)
+    ]
+
+
+def cinema_room(rows: int, columns: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id='room',
+        name='Room 1',
+        seats=[
+            SimpleNamespace(
+                row=ascii_uppercase[row],
+                column=column,
+                is_aisle=column in {1, columns},
+                is_accessible=row == 0,
+            )
+            for row in range(rows)
+            for column in range(1, columns + 1)
+        ],
+    )
+
+
+def default_path(adapter, content) -> bytes:
+    # Same calls as ModelField.validate and ModelField.serialize
+    validated = adapter.validate_python(content, from_attributes=True)
+    return JSONResponse(
+        adapter.dump_python(validated, mode='json', by_alias=True)
+    ).body
+
+
+def adapted_path(adapter, content) -> bytes:
+    return AdaptedJSONResponse(adapter, content).body
+
+
+def timed(render, adapter, content) -> float:
+    best = float('inf')
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        render(adapter, content)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    request_context.set(
+        Request({
+            'type': 'http',
+            'scheme': 'http',
+            'server': ('testserver', 80),
+            'path': '/',
+            'root_path': '',
+            'query_string': b'',
+            'headers': [],
+        })
+    )
+
+    payloads = [
+        ('10k movies', MOVIE_LIST, movies(10_000)),
+        ('500-seat room', CINEMA_ROOM_FULL, cinema_room(20, 25)),
+    ]
+    for name, adapter, content in payloads:
+        default_ms = timed(default_path, adapter, content)
+        adapted_ms = timed(adapted_path, adapter, content)
+        print(
+            f'{name}: default {default_ms:.2f}ms, adapted {adapted_ms:.2f}ms '
+            f'({default_ms / adapted_ms:.1f}x)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import factory
+import factory.fuzzy
+
+from app.models import (
+    AdmissionQueue,
+    AdmissionTicket,
+    AuditEvent,
+    CinemaRoom,
+    Movie,
+    PosterBlob,
+    RefreshToken,
+    Seat,
+    SeatCategory,
+    SeatReservation,
+    SeatStatus,
+    Session,
+    SessionPrice,
+    SessionSales,
+    Tenant,
+    User,
+)
+from app.scheduling import naive_utc
+
+DEFAULT_TENANT = 'default'
+
+
+class RoomChildFactory(factory.Factory):
+    """Models whose `cinema_room` relationship is not an __init__ argument.
+
+    The room is attached once the instance exists, so adding the instance to
+    a session saves a room that was only built along with it.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def _create(cls, model_class, *args, cinema_room, **kwargs):
+        instance = model_class(*args, cinema_room_id=cinema_room.id, **kwargs)
+        instance.cinema_room = cinema_room
+        return instance
+
+    @classmethod
+    def _build(cls, model_class, *args, **kwargs):
+        return cls._create(model_class, *args, **kwargs)
+
+
+class TenantFactory(factory.Factory):
+    class Meta:
+        model = Tenant
+
+    id = factory.Sequence(lambda n: f'tenant-{n}')
+    name = factory.Faker('company')
+
+
+class UserFactory(factory.Factory):
+    class Meta:
+        model = User
+
+    id = factory.Faker('uuid4')
+    username = factory.Sequence(lambda n: f'user{n}')
+    email = factory.LazyAttribute(lambda obj: f'{obj.username}@test.com')
+    password = factory.LazyAttribute(lambda obj: f'{obj.username}@example.com')
+
+
+class MovieFactory(factory.Factory):
+    class Meta:
+        model = Movie
+
+    id = factory.Faker('uuid4')
+    tenant_id = DEFAULT_TENANT
+    owner = factory.SubFactory(UserFactory)
+    user_id = factory.LazyAttribute(lambda obj: obj.owner.id)
+    title = factory.Sequence(lambda n: f'Movie {n}')
+    year = factory.fuzzy.FuzzyInteger(1950, 2026)
+    genre = factory.fuzzy.FuzzyChoice(['drama', 'comedy', 'horror', 'action'])
+    runtime_minutes = factory.fuzzy.FuzzyInteger(80, 180)
+    poster_path = factory.LazyAttribute(lambda obj: f'ab/cd/{obj.id}.png')
+    poster_url = factory.LazyAttribute(lambda obj: f'movies/{obj.id}/poster')
+
+
+class CinemaRoomFactory(factory.Factory):
+    class Meta:
+        model = CinemaRoom
+
+    # user_id has no default, it must reference a saved user
+    id = factory.Faker('uuid4')
+    tenant_id = DEFAULT_TENANT
+    name = factory.Sequence(lambda n: f'Room {n}')
+    total_seats = 0
+    premium_rows = factory.LazyFunction(list)
+
+
+class SeatFactory(RoomChildFactory):
+    class Meta:
+        model = Seat
+
+    # cinema_room has no default, seats are added to an existing room
+    id = factory.Faker('uuid4')
+    row = 'A'
+    column = factory.Sequence(lambda n: n + 1)
+    is_aisle = False
+    is_accessible = False
+
+
+class SessionFactory(RoomChildFactory):
+    class Meta:
+        model = Session
+
+    id = factory.Faker('uuid4')
+    tenant_id = DEFAULT_TENANT
+    movie = factory.SubFactory(MovieFactory)
+    creator = factory.LazyAttribute(lambda obj: obj.movie.owner)
+    cinema_room = factory.SubFactory(
+        CinemaRoomFactory, user_id=factory.SelfAttribute('..creator.id')
+    )
+    movie_id = factory.LazyAttribute(lambda obj: obj.movie.id)
+    user_id = factory.LazyAttribute(lambda obj: obj.creator.id)
+    session_time = factory.Sequence(
+        lambda n: datetime(2030, 1, 1) + timedelta(hours=4 * n)
+    )
+    ends_at = factory.LazyAttribute(
+        lambda obj: obj.session_time + timedelta(minutes=obj.movie.runtime_minutes)
+    )
+
+
+class SeatReservationFactory(factory.Factory):
+    class Meta:
+        model = SeatReservation
+
+    id = factory.Faker('uuid4')
+    session = factory.SubFactory(SessionFactory)
+    seat = factory.SubFactory(
+        SeatFactory, cinema_room=factory.SelfAttribute('..session.cinema_room')
+    )
+    user = factory.SubFactory(UserFactory)
+    user_id = factory.LazyAttribute(lambda obj: obj.user.id)
+    session_id = factory.LazyAttribute(lambda obj: obj.session.id)
+    seat_id = factory.LazyAttribute(lambda obj: obj.seat.id)
+    status = SeatStatus.on_hold
+    expires_at = factory.LazyFunction(
+        lambda: naive_utc(datetime.now(tz=ZoneInfo('UTC'))) + timedelta(minutes=10)
+    )
+
+
+# The models below have no relationships: pass the ids of rows already saved
+
+
+class AdmissionQueueFactory(factory.Factory):
+    class Meta:
+        model = AdmissionQueue
+
+    rate_per_second = 10.0
+    admitted_position = 0.0
+
+
+class AdmissionTicketFactory(factory.Factory):
+    class Meta:
+        model = AdmissionTicket
+
+    id = factory.Faker('uuid4')
+    position = factory.Sequence(lambda n: n + 1)
+
+
+class SessionPriceFactory(factory.Factory):
+    class Meta:
+        model = SessionPrice
+
+    category = SeatCategory.standard
+    price = Decimal('25.00')
+
+
+class PosterBlobFactory(factory.Factory):
+    class Meta:
+        model = PosterBlob
+
+    key = factory.Faker('sha256')
+    size = factory.fuzzy.FuzzyInteger(1_000, 500_000)
+    ref_count = 1
+
+
+class AuditEventFactory(factory.Factory):
+    class Meta:
+        model = AuditEvent
+
+    id = factory.Faker('uuid4')
+    kind = 'movie.created'
+    entity_type = 'movie'
+    entity_id = factory.Faker('uuid4')
+    user_id = None
+    payload = factory.LazyFunction(dict)
+    occurred_at = factory.LazyFunction(datetime.now)
+
+
+class SessionSalesFactory(factory.Factory):
+    class Meta:
+        model = SessionSales
+
+    tenant_id = DEFAULT_TENANT
+    day = factory.LazyFunction(lambda: datetime.now().date())
+    capacity = 100
+    seats_sold = 0
+    revenue = Decimal('0.00')
+    refreshed_at = factory.LazyFunction(datetime.now)
+
+
+class RefreshTokenFactory(factory.Factory):
+    class Meta:
+        model = RefreshToken
+
+    id = factory.Faker('uuid4')
+    family_id = factory.Faker('uuid4')
+    expires_at = factory.LazyFunction(
+        lambda: naive_utc(datetime.now(tz=ZoneInfo('UTC'))) + timedelta(days=14)
+    )
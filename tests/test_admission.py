@@ -0,0 +1,157 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import admission
+from app.admission import AdmissionQueues, sync_admission_queues
+from app.models import AdmissionQueue, AdmissionTicket
+from tests.factories import DEFAULT_TENANT, UserFactory
+
+
+@pytest.fixture
+def queues(session):
+    session.info['tenant_id'] = DEFAULT_TENANT
+    return AdmissionQueues(ticket_ttl=600)
+
+
+@pytest.fixture
+def other_worker():
+    return AdmissionQueues(ticket_ttl=600)
+
+
+async def move_cursor_back(session, seconds):
+    # now() is frozen inside the test's transaction, so age the cursor instead
+    await session.execute(
+        update(AdmissionQueue).values(
+            cursor_at=func.now() - timedelta(seconds=seconds)
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_join_twice_returns_the_same_ticket(session, queues, movie_session, user):
+    other = UserFactory()
+    session.add(other)
+    await queues.open(session, movie_session.id, rate=1)
+
+    token, position = await queues.join(session, movie_session.id, user.id)
+
+    assert await queues.join(session, movie_session.id, user.id) == (token, position)
+    assert (await queues.join(session, movie_session.id, other.id))[1] == position + 1
+
+
+@pytest.mark.asyncio
+async def test_workers_share_positions(
+        session, queues, other_worker, movie_session, user
+):
+    other = UserFactory()
+    session.add(other)
+    session_id = movie_session.id
+    await queues.open(session, session_id, rate=1)
+
+    assert await other_worker.is_gated(session, session_id, DEFAULT_TENANT)
+    token, position = await other_worker.join(session, session_id, user.id)
+    assert (await queues.join(session, session_id, other.id))[1] == position + 1
+    # Joining on another worker hands out the same ticket
+    assert await queues.join(session, session_id, user.id) == (token, position)
+
+    # Reopening on a worker that never saw the tickets keeps the positions
+    await AdmissionQueues(ticket_ttl=600).open(session, session_id, rate=2)
+    assert await session.scalar(select(AdmissionQueue.issued)) == position + 1
+
+
+@pytest.mark.asyncio
+async def test_join_keeps_memory_when_the_insert_fails(session, queues, movie_session):
+    session_id = movie_session.id
+    await queues.open(session, session_id, rate=1)
+
+    with pytest.raises(IntegrityError):
+        await queues.join(session, session_id, 'no-such-user')
+
+    state = queues.get(session_id)
+    assert state.tickets == {}
+    assert state.users == {}
+    assert state.issued == 0
+
+
+@pytest.mark.asyncio
+async def test_tickets_are_read_from_the_database(
+        session, queues, other_worker, movie_session, user
+):
+    session_id = movie_session.id
+    await queues.open(session, session_id, rate=1)
+    token, _ = await queues.join(session, session_id, user.id)
+
+    assert await other_worker.waiting(session, session_id, token) == 1
+
+    await move_cursor_back(session, 10)
+    await other_worker.sync(session)
+
+    assert await other_worker.is_admitted(session, session_id, token, user.id)
+    assert not await other_worker.is_admitted(session, session_id, token, 'other')
+    assert await other_worker.waiting(session, session_id, 'no-such-ticket') is None
+
+
+@pytest.mark.asyncio
+async def test_admitted_tickets_expire(session, queues, movie_session, user):
+    queues.ticket_ttl = 0
+    await queues.open(session, movie_session.id, rate=1000)
+    token, _ = await queues.join(session, movie_session.id, user.id)
+    await move_cursor_back(session, 10)
+
+    await queues.sync(session)
+
+    assert not await queues.is_admitted(session, movie_session.id, token, user.id)
+    assert await session.scalar(select(AdmissionTicket.id)) is None
+    # Joining again hands out a fresh ticket at the back of the queue
+    rejoined, _ = await queues.join(session, movie_session.id, user.id)
+    assert rejoined != token
+
+
+@pytest.mark.asyncio
+async def test_waiting_tickets_do_not_expire(session, queues, movie_session, user):
+    queues.ticket_ttl = 0
+    await queues.open(session, movie_session.id, rate=0.001)
+    token, _ = await queues.join(session, movie_session.id, user.id)
+
+    await queues.sync(session)
+
+    assert await queues.waiting(session, movie_session.id, token) == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_admission_queues_reports_failures(monkeypatch, engine):
+    monkeypatch.setattr(admission.tenant_engines, 'all', lambda: [(None, engine)])
+
+    async def failing_sync(session, schema=None):
+        raise ConnectionError
+
+    assert await sync_admission_queues() == set()
+    monkeypatch.setattr(admission.admission_queues, 'sync', failing_sync)
+    assert await sync_admission_queues() == {None}
+
+
+@pytest.mark.asyncio
+async def test_join_session_queue(client, token, movie_session):
+    headers = {'Authorization': f'Bearer {token}'}
+    url = f'/movies/sessions/sessions/{movie_session.id}/queue'
+
+    response = await client.post(f'{url}/tickets', headers=headers)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    response = await client.put(url, json={'rate_per_second': 1}, headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.post(f'{url}/tickets', headers=headers)
+    assert response.status_code == HTTPStatus.CREATED
+    ticket = response.json()
+    assert ticket['waiting'] == 1
+
+    response = await client.get(f'{url}/tickets/{ticket["token"]}')
+    assert response.json() == ticket
+
+    response = await client.delete(url, headers=headers)
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,44 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.fixture
+def best_seats(client, token, session_id):
+    async def post(**party):
+        return await client.post(
+            f'/movies/sessions/sessions/{session_id}/seats/best',
+            json=party,
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    return post
+
+
+@pytest.mark.asyncio
+async def test_best_seats_holds_a_block(best_seats, movie_session):
+    party_size = 3
+    columns = {seat.id: seat.column for seat in movie_session.cinema_room.seats}
+
+    response = await best_seats(party_size=party_size)
+
+    assert response.status_code == HTTPStatus.OK
+    held = sorted(columns[seat_id] for seat_id in response.json()['seat_ids'])
+    assert held == list(range(held[0], held[0] + party_size))
+
+
+@pytest.mark.asyncio
+async def test_best_seats_skips_taken_seats(best_seats, book, seat_ids):
+    await book('hold', seat_ids[2:4])
+
+    response = await best_seats(party_size=2)
+
+    assert response.status_code == HTTPStatus.OK
+    assert not set(response.json()['seat_ids']) & set(seat_ids[2:4])
+
+
+@pytest.mark.asyncio
+async def test_best_seats_for_a_party_too_large(best_seats, seat_ids):
+    response = await best_seats(party_size=len(seat_ids) + 1)
+
+    assert response.status_code == HTTPStatus.CONFLICT
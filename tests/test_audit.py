@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from app import audit
+from app.audit import AuditLog
+from app.models import AuditEvent
+
+
+@pytest.fixture
+def written():
+    """Entity ids of each batch written by the logs of `make_log`."""
+    return []
+
+
+@pytest.fixture
+def make_log(written):
+    """A fresh AuditLog, not the patched singleton, writing into `written`."""
+
+    def make(**options) -> AuditLog:
+        audit_log = AuditLog(
+            **{
+                'max_size': 10,
+                'batch_size': 2,
+                'flush_interval': 60,
+                'enqueue_timeout': 0.01,
+            }
+            | options
+        )
+
+        async def write(batch):
+            written.append([audit_event['entity_id'] for audit_event in batch])
+
+        audit_log._write = write
+        return audit_log
+
+    return make
+
+
+async def record(audit_log: AuditLog, *entity_ids: str):
+    for entity_id in entity_ids:
+        await audit_log.record('movie.updated', 'movie', entity_id)
+
+
+@pytest.mark.asyncio
+async def test_full_batches_are_written_at_once(make_log, written):
+    audit_log = make_log()
+    await record(audit_log, 'a', 'b', 'c')
+
+    audit_log.start()
+    await asyncio.sleep(0.05)
+
+    assert written == [['a', 'b']]
+    await audit_log.close()
+
+
+@pytest.mark.asyncio
+async def test_partial_batches_wait_for_the_flush_interval(make_log, written):
+    audit_log = make_log(batch_size=10, flush_interval=0.1)
+    audit_log.start()
+    await record(audit_log, 'a', 'b')
+
+    await asyncio.sleep(0.05)
+    assert written == []
+
+    await asyncio.sleep(0.1)
+    assert written == [['a', 'b']]
+    await audit_log.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_events_after_the_timeout(make_log, written):
+    audit_log = make_log(max_size=1)
+
+    await record(audit_log, 'a', 'b')
+
+    assert audit_log.dropped == 1
+    await audit_log.close()
+    assert written == [['a']]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_waits_for_room(make_log, written):
+    audit_log = make_log(max_size=1, enqueue_timeout=1)
+    await record(audit_log, 'a')
+
+    waiting = asyncio.create_task(record(audit_log, 'b'))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    audit_log.start()
+    await waiting
+
+    assert audit_log.dropped == 0
+    await audit_log.close()
+    assert sum(written, []) == ['a', 'b']
+
+
+@pytest.mark.asyncio
+async def test_close_writes_the_pending_events(make_log, written):
+    audit_log = make_log(batch_size=10)
+    audit_log.start()
+    await record(audit_log, 'a', 'b')
+    # Taken by the writer, which still waits for its flush interval
+    await asyncio.sleep(0.01)
+
+    await audit_log.close()
+
+    assert written == [['a', 'b']]
+
+
+@pytest.mark.asyncio
+async def test_close_writes_the_queued_events_in_batches(make_log, written):
+    audit_log = make_log(batch_size=2)
+    await record(audit_log, 'a', 'b', 'c')
+
+    await audit_log.close()
+
+    assert written == [['a', 'b'], ['c']]
+
+
+@pytest.mark.asyncio
+async def test_write_is_idempotent(monkeypatch, engine, make_log):
+    monkeypatch.setattr(audit, 'engine', engine)
+    audit_log = make_log()
+    await record(audit_log, 'a')
+    batch = [audit_log._queue.get_nowait()]
+
+    try:
+        # A batch written again on shutdown must not fail or duplicate
+        await AuditLog._write(batch)
+        await AuditLog._write(batch)
+
+        count = select(func.count()).where(AuditEvent.id == batch[0]['id'])
+        async with engine.connect() as conn:
+            assert await conn.scalar(count) == 1
+
+    finally:
+        # Written outside the test's transaction, so nothing rolls it back
+        async with engine.begin() as conn:
+            await conn.execute(
+                delete(AuditEvent).where(AuditEvent.id == batch[0]['id'])
+            )
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import jwt
+import pytest
+
+from app.security import RevocationList
+from tests.factories import RefreshTokenFactory
+
+
+async def login(client, user) -> dict:
+    response = await client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+    assert response.status_code == HTTPStatus.OK
+    return response.json()
+
+
+async def refresh(client, refresh_token: str):
+    return await client.post(
+        '/auth/refresh_token', data={'refresh_token': refresh_token}
+    )
+
+
+async def get_reservations(client, access_token: str):
+    return await client.get(
+        '/users/me/reservations',
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+
+@pytest.mark.asyncio
+async def test_login_returns_token_pair(client, user):
+    tokens = await login(client, user)
+
+    assert tokens['token_type'] == 'bearer'
+    assert tokens['refresh_token']
+    response = await get_reservations(client, tokens['access_token'])
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_the_token(client, user):
+    tokens = await login(client, user)
+
+    response = await refresh(client, tokens['refresh_token'])
+
+    assert response.status_code == HTTPStatus.OK
+    rotated = response.json()
+    assert rotated['refresh_token'] != tokens['refresh_token']
+    response = await get_reservations(client, rotated['access_token'])
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revokes_the_family(client, user):
+    tokens = await login(client, user)
+    rotated = (await refresh(client, tokens['refresh_token'])).json()
+
+    response = await refresh(client, tokens['refresh_token'])
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = await refresh(client, rotated['refresh_token'])
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = await get_reservations(client, rotated['access_token'])
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_access_token_is_not_a_refresh_token(client, user):
+    tokens = await login(client, user)
+
+    response = await refresh(client, tokens['access_token'])
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = await get_reservations(client, tokens['refresh_token'])
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_and_refresh_tokens(client, user):
+    tokens = await login(client, user)
+
+    response = await client.post(
+        '/auth/logout', data={'refresh_token': tokens['refresh_token']}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    response = await refresh(client, tokens['refresh_token'])
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = await get_reservations(client, tokens['access_token'])
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_password_change_revokes_refresh_tokens(client, user):
+    tokens = await login(client, user)
+
+    response = await client.patch(
+        f'/users/{user.id}',
+        json={'password': 'changed'},
+        headers={'Authorization': f'Bearer {tokens["access_token"]}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    response = await refresh(client, tokens['refresh_token'])
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_user_delete_revokes_access_tokens(client, user, session):
+    tokens = await login(client, user)
+
+    response = await client.delete(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {tokens["access_token"]}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    response = await get_reservations(client, tokens['access_token'])
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    # The rows outlive the user, so other workers sync the revocation too
+    family_id = jwt.decode(
+        tokens['access_token'], options={'verify_signature': False}
+    )['sid']
+    revocations = RevocationList()
+    await revocations.sync(session)
+    assert family_id in revocations
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_sync(session, user):
+    revoked = RefreshTokenFactory(user_id=user.id)
+    revoked.revoked_at = datetime.now()
+    expired = RefreshTokenFactory(
+        user_id=user.id, expires_at=datetime.now() - timedelta(days=1)
+    )
+    expired.revoked_at = datetime.now()
+    live = RefreshTokenFactory(user_id=user.id)
+    session.add_all([revoked, expired, live])
+    await session.commit()
+
+    revocations = RevocationList()
+    await revocations.sync(session)
+
+    assert revoked.family_id in revocations
+    assert expired.family_id not in revocations
+    assert live.family_id not in revocations
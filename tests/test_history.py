@@ -0,0 +1,66 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+
+from app.models import SeatStatus
+
+
+@pytest.fixture
+def history(client, token):
+    async def get(**params):
+        return await client.get(
+            '/users/me/reservations',
+            params=params,
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    return get
+
+
+@pytest.mark.asyncio
+async def test_history_lists_live_reservations(
+        book, seat_ids, history, user, first_seat_hold
+):
+    await first_seat_hold(user, expires_in=timedelta(minutes=-1))
+    await book('hold', seat_ids[1:3])
+
+    response = await history()
+
+    assert response.status_code == HTTPStatus.OK
+    items = response.json()['items']
+    assert {item['seat_id'] for item in items} == set(seat_ids[1:3])
+    assert {item['status'] for item in items} == {SeatStatus.on_hold.value}
+    assert all(item['seat_label'].startswith('A') for item in items)
+
+
+@pytest.mark.asyncio
+async def test_history_pages(book, seat_ids, history):
+    await book('hold', seat_ids[:3])
+    limit = 2
+
+    first = (await history(limit=limit)).json()
+    second = (await history(limit=limit, cursor=first['next_cursor'])).json()
+
+    assert len(first['items']) == limit
+    assert second['next_cursor'] is None
+    assert {item['seat_id'] for item in first['items'] + second['items']} == set(
+        seat_ids[:3]
+    )
+
+
+@pytest.mark.asyncio
+async def test_cached_history_sees_confirmations(book, seat_ids, history):
+    await book('hold', seat_ids[:1])
+    assert (await history()).json()['items'][0]['status'] == SeatStatus.on_hold
+
+    await book('confirm', seat_ids[:1])
+
+    assert (await history()).json()['items'][0]['status'] == SeatStatus.confirmed
+
+
+@pytest.mark.asyncio
+async def test_history_rejects_invalid_cursor(history):
+    response = await history(cursor='not-a-cursor')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app import load_shedding
+from app.load_shedding import LoadShedder, load_shedding_middleware
+
+HOLD_URL = '/movies/sessions/sessions/{}/seats/hold'
+BOOKING_CONCURRENCY = 2
+BOOKING_QUEUE_SIZE = 2
+# Latency budgets of the degraded paths
+STALE_READ_SECONDS = 0.2
+FAIL_FAST_SECONDS = 0.1
+
+
+class ThrottledDatabase:
+    """Stand-in for the database, every query first waits `delay` for a
+    connection and reports that wait like app.database.get_session does."""
+
+    def __init__(self, shedder: LoadShedder):
+        self.shedder = shedder
+        self.delay = 0.0
+
+    async def query(self, result):
+        await asyncio.sleep(self.delay)
+        self.shedder.observe_pool_wait(self.delay)
+        return result
+
+
+@pytest.fixture
+def shedder(monkeypatch):
+    shedder = LoadShedder(
+        pool_wait_ms=50,
+        loop_lag_ms=50,
+        cooldown=0.5,
+        booking_concurrency=BOOKING_CONCURRENCY,
+        booking_queue_size=BOOKING_QUEUE_SIZE,
+        booking_wait=0.5,
+        catalog_cache_size=10,
+    )
+    monkeypatch.setattr(load_shedding, 'load_shedder', shedder)
+    return shedder
+
+
+@pytest.fixture
+def database(shedder):
+    return ThrottledDatabase(shedder)
+
+
+@pytest_asyncio.fixture
+async def chaos_client(database):
+    app = FastAPI()
+    app.middleware('http')(load_shedding_middleware)
+
+    @app.get('/movies/')
+    async def get_movies():
+        return await database.query([{'title': 'Movie 1'}])
+
+    @app.post('/movies/sessions/sessions/{session_id}/seats/hold')
+    async def hold_seats(session_id: str):
+        return await database.query({'session_id': session_id})
+
+    @app.get('/reports/sales/days')
+    async def get_daily_sales():
+        return await database.query([])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://test'
+    ) as client:
+        yield client
+
+
+async def timed(request):
+    started = time.perf_counter()
+    response = await request
+    return response, time.perf_counter() - started
+
+
+async def saturate(client, database, delay: float):
+    database.delay = delay
+    # The first slow request trips the shedder, the ones after it are shed
+    await client.get('/movies/', params={'warmup': 'no'})
+
+
+@pytest.mark.asyncio
+async def test_catalog_reads_are_served_stale_with_bounded_latency(
+        chaos_client, database, shedder
+):
+    fresh = await chaos_client.get('/movies/')
+    await saturate(chaos_client, database, delay=1.0)
+
+    assert shedder.overloaded()
+
+    results = await asyncio.gather(
+        *(timed(chaos_client.get('/movies/')) for _ in range(50))
+    )
+
+    for response, elapsed in results:
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers['x-cache'] == 'STALE'
+        assert response.json() == fresh.json()
+        assert elapsed < STALE_READ_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_uncached_and_bulk_reads_fail_fast_with_retry_after(
+        chaos_client, database
+):
+    await saturate(chaos_client, database, delay=1.0)
+
+    for url in ('/reports/sales/days', '/movies/?page=2'):
+        response, elapsed = await timed(chaos_client.get(url))
+
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert int(response.headers['retry-after']) >= 1
+        assert elapsed < FAIL_FAST_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_booking_writes_are_queued_then_shed(chaos_client, database):
+    await saturate(chaos_client, database, delay=0.3)
+
+    bookings = 8
+    results = await asyncio.gather(
+        *(timed(chaos_client.post(HOLD_URL.format(index))) for index in range(bookings))
+    )
+    statuses = [response.status_code for response, _ in results]
+
+    # Two run at once, two wait for a slot, the rest are turned away
+    admitted = BOOKING_CONCURRENCY + BOOKING_QUEUE_SIZE
+    assert statuses.count(HTTPStatus.OK) == admitted
+    assert statuses.count(HTTPStatus.SERVICE_UNAVAILABLE) == bookings - admitted
+    assert max(elapsed for _, elapsed in results) < 1.0
+
+
+@pytest.mark.asyncio
+async def test_traffic_flows_again_after_cooldown(chaos_client, database, shedder):
+    await saturate(chaos_client, database, delay=1.0)
+    database.delay = 0.0
+
+    await asyncio.sleep(shedder.cooldown)
+    responses = [await chaos_client.get('/reports/sales/days') for _ in range(20)]
+
+    # The slow waits from before the cooldown must not trip it again
+    assert [response.status_code for response in responses] == [HTTPStatus.OK] * 20
+    assert not shedder.overloaded()
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+
+from app.scheduling import room_time
+from tests.factories import MovieFactory, SessionFactory
+
+
+@pytest.mark.asyncio
+async def test_update_runtime_reschedules_future_sessions(client, token, session, user):
+    movie = MovieFactory(owner=user, runtime_minutes=90)
+    upcoming = SessionFactory(movie=movie)
+    past = SessionFactory(
+        movie=movie,
+        cinema_room=upcoming.cinema_room,
+        session_time=datetime(2020, 1, 1),
+        ends_at=datetime(2020, 1, 1) + room_time(90),
+    )
+    session.add_all([upcoming, past])
+    await session.commit()
+
+    response = await client.patch(
+        f'/movies/{movie.id}',
+        data={'runtime_minutes': 120},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    await session.refresh(upcoming)
+    await session.refresh(past)
+    assert upcoming.ends_at == upcoming.session_time + room_time(120)
+    assert past.ends_at == datetime(2020, 1, 1) + room_time(90)
+
+
+@pytest.mark.asyncio
+async def test_update_runtime_refuses_overlapping_sessions(
+        client, token, session, user
+):
+    runtime = 90
+    movie = MovieFactory(owner=user, runtime_minutes=runtime)
+    first = SessionFactory(movie=movie)
+    second = SessionFactory(
+        movie=movie,
+        cinema_room=first.cinema_room,
+        session_time=first.session_time + timedelta(hours=3),
+    )
+    session.add_all([first, second])
+    await session.commit()
+    overlap = [first.id, second.id]
+
+    response = await client.patch(
+        f'/movies/{movie.id}',
+        data={'runtime_minutes': 240},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json()['detail']['overlaps'] == [overlap]
+    await session.refresh(movie)
+    assert movie.runtime_minutes == runtime
+
+
+@pytest.mark.asyncio
+async def test_search_counts_genres(client, session, user):
+    session.add_all([
+        MovieFactory(owner=user, genre='drama'),
+        MovieFactory(owner=user, genre='drama'),
+        MovieFactory(owner=user, genre='comedy'),
+    ])
+    await session.commit()
+
+    response = await client.get('/movies/search')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['facets'] == {'drama': 2, 'comedy': 1}
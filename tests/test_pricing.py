@@ -0,0 +1,117 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+
+from app.models import SeatCategory
+from app.pricing import PriceTables, seat_category
+from tests.factories import DEFAULT_TENANT
+
+
+def test_seat_category():
+    assert seat_category('A', True, ['A']) == SeatCategory.accessible
+    assert seat_category('A', False, ['A']) == SeatCategory.premium
+    assert seat_category('B', False, ['A']) == SeatCategory.standard
+
+
+def test_seat_category_matches_whole_rows():
+    # Stored as a string, 'AB' used to make row 'B' premium as well
+    assert seat_category('B', False, ['AB']) == SeatCategory.standard
+
+
+@pytest.mark.asyncio
+async def test_set_prices_rejects_duplicate_categories(client, token, movie_session):
+    response = await client.put(
+        f'/movies/sessions/sessions/{movie_session.id}/prices',
+        json=[
+            {'category': 'standard', 'price': '20.00'},
+            {'category': 'standard', 'price': '25.00'},
+        ],
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_quote_prices_premium_rows(client, token, session, movie_session):
+    movie_session.cinema_room.premium_rows = ['A']
+    await session.commit()
+    response = await client.put(
+        f'/movies/sessions/sessions/{movie_session.id}/prices',
+        json=[
+            {'category': 'standard', 'price': '20.00'},
+            {'category': 'premium', 'price': '30.00'},
+        ],
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+    seats = movie_session.cinema_room.seats[:2]
+
+    response = await client.post(
+        f'/movies/sessions/sessions/{movie_session.id}/quote',
+        json={'seat_ids': [seat.id for seat in seats]},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    quote = response.json()
+    assert Decimal(quote['total']) == Decimal('60.00')
+    assert {seat['category'] for seat in quote['seats']} == {'premium'}
+
+
+@pytest.mark.asyncio
+async def test_seed_cinema_room_with_premium_rows(client, token):
+    response = await client.post(
+        '/rooms/',
+        params={
+            'cinema_room_name': 'Room 1',
+            'rows': 3,
+            'columns': 4,
+            'premium_rows': ['b', 'C'],
+        },
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+
+
+@pytest.mark.asyncio
+async def test_seed_cinema_room_rejects_unknown_premium_rows(client, token):
+    response = await client.post(
+        '/rooms/',
+        params={
+            'cinema_room_name': 'Room 1',
+            'rows': 2,
+            'columns': 4,
+            'premium_rows': ['D'],
+        },
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_room_categories_are_reloaded(session, movie_session):
+    session.info['tenant_id'] = DEFAULT_TENANT
+    tables = PriceTables(ttl=60)
+    session_id, cinema_room_id = movie_session.id, movie_session.cinema_room_id
+    seat_id = movie_session.cinema_room.seats[0].id
+
+    async def category() -> SeatCategory:
+        tables.invalidate(session_id)
+        return (await tables.get(session, session_id)).categories[seat_id]
+
+    assert await category() == SeatCategory.standard
+    movie_session.cinema_room.premium_rows = ['A']
+    await session.commit()
+    # Shared by the sessions of the room, until it expires or is invalidated
+    assert await category() == SeatCategory.standard
+
+    tables.invalidate_room(cinema_room_id)
+    assert await category() == SeatCategory.premium
+
+    movie_session.cinema_room.premium_rows = []
+    await session.commit()
+    tables.ttl = 0
+    assert await category() == SeatCategory.standard
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import event, text
+
+from app.query_log import QueryLog, fingerprint, normalize_statement
+
+
+@pytest.fixture
+def query_log(engine):
+    query_log = QueryLog(slow_ms=0, buffer_size=2, max_fingerprints=10, explain=True)
+    query_log.install(engine.sync_engine)
+    yield query_log
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute', query_log._before_cursor_execute
+    )
+    event.remove(
+        engine.sync_engine, 'after_cursor_execute', query_log._after_cursor_execute
+    )
+
+
+def test_normalize_statement():
+    statement = """
+        SELECT * FROM movies
+        WHERE title = 'It''s' AND year > 1999 AND id IN (%(id_1)s, %(id_2)s)
+    """
+
+    assert normalize_statement(statement) == (
+        'SELECT * FROM movies WHERE title = ? AND year > ? AND id IN (?...)'
+    )
+    assert normalize_statement('SELECT 1.5, $1') == normalize_statement(
+        'SELECT 2, %s'
+    )
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_ring_buffer(engine, query_log):
+    async with engine.connect() as conn:
+        for value in ('1', '2', '3'):
+            await conn.execute(text(f'SELECT {value}'))
+
+    key = fingerprint('SELECT ?')
+    assert query_log.stats[key].calls == 3  # noqa: PLR2004
+    assert [query['fingerprint'] for query in query_log.slow_queries] == [key, key]
+
+
+@pytest.mark.asyncio
+async def test_fast_queries_are_not_captured(engine, query_log):
+    query_log.slow_ms = float('inf')
+
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+
+    assert query_log.stats[fingerprint('SELECT ?')].slow_calls == 0
+    assert not query_log.slow_queries
+    assert not query_log.plans
+
+
+@pytest.mark.asyncio
+async def test_slow_query_plans_do_not_run_the_query_again(engine, query_log):
+    statement = (
+        'WITH added AS (INSERT INTO explained VALUES (1) RETURNING id) '
+        'SELECT id FROM added'
+    )
+
+    async with engine.connect() as conn:
+        await conn.execute(text('CREATE TEMP TABLE explained (id integer)'))
+        await conn.execute(text(statement))
+        added = await conn.scalar(text('SELECT count(*) FROM explained'))
+
+    assert added == 1
+    plan = query_log.plans[fingerprint(normalize_statement(statement))]
+    assert 'Actual Rows' not in plan[0]['Plan']
+    assert query_log.snapshot()['slow_queries'][0]['plan'] == plan
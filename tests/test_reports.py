@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, update
+
+from app.models import SeatReservation, SessionPrice, SessionSales
+from app.reports import REFRESH_LOCK, refresh_session_sales
+from tests.factories import SessionPriceFactory
+
+OVERLAP = timedelta(minutes=5)
+
+
+@pytest_asyncio.fixture
+async def priced_session(session, session_id):
+    session.add(SessionPriceFactory(session_id=session_id, price=Decimal('10.00')))
+    await session.commit()
+    return session_id
+
+
+async def confirm(book, seat_ids):
+    assert (await book('hold', seat_ids)).status_code == HTTPStatus.OK
+    assert (await book('confirm', seat_ids)).status_code == HTTPStatus.OK
+
+
+async def sales_of(session, session_id) -> tuple[int, Decimal]:
+    await refresh_session_sales(session, OVERLAP)
+    sales = await session.execute(
+        select(SessionSales.seats_sold, SessionSales.revenue).where(
+            SessionSales.session_id == session_id
+        )
+    )
+    return tuple(sales.one())
+
+
+@pytest.mark.asyncio
+async def test_confirm_updates_the_sales(session, priced_session, book, seat_ids):
+    assert await sales_of(session, priced_session) == (0, Decimal('0.00'))
+
+    await confirm(book, seat_ids[:2])
+
+    assert await sales_of(session, priced_session) == (2, Decimal('20.00'))
+
+
+@pytest.mark.asyncio
+async def test_price_changes_leave_past_revenue_alone(
+        session, priced_session, book, seat_ids
+):
+    await confirm(book, seat_ids[:1])
+    assert await sales_of(session, priced_session) == (1, Decimal('10.00'))
+
+    await session.execute(
+        update(SessionPrice)
+        .where(SessionPrice.session_id == priced_session)
+        .values(price=Decimal('30.00'))
+    )
+    await session.commit()
+
+    assert await sales_of(session, priced_session) == (1, Decimal('10.00'))
+    assert await session.scalar(select(SeatReservation.price)) == Decimal('10.00')
+
+
+@pytest.mark.asyncio
+async def test_refresh_lock_is_per_schema(session, engine, movie_session):
+    # The test's transaction keeps the lock once refreshed, so lock first
+    for schema, skipped in (('public', True), ('other_tenant', False)):
+        async with engine.connect() as conn, conn.begin():
+            await conn.execute(
+                select(func.pg_advisory_xact_lock(REFRESH_LOCK, func.hashtext(schema)))
+            )
+            assert (await refresh_session_sales(session, OVERLAP) is None) is skipped
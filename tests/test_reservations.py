@@ -0,0 +1,80 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import select
+
+from app.models import SeatReservation, SeatStatus
+
+
+@pytest.mark.asyncio
+async def test_hold_and_confirm_seats(book, session, session_id, seat_ids):
+    response = await book('hold', seat_ids[:2])
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['status'] == SeatStatus.on_hold
+
+    response = await book('confirm', seat_ids[:2])
+
+    assert response.status_code == HTTPStatus.OK
+    statuses = await session.scalars(
+        select(SeatReservation.status).where(
+            SeatReservation.session_id == session_id
+        )
+    )
+    assert statuses.all() == [SeatStatus.confirmed] * 2
+
+
+@pytest.mark.asyncio
+async def test_hold_seat_held_by_someone_else(book, seat_ids, first_seat_hold):
+    await first_seat_hold()
+
+    response = await book('hold', seat_ids[:2])
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    # All or nothing, the free seat was not held either
+    response = await book('confirm', seat_ids[1:2])
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_hold_takes_over_an_expired_hold(book, seat_ids, first_seat_hold):
+    await first_seat_hold(expires_in=timedelta(minutes=-1))
+
+    response = await book('hold', seat_ids[:1])
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['seat_ids'] == seat_ids[:1]
+
+
+@pytest.mark.asyncio
+async def test_confirm_expired_hold(book, user, seat_ids, first_seat_hold):
+    await first_seat_hold(user, expires_in=timedelta(minutes=-1))
+
+    response = await book('confirm', seat_ids[:1])
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_confirm_seat_held_by_someone_else(book, seat_ids, first_seat_hold):
+    await first_seat_hold()
+
+    response = await book('confirm', seat_ids[:1])
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_partial_confirm(book, session, seat_ids):
+    response = await book('hold', seat_ids[:1])
+    assert response.status_code == HTTPStatus.OK
+
+    response = await book('confirm', seat_ids[:2])
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    # Rolled back, the seat that was held is still on hold
+    status = await session.scalar(
+        select(SeatReservation.status).where(SeatReservation.seat_id == seat_ids[0])
+    )
+    assert status == SeatStatus.on_hold
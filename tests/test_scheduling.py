@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import Session as MovieSession
+
+# Past 65535 bind parameters as a single multi row VALUES
+SCHEDULED = 8200
+
+
+@pytest.mark.asyncio
+async def test_schedule_past_the_bind_parameter_limit(
+        client, token, session, movie_session
+):
+    movie_id, cinema_room_id = movie_session.movie_id, movie_session.cinema_room_id
+    start = datetime(2100, 1, 1)
+    entries = [
+        {
+            'movie_id': movie_id,
+            'cinema_room_id': cinema_room_id,
+            'session_time': (start + timedelta(hours=4 * index)).isoformat(),
+        }
+        for index in range(SCHEDULED)
+    ]
+
+    response = await client.post(
+        '/movies/sessions/sessions/schedule',
+        json=entries,
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    scheduled = select(func.count()).where(MovieSession.session_time >= start)
+    assert await session.scalar(scheduled) == SCHEDULED
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.models import SeatReservation
+from app.reservations import expire_holds, reconcile_seat_counters
+
+SEATS = 8
+
+
+@pytest.fixture
+def counters(client, movie_session):
+    """Held, confirmed and free seats as served by the occupancy route."""
+    cinema_room_id = movie_session.cinema_room_id
+
+    async def read() -> tuple[int, int, int]:
+        response = await client.get(
+            '/movies/sessions/sessions/occupancy',
+            params={'cinema_room_id': cinema_room_id},
+        )
+        (row,) = response.json()
+        return row['held_seats'], row['confirmed_seats'], row['free_seats']
+
+    return read
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_holds_and_confirms(book, seat_ids, counters):
+    assert await counters() == (0, 0, SEATS)
+
+    await book('hold', seat_ids[:3])
+    assert await counters() == (3, 0, SEATS - 3)
+
+    await book('confirm', seat_ids[:2])
+    assert await counters() == (1, 2, SEATS - 3)
+
+
+@pytest.mark.asyncio
+async def test_rejected_hold_keeps_counters(book, seat_ids, counters):
+    await book('hold', seat_ids[:1])
+
+    response = await book('hold', [*seat_ids[:1], 'no-such-seat'])
+
+    assert not response.is_success
+    assert await counters() == (1, 0, SEATS - 1)
+
+
+@pytest.mark.asyncio
+async def test_expired_holds_free_their_seats(session, book, seat_ids, counters):
+    held = seat_ids[:2]
+    await book('hold', held)
+    await session.execute(
+        update(SeatReservation).values(expires_at=datetime(2020, 1, 1))
+    )
+
+    assert await expire_holds(session) == len(held)
+    await session.commit()
+
+    assert await counters() == (0, 0, SEATS)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drift(session, first_seat_hold, counters):
+    # Written behind the app's back, the counters never saw this hold
+    await first_seat_hold()
+    assert await counters() == (0, 0, SEATS)
+
+    assert await reconcile_seat_counters(session) == 1
+
+    assert await counters() == (1, 0, SEATS - 1)
+    assert await reconcile_seat_counters(session) == 0
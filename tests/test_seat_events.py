@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from app.models import SeatStatus
+from app.routers.sessions import seat_event_stream
+from app.seat_events import SeatEventBroker, seat_event, seat_event_broker
+
+
+class ConnectedRequest:
+    async def is_disconnected(self) -> bool:  # noqa: PLR6301
+        return False
+
+
+def parse(message: str) -> tuple[str, object]:
+    event, data = message.strip().split('\n')
+    return event.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+
+@pytest.fixture
+def watch(session_id):
+    subscription = seat_event_broker.subscribe(session_id)
+    yield subscription
+    seat_event_broker.unsubscribe(subscription)
+
+
+def received(subscription) -> list[dict]:
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+@pytest.mark.asyncio
+async def test_committed_hold_reaches_watchers(book, seat_ids, watch):
+    response = await book('hold', seat_ids[:2])
+    assert response.is_success
+
+    events = received(watch)
+    assert {event['seat_id'] for event in events} == set(seat_ids[:2])
+    assert {event['status'] for event in events} == {SeatStatus.on_hold.value}
+
+
+@pytest.mark.asyncio
+async def test_rejected_hold_sends_nothing(book, seat_ids, watch, first_seat_hold):
+    await first_seat_hold()
+
+    response = await book('hold', seat_ids[:2])
+
+    assert not response.is_success
+    assert received(watch) == []
+
+
+def test_slow_watcher_is_dropped():
+    broker = SeatEventBroker(queue_size=1, bridged=False, channel='seat_events')
+    subscription = broker.subscribe('session')
+
+    broker.dispatch([
+        seat_event('session', 'seat-1', SeatStatus.on_hold),
+        seat_event('session', 'seat-2', SeatStatus.on_hold),
+    ])
+
+    assert subscription.overflowed
+    assert subscription.queue.get_nowait() is None
+    assert broker.watchers('session') == 0
+
+
+@pytest.mark.asyncio
+async def test_seat_event_stream(session_id):
+    subscription = seat_event_broker.subscribe(session_id)
+    snapshot = [{'seat_id': 'seat-1', 'status': SeatStatus.confirmed.value}]
+    stream = seat_event_stream(ConnectedRequest(), subscription, snapshot)
+
+    assert parse(await anext(stream)) == ('snapshot', snapshot)
+
+    held = seat_event(session_id, 'seat-2', SeatStatus.on_hold)
+    seat_event_broker.dispatch([held])
+    assert parse(await anext(stream)) == ('seat', held)
+
+    # More than the watcher's queue holds before it reads again
+    seat_event_broker.dispatch([held] * (seat_event_broker.queue_size + 1))
+    assert parse(await anext(stream))[0] == 'overflow'
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert seat_event_broker.watchers(session_id) == 0
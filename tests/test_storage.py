@@ -0,0 +1,78 @@
+import asyncio
+import io
+import time
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from PIL import Image
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import PosterBlob
+from app.storage import LocalBackend, PosterStore
+
+
+def poster() -> io.BytesIO:
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, format='PNG')
+    buffer.seek(0)
+    return buffer
+
+
+class SlowDeleteBackend(LocalBackend):
+    def delete(self, key: str):
+        time.sleep(0.3)
+        super().delete(key)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PosterStore(SlowDeleteBackend(str(tmp_path)))
+
+
+@pytest_asyncio.fixture
+async def orphan(engine, store):
+    """A committed blob whose last movie is gone, past its grace period."""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        key = await store.save(session, poster())
+        await store.release(session, key)
+        await session.execute(
+            update(PosterBlob)
+            .where(PosterBlob.key == key)
+            .values(updated_at=PosterBlob.updated_at - timedelta(hours=1))
+        )
+        await session.commit()
+
+    yield key
+
+    async with AsyncSession(engine) as session:
+        await session.execute(delete(PosterBlob).where(PosterBlob.key == key))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_collect_garbage_removes_orphans(engine, store, orphan):
+    async with AsyncSession(engine) as session:
+        removed = await store.collect_garbage(session, timedelta(minutes=1))
+
+    assert removed == 1
+    assert not store.backend.exists(orphan)
+
+
+@pytest.mark.asyncio
+async def test_collect_garbage_keeps_blob_saved_meanwhile(engine, store, orphan):
+    async with AsyncSession(engine) as collecting:
+        collection = asyncio.create_task(
+            store.collect_garbage(collecting, timedelta(minutes=1))
+        )
+        # The collection is now deleting the blob
+        await asyncio.sleep(0.1)
+
+        async with AsyncSession(engine) as saving:
+            assert await store.save(saving, poster()) == orphan
+            await saving.commit()
+
+        await collection
+
+    assert store.backend.exists(orphan)
@@ -0,0 +1,87 @@
+from http import HTTPStatus
+
+import pytest
+
+from app.database import tenant_directory
+from tests.factories import TenantFactory
+
+
+@pytest.fixture
+def other_tenant(session):
+    tenant = TenantFactory()
+    session.add(tenant)
+    tenant_directory.add(tenant.id)
+    return tenant
+
+
+@pytest.mark.asyncio
+async def test_unknown_tenant_is_rejected(client):
+    response = await client.get('/movies/', headers={'X-Tenant-Id': 'nobody'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Unknown tenant.'}
+
+
+@pytest.mark.asyncio
+async def test_default_tenant_is_accepted(client):
+    response = await client.get('/movies/')
+
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_hold_seats_of_another_tenant(client, token, movie_session, other_tenant):
+    seat = movie_session.cinema_room.seats[0]
+
+    response = await client.post(
+        f'/movies/sessions/sessions/{movie_session.id}/seats/hold',
+        json={'seat_ids': [seat.id]},
+        headers={'Authorization': f'Bearer {token}', 'X-Tenant-Id': other_tenant.id},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_confirm_seats_of_another_tenant(
+        client, token, movie_session, other_tenant
+):
+    seat = movie_session.cinema_room.seats[0]
+    response = await client.post(
+        f'/movies/sessions/sessions/{movie_session.id}/seats/hold',
+        json={'seat_ids': [seat.id]},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.post(
+        f'/movies/sessions/sessions/{movie_session.id}/seats/confirm',
+        json={'seat_ids': [seat.id]},
+        headers={'Authorization': f'Bearer {token}', 'X-Tenant-Id': other_tenant.id},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_best_seats_of_another_tenant(client, token, movie_session, other_tenant):
+    response = await client.post(
+        f'/movies/sessions/sessions/{movie_session.id}/seats/best',
+        json={'party_size': 2},
+        headers={'Authorization': f'Bearer {token}', 'X-Tenant-Id': other_tenant.id},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_quote_of_another_tenant(client, movie_session, other_tenant):
+    seat = movie_session.cinema_room.seats[0]
+
+    response = await client.post(
+        f'/movies/sessions/sessions/{movie_session.id}/quote',
+        json={'seat_ids': [seat.id]},
+        headers={'X-Tenant-Id': other_tenant.id},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
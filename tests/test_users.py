@@ -0,0 +1,53 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_create_user(client):
+    response = await client.post(
+        '/users/',
+        json={'username': 'alice', 'email': 'alice@test.com', 'password': 'secret'},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['email'] == 'alice@test.com'
+
+
+@pytest.mark.asyncio
+async def test_create_user_conflict(client, user):
+    response = await client.post(
+        '/users/',
+        json={'username': user.username, 'email': user.email, 'password': 'secret'},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_get_user_by_id(client, user):
+    response = await client.get(f'/users/{user.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_my_reservations_requires_token(client):
+    response = await client.get('/users/me/reservations')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_get_my_reservations_empty(client, token):
+    response = await client.get(
+        '/users/me/reservations', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'items': [], 'next_cursor': None}